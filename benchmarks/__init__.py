@@ -0,0 +1 @@
+# Benchmarks offline do report_generator (dados sintéticos, sem chamadas à API).
@@ -0,0 +1,184 @@
+# dados_sinteticos.py
+
+import random
+from datetime import datetime, timedelta, timezone
+
+# dias no formato do workflow da API (`workWeek[].dayOfWeek`, lido por `parse_sla_config`)
+DIAS_SEMANA = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+USUARIOS = ("ana.souza", "bruno.lima", "carla.mendes", "diego.rocha", "integracao-ale7", "integracao-ale12")
+ORIGENS = ("web", "app", "api", "whatsapp")
+UNIDADES = ("Matriz", "Filial Sul", "Filial Norte", "Centro de Distribuição")
+ETIQUETAS = {str(i): f"Etiqueta {i}" for i in range(1, 13)}
+
+# campos padrão como nas abas de config (tag_default -> header_default)
+CAMPOS_PADROES = [
+    ("id", "ID do Card"),
+    ("cliente", "Responsável"),
+    ("cliente_numero", "Whatsapp Número"),
+    ("unidade", "Unidade"),
+    ("status", "Status"),
+    ("status_code", "Status Código"),
+    ("time_created", "Data de Criação"),
+    ("time_last_updated", "Última Alteração"),
+    ("time_status", "time_status"),
+    ("etiquetas", "Etiquetas"),
+    ("priority", "Prioridade"),
+]
+
+# tipos dos campos variáveis (coluna `type` da aba), na proporção das configs reais
+TIPOS_CAMPOS = ("texto",) * 6 + ("lista de opções",) * 2 + ("imagem", "localização")
+
+INICIO_PADRAO = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _turnos(turnos):
+    """`turnos` turnos seguidos entre 06:00 e 22:00, com 30 minutos de intervalo."""
+    duracao = (16 * 60 - 30 * (turnos - 1)) // turnos
+    inicio = 6 * 60
+    resultado = []
+    for _ in range(turnos):
+        fim = inicio + duracao
+        resultado.append({"startTime": f"{inicio // 60:02d}:{inicio % 60:02d}", "endTime": f"{fim // 60:02d}:{fim % 60:02d}"})
+        inicio = fim + 30
+    return resultado
+
+
+def gerar_workflow(config_id=1, status=10, turnos=2, feriados=12, seed=0, inicio=INICIO_PADRAO):
+    """
+    Workflow de uma config no formato da API (`extra_data.sla`), com SLA em ~80% dos status.
+
+    Args:
+        config_id (int): ID da config sintética.
+        status (int): Quantidade de status (códigos 1..status).
+        turnos (int): Turnos por dia útil (1 = horário comercial corrido).
+        feriados (int): Feriados por status, sorteados nos 2 anos a partir de `inicio`.
+        seed (int): Semente do sorteio.
+
+    Returns:
+        dict: workflow, para `parse_sla_config` / `GeradorSLA`.
+    """
+    rng = random.Random(f"workflow-{seed}")
+    sla = []
+    for codigo in range(1, status + 1):
+        if rng.random() < 0.2:
+            continue
+        work_week = []
+        for dia, nome in enumerate(DIAS_SEMANA):
+            ativo = dia < 5 or rng.random() < 0.25
+            work_week.append({"dayOfWeek": nome, "isActive": ativo, "shifts": _turnos(turnos) if ativo else []})
+        horas = rng.choice([1, 2, 4, 8, 24, 48, 72, 120])
+        sla.append({
+            "statusId": codigo,
+            "slaTime": f"{horas:02d}:{rng.choice([0, 30]):02d}",
+            "slaType": "hours",
+            "workWeek": work_week,
+            "holidays": sorted({(inicio + timedelta(days=rng.randint(0, 730))).strftime("%Y-%m-%d")
+                                for _ in range(feriados)}),
+        })
+    return {"id": config_id, "name": f"Config sintética {config_id}", "extra_data": {"sla": sla}}
+
+
+def gerar_campos_config(campos=40, seed=0):
+    """
+    Campos da aba de config: (campos_padroes, campos_variaveis, header_report_dict, etiquetas_dict).
+    Inclui duas expressões "customizado", como nas configs reais.
+    """
+    rng = random.Random(f"campos-{seed}")
+    variaveis = [(f"{i + 1:02d} - CAMPO {i + 1}", rng.choice(TIPOS_CAMPOS)) for i in range(campos)]
+    variaveis.append(("len(order_json.get('status_history', []))", "customizado"))
+    variaveis.append(("str(valor).upper()", "customizado"))
+    headers = {"len(order_json.get('status_history', []))": "Eventos", "str(valor).upper()": "Maiúsculas"}
+    return list(CAMPOS_PADROES), variaveis, headers, dict(ETIQUETAS)
+
+
+def _valor_campo(rng, tipo, order_id):
+    if rng.random() < 0.15:
+        return rng.choice([None, "", "-"])
+    if tipo == "lista de opções":
+        opcoes = ["Sim", "Não", "Pendente", "Cancelado"]
+        return f"OptionList;{rng.randint(0, len(opcoes))};" + ";".join(opcoes)
+    if tipo == "imagem":
+        return {"_type": "image", "url": f"https://cdn.zapform.com.br/{order_id}/{rng.randint(1, 9)}.jpg"}
+    if tipo == "localização":
+        return {"_type": "location", "lat": round(rng.uniform(-33, -5), 6), "lng": round(rng.uniform(-70, -35), 6)}
+    sorteio = rng.random()
+    if sorteio < 0.2:
+        return rng.randint(1, 100000)
+    if sorteio < 0.3:
+        return round(rng.uniform(0, 5000), 2)
+    return " ".join(rng.choice(("CONTRATO", "PROVEDOR", "FIBRA", "SUL", "RENOVAÇÃO", "MG", "OI", "NAVA"))
+                    for _ in range(rng.randint(1, 6)))
+
+
+def gerar_ordem(rng, order_id, campos_variaveis, status=10, profundidade=6, inicio=INICIO_PADRAO):
+    """
+    JSON de uma ordem como o GET `/api/zc/{config_id}/order/{id}/`.
+
+    O histórico tem, em média, `profundidade` eventos (0 a 2x), com status repetidos
+    em sequência (colapsados pelo SLA) e usuários humanos e de integração.
+    """
+    criada = inicio + timedelta(seconds=rng.randint(0, 600 * 86400))
+    quando = criada
+    historico = []
+    codigo = rng.randint(1, status)
+    for _ in range(rng.randint(0, 2 * profundidade)):
+        quando += timedelta(seconds=rng.randint(60, 5 * 86400))
+        if rng.random() > 0.25:
+            codigo = rng.randint(1, status)
+        historico.append({
+            "time_created": _iso(quando),
+            "status": {"code": codigo, "status": f"Status {codigo}"},
+            "event_data": {"user": rng.choice(USUARIOS), "source": rng.choice(ORIGENS)},
+        })
+
+    pedido = {}
+    for tag, tipo in campos_variaveis:
+        if tipo != "customizado":
+            pedido[tag] = _valor_campo(rng, tipo, order_id)
+    pedido["Etiquetas"] = ",".join(rng.sample(sorted(ETIQUETAS), rng.randint(0, 3)))
+
+    return {
+        "id": order_id,
+        "time_created": _iso(criada),
+        "time_last_updated": _iso(quando),
+        "time_status": _iso(quando),
+        "status": {"code": codigo, "status": f"Status {codigo}"},
+        "priority_ordering": rng.choice([0, 0, 1, 2, 3]),
+        "location": {"name": rng.choice(UNIDADES)},
+        "client": {"name": f"Cliente {order_id % 997}", "number": f"55{rng.randint(11, 99)}9{rng.randint(10**7, 10**8 - 1)}"},
+        "order": pedido,
+        "status_history": historico,
+    }
+
+
+def iter_lotes_ordens(ids, campos_variaveis, status=10, profundidade=6, tamanho_lote=500, seed=0, versao=0):
+    """
+    Ordens sintéticas em lotes (listas), geradas sob demanda: 1M de ordens não ficam em memória.
+
+    Cada lote tem semente própria, então a mesma chamada gera sempre as mesmas ordens;
+    `versao` muda o conteúdo mantendo os IDs (ordens alteradas entre execuções).
+
+    Args:
+        ids (iterable[int]): IDs das ordens, na ordem.
+    """
+    lote, indice = [], 0
+    rng = random.Random(f"ordens-{seed}-{versao}-0")
+    for order_id in ids:
+        lote.append(gerar_ordem(rng, order_id, campos_variaveis, status=status, profundidade=profundidade))
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote, indice = [], indice + 1
+            rng = random.Random(f"ordens-{seed}-{versao}-{indice}")
+    if lote:
+        yield lote
+
+
+def ids_atualizacao(ordens, alteradas=0.10, novas=0.05):
+    """IDs de uma execução incremental: uma fração das ordens existentes alteradas e ordens novas."""
+    passo = max(1, round(1 / alteradas)) if alteradas else None
+    existentes = list(range(1, ordens + 1, passo)) if passo else []
+    return existentes + list(range(ordens + 1, ordens + 1 + int(ordens * novas)))
@@ -0,0 +1,410 @@
+# executar.py
+"""
+Benchmarks offline do report_generator com dados sintéticos (nenhuma chamada à API).
+
+Mede cada etapa separadamente e o fluxo completo, grava tempo, vazão e pico de
+memória em JSON e compara com um baseline:
+
+    python -m benchmarks.executar --ordens 1000 10000
+    python -m benchmarks.executar --ordens 100000 --profundidade 12 --turnos 3 --salvar-baseline
+    python -m benchmarks.executar --ordens 1000000 --sem-memoria
+
+Sai com código 1 se alguma etapa ficar mais lenta (ou usar mais memória) que o
+baseline além da tolerância.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from report_generator.accumulator import acumular_relatorio_principal, acumular_report_sla
+from report_generator.buffer_colunar import BufferColunar
+from report_generator.extractor import compilar_plano_extracao
+from report_generator.sla_report_generator import GeradorSLA, TZ
+from report_generator.sla_watermark import caminho_watermark
+from report_generator.utils import sla_calendar
+from report_generator.utils.sla_calendar import compilar_calendarios, para_us, deslocamento_us, _minutos_sla
+from report_generator.utils.sla_utils import parse_sla_config, calculate_working_time, calculate_sla_deadline
+from .dados_sinteticos import gerar_workflow, gerar_campos_config, iter_lotes_ordens, ids_atualizacao
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+VERSAO_RESULTADOS = 1
+# piora aceita em relação ao baseline (tempo e pico de memória) antes de acusar regressão
+TOLERANCIA = 0.15
+# pares de instantes do benchmark de calendário (as funções dia a dia de `sla_utils` são lentas)
+PARES_CALENDARIO = 5000
+CONFIG_ID = "1"
+
+
+class _Cronometro:
+    """Soma só o tempo dos trechos medidos (a geração dos dados sintéticos fica de fora)."""
+
+    def __init__(self):
+        self.segundos = 0.0
+
+    @contextlib.contextmanager
+    def medir(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.segundos += time.perf_counter() - inicio
+
+
+def _calendarios_frios():
+    # cada medição começa sem os calendários compilados por execuções anteriores
+    with sla_calendar._cache_lock:
+        sla_calendar._cache_calendarios.clear()
+
+
+def _gerador_sla(cenario):
+    workflow = cenario["workflow"]
+    with contextlib.redirect_stdout(io.StringIO()):  # o gerador imprime o SLA interpretado
+        return GeradorSLA(CONFIG_ID, {CONFIG_ID: workflow}, sla_config=parse_sla_config(workflow))
+
+
+def _lotes(cenario, ids, versao=0):
+    return iter_lotes_ordens(
+        ids, cenario["campos"][1], status=cenario["status"], profundidade=cenario["profundidade"],
+        seed=cenario["seed"], versao=versao
+    )
+
+
+def _extrair(cenario, ids, cron, versao=0):
+    plano = compilar_plano_extracao(cenario["campos"][1], cenario["campos"][3], cenario["campos"][2], cenario["campos"][0])
+    with BufferColunar("bench_report") as buffer:
+        for lote in _lotes(cenario, ids, versao):
+            with cron.medir():
+                for ordem in lote:
+                    buffer.adicionar(plano.extrair(ordem))
+        with cron.medir():
+            return buffer.para_dataframe()
+
+
+def _gerar_sla(cenario, ids, cron, versao=0):
+    with cron.medir():
+        gerador = _gerador_sla(cenario)
+    with BufferColunar("bench_sla") as buffer:
+        for lote in _lotes(cenario, ids, versao):
+            with cron.medir():
+                buffer.adicionar_df(gerador.processar(lote))
+        with cron.medir():
+            return buffer.para_dataframe()
+
+
+# ============================
+# Etapas
+# ============================
+def etapa_extracao(cenario, estado, cron):
+    _calendarios_frios()
+    estado["report"] = _extrair(cenario, cenario["ids"], cron)
+    return len(cenario["ids"])
+
+
+def etapa_sla(cenario, estado, cron):
+    _calendarios_frios()
+    estado["sla"] = _gerar_sla(cenario, cenario["ids"], cron)
+    return len(cenario["ids"])
+
+
+def _pares_calendario(cenario):
+    rng = random.Random(f"calendario-{cenario['seed']}")
+    inicio = TZ.localize(datetime(2024, 1, 1))
+    pares = []
+    for _ in range(min(len(cenario["ids"]), PARES_CALENDARIO)):
+        a = TZ.normalize(inicio + timedelta(seconds=rng.randint(0, 600 * 86400)))
+        pares.append((a, TZ.normalize(a + timedelta(seconds=rng.randint(60, 10 * 86400)))))
+    return pares
+
+
+def etapa_calendario_sla_utils(cenario, estado, cron):
+    sla_config = parse_sla_config(cenario["workflow"])
+    infos = list(sla_config.values())
+    pares = _pares_calendario(cenario)
+    with cron.medir():
+        for i, (a, b) in enumerate(pares):
+            sla_info = infos[i % len(infos)]
+            calculate_working_time(a, b, sla_info)
+            calculate_sla_deadline(a, sla_info)
+    return len(pares)
+
+
+def etapa_calendario_compilado(cenario, estado, cron):
+    _calendarios_frios()
+    sla_config = parse_sla_config(cenario["workflow"])
+    pares = _pares_calendario(cenario)
+    inicio_us = np.array([para_us(a) for a, _ in pares], dtype=np.int64)
+    fim_us = np.array([para_us(b) for _, b in pares], dtype=np.int64)
+    desloc = np.array([deslocamento_us(a) for a, _ in pares], dtype=np.int64)
+    with cron.medir():
+        calendarios = compilar_calendarios(sla_config)
+        status = list(calendarios)
+        for i, codigo in enumerate(status):
+            calendario = calendarios[codigo]
+            fatia = slice(i, None, len(status))
+            if not calendario.preparar_lote(int(inicio_us.min()), int(fim_us.max())):
+                for a, b in pares[fatia]:
+                    calendario.tempo_util(a, b)
+                    calendario.prazo(a, _minutos_sla(sla_config[codigo]["sla_time"]))
+                continue
+            calendario.tempo_util_lote(inicio_us[fatia], fim_us[fatia], desloc[fatia])
+            minutos = np.full(len(inicio_us[fatia]), _minutos_sla(sla_config[codigo]["sla_time"]))
+            calendario.prazo_lote(inicio_us[fatia], desloc[fatia], minutos)
+    return len(pares)
+
+
+def _preparar_acumulado(cenario, estado, nome):
+    """Acumulado existente (execução completa) + lote incremental de ordens alteradas/novas."""
+    funcao = _extrair if nome == "report" else _gerar_sla
+    if nome not in estado:
+        # etapa rodada sem a de extração/SLA: o acumulado existente é gerado fora da medição
+        estado[nome] = funcao(cenario, cenario["ids"], _Cronometro())
+    chave_novos = f"{nome}_novos"
+    if chave_novos not in estado:
+        estado[chave_novos] = funcao(cenario, ids_atualizacao(len(cenario["ids"])), _Cronometro(), versao=1)
+    return estado[chave_novos]
+
+
+def etapa_acumulado_principal(cenario, estado, cron):
+    novos = _preparar_acumulado(cenario, estado, "report")
+    caminho = f"acumulado_config_{CONFIG_ID}_latest{cenario['extensao']}"
+    acumular_relatorio_principal(estado["report"], caminho, reconstruir=True)
+    with cron.medir():
+        acumular_relatorio_principal(novos, caminho)
+    return len(novos)
+
+
+def etapa_acumulado_sla(cenario, estado, cron):
+    novos = _preparar_acumulado(cenario, estado, "sla")
+    caminho = f"acumulado_sla_config_{CONFIG_ID}_latest{cenario['extensao']}"
+    acumular_report_sla(estado["sla"], caminho, reconstruir=True, watermark_path=caminho_watermark(CONFIG_ID))
+    with cron.medir():
+        acumular_report_sla(novos, caminho, watermark_path=caminho_watermark(CONFIG_ID))
+    return len(novos)
+
+
+def etapa_ponta_a_ponta(cenario, estado, cron):
+    """Extração + SLA + acumulados de uma execução completa, como o passo 3–5 do `process_executor`."""
+    _calendarios_frios()
+    plano = compilar_plano_extracao(cenario["campos"][1], cenario["campos"][3], cenario["campos"][2], cenario["campos"][0])
+    with cron.medir():
+        gerador = _gerador_sla(cenario)
+    with BufferColunar("bench_report") as buffer_report, BufferColunar("bench_sla") as buffer_sla:
+        for lote in _lotes(cenario, cenario["ids"]):
+            with cron.medir():
+                for ordem in lote:
+                    buffer_report.adicionar(plano.extrair(ordem))
+                buffer_sla.adicionar_df(gerador.processar(lote))
+        with cron.medir():
+            df_report = buffer_report.para_dataframe()
+            df_sla = buffer_sla.para_dataframe()
+    with cron.medir():
+        acumular_relatorio_principal(df_report, f"e2e_config_{CONFIG_ID}_latest{cenario['extensao']}", reconstruir=True)
+        acumular_report_sla(df_sla, f"e2e_sla_config_{CONFIG_ID}_latest{cenario['extensao']}", reconstruir=True)
+    return len(cenario["ids"])
+
+
+ETAPAS = {
+    "extracao": etapa_extracao,
+    "sla": etapa_sla,
+    "calendario_sla_utils": etapa_calendario_sla_utils,
+    "calendario_compilado": etapa_calendario_compilado,
+    "acumulado_principal": etapa_acumulado_principal,
+    "acumulado_sla": etapa_acumulado_sla,
+    "ponta_a_ponta": etapa_ponta_a_ponta,
+}
+
+
+# ============================
+# Execução e comparação
+# ============================
+def montar_cenario(ordens, profundidade=6, turnos=2, campos=40, status=10, seed=0, formato="csv"):
+    return {
+        "nome": f"{ordens}_ordens_p{profundidade}_t{turnos}_c{campos}_s{status}_{formato}",
+        "parametros": {"ordens": ordens, "profundidade": profundidade, "turnos": turnos,
+                       "campos": campos, "status": status, "seed": seed, "formato": formato},
+        "ids": range(1, ordens + 1),
+        "profundidade": profundidade,
+        "status": status,
+        "seed": seed,
+        "extensao": ".parquet" if formato == "parquet" else ".csv",
+        "workflow": gerar_workflow(int(CONFIG_ID), status=status, turnos=turnos, seed=seed),
+        "campos": gerar_campos_config(campos, seed=seed),
+    }
+
+
+def executar_cenario(cenario, etapas, repeticoes=1, medir_memoria=True):
+    """
+    Roda as etapas do cenário num diretório temporário.
+
+    O tempo é o menor entre `repeticoes` rodadas sem tracemalloc; o pico de memória
+    (alocações novas durante a etapa) vem de uma rodada extra com tracemalloc.
+
+    Returns:
+        dict: {etapa: {"segundos", "itens", "itens_por_s", "pico_mb"}}
+    """
+    resultados = {}
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_") as diretorio:
+        os.chdir(diretorio)
+        try:
+            estado = {}
+            for nome in etapas:
+                melhor, itens = None, 0
+                for _ in range(max(1, repeticoes)):
+                    cron = _Cronometro()
+                    itens = ETAPAS[nome](cenario, estado, cron)
+                    melhor = cron.segundos if melhor is None else min(melhor, cron.segundos)
+
+                pico_mb = None
+                if medir_memoria:
+                    tracemalloc.start()
+                    try:
+                        ETAPAS[nome](cenario, estado, _Cronometro())
+                        pico_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                    finally:
+                        tracemalloc.stop()
+
+                resultados[nome] = {
+                    "segundos": round(melhor, 4),
+                    "itens": itens,
+                    "itens_por_s": round(itens / melhor, 1) if melhor else None,
+                    "pico_mb": pico_mb,
+                }
+                print(f"⏱️ {cenario['nome']} · {nome}: {melhor:.3f}s, {resultados[nome]['itens_por_s']} itens/s"
+                      + (f", pico {pico_mb} MB" if pico_mb is not None else ""))
+        finally:
+            os.chdir(diretorio_original)
+    return resultados
+
+
+def ambiente():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def ler_baseline(caminho):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparar(atual, baseline, tolerancia=TOLERANCIA):
+    """
+    Compara os resultados com o baseline (mesmo cenário e etapa).
+
+    Returns:
+        list[str]: regressões (tempo ou pico de memória acima de `1 + tolerancia` vezes o baseline).
+    """
+    regressoes = []
+    for nome_cenario, cenario in atual["cenarios"].items():
+        base_cenario = (baseline or {}).get("cenarios", {}).get(nome_cenario)
+        if not base_cenario:
+            print(f"ℹ️ {nome_cenario}: sem baseline para comparar")
+            continue
+        print(f"\n📊 {nome_cenario} (baseline de {base_cenario.get('registrado_em', '?')})")
+        for etapa, medida in cenario["etapas"].items():
+            base = base_cenario["etapas"].get(etapa)
+            if not base:
+                continue
+            linha = f"   {etapa:<22} {medida['segundos']:>9.3f}s  (baseline {base['segundos']:.3f}s"
+            marcas = []
+            if base["segundos"] and medida["segundos"] > base["segundos"] * (1 + tolerancia):
+                marcas.append("tempo")
+            if medida.get("pico_mb") is not None and base.get("pico_mb"):
+                linha += f", pico {medida['pico_mb']} MB / {base['pico_mb']} MB"
+                if medida["pico_mb"] > base["pico_mb"] * (1 + tolerancia):
+                    marcas.append("memória")
+            variacao = (medida["segundos"] / base["segundos"] - 1) * 100 if base["segundos"] else 0.0
+            print(f"{linha}, {variacao:+.1f}%) {'⚠️ ' + '/'.join(marcas) if marcas else '✅'}")
+            if marcas:
+                regressoes.append(f"{nome_cenario} · {etapa}: {'/'.join(marcas)}")
+    return regressoes
+
+
+def salvar_baseline(caminho, atual):
+    """Atualiza no baseline os cenários medidos agora (os demais são mantidos)."""
+    baseline = ler_baseline(caminho) or {"versao": VERSAO_RESULTADOS, "cenarios": {}}
+    baseline["ambiente"] = atual["ambiente"]
+    for nome, cenario in atual["cenarios"].items():
+        baseline["cenarios"][nome] = {**cenario, "registrado_em": atual["executado_em"]}
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+    print(f"💾 Baseline atualizado: {caminho}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline do report_generator (dados sintéticos)")
+    parser.add_argument("--ordens", type=int, nargs="+", default=[1000, 10000],
+                        help="quantidades de ordens dos cenários (padrão: 1000 10000; até 1000000)")
+    parser.add_argument("--profundidade", type=int, default=6, help="eventos médios no histórico de cada ordem")
+    parser.add_argument("--turnos", type=int, default=2, help="turnos por dia útil nos calendários de SLA")
+    parser.add_argument("--campos", type=int, default=40, help="campos variáveis da config")
+    parser.add_argument("--status", type=int, default=10, help="status do workflow")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv", help="backend dos acumulados")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--etapas", nargs="+", choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument("--repeticoes", type=int, default=1, help="rodadas de tempo por etapa (vale a menor)")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (rodada extra)")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="arquivo JSON do baseline")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--saida", default=None, help="grava os resultados desta execução em JSON")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="piora aceita antes de acusar regressão (padrão: 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    etapas = [e for e in ETAPAS if e in args.etapas]
+    atual = {
+        "versao": VERSAO_RESULTADOS,
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": ambiente(),
+        "cenarios": {},
+    }
+    for ordens in args.ordens:
+        cenario = montar_cenario(ordens, args.profundidade, args.turnos, args.campos, args.status, args.seed, args.formato)
+        print(f"\n🧪 Cenário {cenario['nome']}")
+        atual["cenarios"][cenario["nome"]] = {
+            "parametros": cenario["parametros"],
+            "etapas": executar_cenario(cenario, etapas, args.repeticoes, medir_memoria=not args.sem_memoria),
+        }
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+
+    regressoes = comparar(atual, ler_baseline(args.baseline), args.tolerancia)
+    if args.salvar_baseline:
+        salvar_baseline(args.baseline, atual)
+    if regressoes:
+        print("\n⚠️ Regressões em relação ao baseline:\n" + "\n".join(f"   - {r}" for r in regressoes))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,59 @@
 import time
 import json
 import logging
+import argparse
 from datetime import datetime, timedelta
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 
 from report_generator.schedule_handler import ask_schedule_execution, esperar_proxima_execucao
-from report_generator.process_executor import executar_processo
+from report_generator.process_executor import executar_processo, formatar_resumo
 from report_generator.email_sender import send_simple_email
+from report_generator.email_outbox import CaixaSaida
+from report_generator.profiler import MODOS_PERFIL, ETAPAS_PERFIL
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Super Reports - Zapform")
+    parser.add_argument("--paralelo", action="store_true",
+                        help="processa as configs em paralelo (pool de processos)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="número de processos no modo paralelo (padrão: 4)")
+    parser.add_argument("--limite-api", type=int, default=None,
+                        help="máximo de requisições simultâneas à API somando todos os processos "
+                             "(padrão: número de logins)")
+    parser.add_argument("--formato-acumulado", choices=["csv", "parquet"], default="csv",
+                        help="backend dos acumulados (parquet requer pyarrow)")
+    parser.add_argument("--exportar-csv", action="store_true",
+                        help="com --formato-acumulado parquet, exporta também o _latest.csv")
+    parser.add_argument("--snapshot-reter", type=int, default=30,
+                        help="snapshots datados mantidos por acumulado (padrão: 30)")
+    parser.add_argument("--limite-memoria", type=float, default=256,
+                        help="MB de linhas em memória por buffer de cada config antes de ir para o disco "
+                             "(padrão: 256)")
+    parser.add_argument("--page-size", type=int, default=200,
+                        help="ordens por página nas listagens da API (padrão: 200)")
+    parser.add_argument("--paginas-simultaneas", type=int, default=4,
+                        help="páginas da listagem buscadas em paralelo; 1 segue o 'next' em série (padrão: 4)")
+    parser.add_argument("--sem-hidratacao", action="store_true",
+                        help="busca cada ordem pelo GET individual, sem montar as ordens com os objetos da listagem")
+    parser.add_argument("--metricas-dir", default="metricas",
+                        help="pasta do JSON de métricas de cada execução e do arquivo Prometheus (padrão: metricas)")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=MODOS_PERFIL, default=None,
+                        help="perfila cada config: cprofile (.pstats) ou amostragem (pilhas .collapsed.txt, "
+                             "inclui as threads da busca); arquivos ao lado do relatório e top-N no log")
+    parser.add_argument("--profile-stage", action="append", choices=ETAPAS_PERFIL, default=None,
+                        help="restringe o --profile a uma etapa (pode repetir; padrão: a config inteira)")
+    parser.add_argument("--profile-top", type=int, default=25,
+                        help="funções mais quentes listadas no log por config perfilada (padrão: 25)")
+    parser.add_argument("--smtp", default=None, metavar="HOST:PORTA",
+                        help="servidor SMTP local sem TLS para testes (ex.: aiosmtpd em localhost:8025); "
+                             "padrão: Gmail")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
     # 📧 Carrega credenciais do e-mail
@@ -49,6 +92,27 @@ def main():
     client = gspread.authorize(creds)
     spreadsheet = client.open("Report_Config")
 
+    opcoes_execucao = {
+        "paralelo": args.paralelo,
+        "max_workers": args.workers,
+        "limite_global_api": args.limite_api,
+        "formato_acumulado": args.formato_acumulado,
+        "exportar_csv": args.exportar_csv,
+        "snapshot_reter_ultimos": args.snapshot_reter,
+        "limite_memoria_mb": args.limite_memoria,
+        "page_size_listagem": args.page_size,
+        "paginas_simultaneas": args.paginas_simultaneas,
+        "hidratar_listagem": not args.sem_hidratacao,
+        "diretorio_metricas": args.metricas_dir or None,
+        "perfil": args.profile or ("cprofile" if args.profile_stage else None),
+        "perfil_etapas": args.profile_stage,
+        "perfil_top": args.profile_top,
+        "smtp_servidor": args.smtp,
+    }
+
+    # 📬 Caixa de saída: os e-mails saem em segundo plano, por uma única conexão SMTP
+    caixa = CaixaSaida(FROM_EMAIL, APP_PASSWORD, servidor=args.smtp)
+
     # ⏳ Pergunta o modo de execução
     modo = ask_schedule_execution()
 
@@ -62,11 +126,12 @@ def main():
                 to_emails=DESTINATARIOS,
                 subject="☑️ Execução agendada INICIADA",
                 body=f"Execução agendada iniciada em {start_time.strftime('%d/%m/%Y %H:%M:%S')}.",
-                app_password=APP_PASSWORD
+                app_password=APP_PASSWORD,
+                caixa=caixa
             )
 
             try:
-                executar_processo(logins, spreadsheet)
+                resumo = executar_processo(logins, spreadsheet, caixa_saida=caixa, **opcoes_execucao)
                 end_time = datetime.now()
                 duration = end_time - start_time
 
@@ -78,9 +143,11 @@ def main():
                         f"Execução finalizada com sucesso.\n\n"
                         f"☑️ Início: {start_time.strftime('%d/%m/%Y %H:%M:%S')}\n"
                         f"✅ Fim: {end_time.strftime('%d/%m/%Y %H:%M:%S')}\n"
-                        f"⏱️ Duração: {duration}"
+                        f"⏱️ Duração: {duration}\n\n"
+                        f"📋 Resumo por config:\n{formatar_resumo(resumo)}"
                     ),
-                    app_password=APP_PASSWORD
+                    app_password=APP_PASSWORD,
+                    caixa=caixa
                 )
 
             except Exception as e:
@@ -98,9 +165,13 @@ def main():
                         f"⏱️ Duração: {duration}\n\n"
                         f"Erro: {str(e)}"
                     ),
-                    app_password=APP_PASSWORD
+                    app_password=APP_PASSWORD,
+                    caixa=caixa
                 )
                 raise
+            finally:
+                # entrega os e-mails do ciclo antes de esperar a próxima execução
+                caixa.esvaziar()
 
     else:
         start_time = datetime.now()
@@ -110,11 +181,12 @@ def main():
             to_emails=DESTINATARIOS,
             subject="🟢 Execução manual INICIADA",
             body=f"Execução manual iniciada em {start_time.strftime('%d/%m/%Y %H:%M:%S')}.",
-            app_password=APP_PASSWORD
+            app_password=APP_PASSWORD,
+            caixa=caixa
         )
 
         try:
-            executar_processo(logins, spreadsheet)
+            resumo = executar_processo(logins, spreadsheet, caixa_saida=caixa, **opcoes_execucao)
             end_time = datetime.now()
             duration = end_time - start_time
 
@@ -126,9 +198,11 @@ def main():
                     f"Execução finalizada com sucesso.\n\n"
                     f"🕒 Início: {start_time.strftime('%d/%m/%Y %H:%M:%S')}\n"
                     f"🕔 Fim: {end_time.strftime('%d/%m/%Y %H:%M:%S')}\n"
-                    f"⏱️ Duração: {duration}"
+                    f"⏱️ Duração: {duration}\n\n"
+                    f"📋 Resumo por config:\n{formatar_resumo(resumo)}"
                 ),
-                app_password=APP_PASSWORD
+                app_password=APP_PASSWORD,
+                caixa=caixa
             )
 
         except Exception as e:
@@ -146,9 +220,12 @@ def main():
                     f"⏱️ Duração: {duration}\n\n"
                     f"Erro: {str(e)}"
                 ),
-                app_password=APP_PASSWORD
+                app_password=APP_PASSWORD,
+                caixa=caixa
             )
             raise
+        finally:
+            caixa.fechar()
 
 
 if __name__ == "__main__":
@@ -1,55 +1,101 @@
 import os
+import glob
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from .data_utils import clean_illegal_chars
-
-
-def _salvar_acumulado_com_versionamento(df_final, base_path):
-    """Salva o DataFrame em três arquivos: o principal, um _latest e um com timestamp."""
+from .storage import (
+    ler_acumulado,
+    salvar_acumulado,
+    formato_do_caminho,
+    trocar_formato,
+    TERMINADOR_CSV,
+    impressao_digital,
+    ler_impressao_digital,
+    gravar_impressao_digital,
+    ler_versao_esquema,
+    gravar_versao_esquema,
+    DTYPES_SLA,
+)
+from .snapshot_store import get_snapshot_store, substituir_por_link
+from .sla_watermark import calcular_watermarks, mesclar_watermarks, ler_watermarks, gravar_watermarks
+
+
+def _caminhos_acumulado(base_path):
+    """(principal, _latest) de um acumulado, aceitando qualquer um dos dois como entrada."""
     base, ext = os.path.splitext(base_path)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-
     if base.endswith('_latest'):
         base = base.rsplit('_latest', 1)[0]
+    return f"{base}{ext}", f"{base}_latest{ext}"
+
+
+def _salvar_acumulado_com_versionamento(df_final, base_path, exportar_csv=False, exigir_gravacao=False):
+    """
+    Salva o acumulado: grava o _latest uma única vez, o principal vira um link
+    para ele e a cópia datada é registrada no repositório de snapshots
+    (conteúdo idêntico não é duplicado).
+    O formato (CSV ou Parquet) segue a extensão de `base_path`; com `exportar_csv`,
+    um acumulado Parquet também é exportado como `_latest.csv`.
+    Se a impressão digital do conteúdo for a mesma do `_latest` atual, nada é regravado.
+    Com `exigir_gravacao`, uma falha na gravação é propagada em vez de só ir para o log.
+
+    Returns:
+        str | None: impressão digital (SHA-256) do conteúdo salvo; None se a gravação falhar.
+    """
+    main_path, latest_path = _caminhos_acumulado(base_path)
+    base = os.path.splitext(main_path)[0]
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
 
-    main_path = f"{base}{ext}"
-    latest_path = f"{base}_latest{ext}"
-    dated_path = f"{base}_{timestamp}{ext}"
+    sha256 = impressao_digital(df_final)
+    if os.path.exists(latest_path) and ler_impressao_digital(latest_path) == sha256:
+        logging.info(f"🟰 {os.path.basename(latest_path)} sem mudanças de conteúdo; gravação e snapshot pulados.")
+        csv_path = trocar_formato(latest_path, "csv")
+        if exportar_csv and formato_do_caminho(latest_path) != "csv" and not os.path.exists(csv_path):
+            df_final.to_csv(csv_path, index=False, lineterminator=TERMINADOR_CSV)
+        return sha256
 
     try:
-        df_final.to_csv(main_path, index=False)
-        df_final.to_csv(latest_path, index=False)
-        df_final.to_csv(dated_path, index=False)
+        salvar_acumulado(df_final, latest_path)
+        gravar_impressao_digital(latest_path, sha256)
+        substituir_por_link(latest_path, main_path)
+        get_snapshot_store().registrar(os.path.basename(base), latest_path, rotulo=timestamp)
         logging.info(
             f"✅ Arquivos salvos: {os.path.basename(main_path)}, "
-            f"{os.path.basename(latest_path)}, {os.path.basename(dated_path)}"
+            f"{os.path.basename(latest_path)} + snapshot {timestamp}"
         )
+        if exportar_csv and formato_do_caminho(latest_path) != "csv":
+            csv_path = trocar_formato(latest_path, "csv")
+            df_final.to_csv(csv_path, index=False, lineterminator=TERMINADOR_CSV)
+            logging.info(f"📤 CSV exportado: {os.path.basename(csv_path)}")
     except Exception as e:
-        logging.error(f"❌ Erro ao salvar arquivos CSV: {e}")
+        logging.error(f"❌ Erro ao salvar arquivos acumulados: {e}")
+        if exigir_gravacao:
+            raise
+        return None
+    return sha256
 
 
-def _read_csv_safe(path, dtype=None):
-    if not os.path.exists(path):
-        return pd.DataFrame()
-    try:
-        return pd.read_csv(path, dtype=dtype)
-    except Exception as e:
-        logging.warning(f"⚠️ Erro ao ler CSV '{path}': {e}")
-        return pd.DataFrame()
+def _read_acumulado_safe(path, dtype=None):
+    return ler_acumulado(path, dtype=dtype)
 
 
 def _clean_strings(df: pd.DataFrame) -> pd.DataFrame:
     for col in df.select_dtypes(include="object").columns:
-        df[col] = df[col].map(clean_illegal_chars)
+        df[col] = _mapear_unicos(df[col], clean_illegal_chars)
     return df
 
 
 # =========================
 # Report Principal
 # =========================
-def acumular_relatorio_principal(df_result, csv_path):
-    """Acumula e deduplica o report principal por 'ID do Card' (fallback: 'ID da Ordem')."""
+def acumular_relatorio_principal(df_result, csv_path, exportar_csv=False, reconstruir=False, exigir_gravacao=False):
+    """
+    Acumula e deduplica o report principal por 'ID do Card' (fallback: 'ID da Ordem').
+    `csv_path` pode apontar para um .csv ou .parquet (backend escolhido pela extensão).
+    Com `reconstruir`, ignora o acumulado existente e o substitui por `df_result`.
+    Com `exigir_gravacao`, uma falha ao gravar o acumulado levanta a exceção (senão só vai para o log).
+    """
     df_result = df_result.copy()
 
     # coluna-chave
@@ -58,12 +104,12 @@ def acumular_relatorio_principal(df_result, csv_path):
         # se não houver nenhuma, apenas salva/retorna
         logging.warning("⚠️ Nenhuma coluna de chave ('ID do Card' ou 'ID da Ordem') encontrada no report principal.")
         df_final = _clean_strings(df_result)
-        _salvar_acumulado_com_versionamento(df_final, csv_path)
+        _salvar_acumulado_com_versionamento(df_final, csv_path, exportar_csv, exigir_gravacao)
         return df_final
 
     df_result[key_col] = df_result[key_col].astype(str).str.strip()
 
-    df_antigo = _read_csv_safe(csv_path)
+    df_antigo = pd.DataFrame() if reconstruir else _read_acumulado_safe(csv_path)
     if not df_antigo.empty and key_col in df_antigo.columns:
         df_antigo[key_col] = df_antigo[key_col].astype(str).str.strip()
         df_final = pd.concat([df_antigo, df_result], ignore_index=True)
@@ -72,50 +118,247 @@ def acumular_relatorio_principal(df_result, csv_path):
         df_final = df_result.copy()
 
     df_final = _clean_strings(df_final)
-    _salvar_acumulado_com_versionamento(df_final, csv_path)
+    _salvar_acumulado_com_versionamento(df_final, csv_path, exportar_csv, exigir_gravacao)
     return df_final
 
 
 # =========================
 # Report SLA (granular por evento)
 # =========================
-def acumular_report_sla(df_sla, csv_path):
+CANDIDATAS_CHAVE_SLA = [
+    ["ID da Ordem", "Etapa", "Código do Status", "Data do Evento"],
+    ["ID da Ordem", "Etapa", "Código do Status"],
+    ["ID da Ordem", "Etapa"],
+]
+
+# Versões do esquema do acumulado SLA (registradas em `{arquivo}.schema.json`):
+#   1 - legado (sem registro): 'Código' em vez de 'Código do Status', sem 'Data do Evento',
+#       textos sem strip e linhas sem ID/Etapa
+#   2 - atual: colunas derivadas criadas, textos normalizados e só linhas com ID/Etapa
+VERSAO_ESQUEMA_SLA = 2
+
+# formatos tentados (nesta ordem) ao migrar datas de acumulados antigos
+FORMATOS_DATA_LEGADA = ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M")
+
+
+def _mapear_unicos(serie, funcao):
+    """
+    Aplica `funcao` uma vez por texto distinto da coluna; valores que não são
+    `str` (NaN, números...) são mantidos como estão.
+    """
+    valores = serie.to_numpy(dtype=object, copy=True)
+    eh_texto = np.fromiter((isinstance(v, str) for v in valores), dtype=bool, count=len(valores))
+    if eh_texto.any():
+        codigos, unicos = pd.factorize(valores[eh_texto])
+        valores[eh_texto] = np.array([funcao(v) for v in unicos], dtype=object)[codigos]
+    return pd.Series(valores, index=serie.index, dtype=object)
+
+
+def _texto_sem_espacos(serie):
+    """Equivale a `serie.astype(str).str.strip()`, mas faz o strip só nos valores distintos."""
+    return _mapear_unicos(serie.astype(str), str.strip)
+
+
+def _chave_hash(df, colunas):
+    """
+    Chave de deduplicação do SLA: hash de 64 bits das colunas em texto
+    (mesma normalização `astype(str)` da antiga junção com "|").
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype="uint64")
+    return pd.util.hash_pandas_object(df[colunas].astype(str), index=False, categorize=True)
+
+
+def _data_legada_unitaria(s):
+    """Converte uma data de acumulado antigo; os formatos conhecidos vêm antes do parser tolerante."""
+    if pd.isna(s):
+        return None
+    s = str(s).strip()
+    for fmt in FORMATOS_DATA_LEGADA:
+        try:
+            return datetime.strptime(s, fmt)
+        except Exception:
+            pass
+    try:
+        v = pd.to_datetime(s, dayfirst=True, errors="coerce")
+        return None if pd.isna(v) else v.to_pydatetime()
+    except Exception:
+        return None
+
+
+def _normalizar_datas_legadas(serie):
+    """
+    Converte a coluna de data de um acumulado antigo para "%Y-%m-%d %H:%M:%S" ("" se inválida).
+
+    Cada valor distinto é convertido uma única vez: primeiro em lote, formato a formato
+    (só vale o resultado que, reformatado, reproduz o texto original), e o que sobra
+    passa por `_data_legada_unitaria`.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    unicos = pd.Series(unicos, dtype=object)
+    textos = unicos.map(lambda v: None if pd.isna(v) else str(v).strip())
+    resultado = pd.Series("", index=unicos.index, dtype=object)
+    pendentes = textos.notna()
+
+    for fmt in FORMATOS_DATA_LEGADA:
+        if not pendentes.any():
+            break
+        candidatos = textos[pendentes]
+        convertidos = pd.to_datetime(candidatos, format=fmt, errors="coerce")
+        validos = convertidos.notna()
+        validos &= convertidos.dt.strftime(fmt).eq(candidatos)
+        resultado[validos[validos].index] = convertidos[validos].dt.strftime("%Y-%m-%d %H:%M:%S")
+        pendentes[validos[validos].index] = False
+
+    for i in pendentes[pendentes].index:
+        x = _data_legada_unitaria(unicos[i])
+        resultado[i] = x.strftime("%Y-%m-%d %H:%M:%S") if isinstance(x, datetime) else ""
+
+    return pd.Series(resultado.to_numpy()[codigos], index=serie.index, dtype=object)
+
+
+def _migrar_sla_legado(df_antigo):
+    """Leva um acumulado SLA do esquema 1 (legado) para o atual."""
+    for col in df_antigo.select_dtypes(include="object").columns:
+        df_antigo[col] = _texto_sem_espacos(df_antigo[col])
+
+    # cria 'Código do Status' a partir de 'Código'
+    if "Código do Status" not in df_antigo.columns and "Código" in df_antigo.columns:
+        df_antigo["Código do Status"] = _texto_sem_espacos(df_antigo["Código"])
+
+    # cria 'Data do Evento' a partir de colunas de data existentes
+    if "Data do Evento" not in df_antigo.columns:
+        candidato_data = None
+        for c in ["Data do Evento", "Data Início Execução", "Data Inicio Execucao", "Data Início", "Data Inicio"]:
+            if c in df_antigo.columns:
+                candidato_data = c
+                break
+        if candidato_data:
+            # formata para o padrão usado no novo
+            df_antigo["Data do Evento"] = _normalizar_datas_legadas(df_antigo[candidato_data])
+
+    return _sem_linhas_vazias(df_antigo)
+
+
+def _sem_linhas_vazias(df):
+    """Remove linhas sem ID/Etapa."""
+    for base_col in ["ID da Ordem", "Etapa"]:
+        if base_col in df.columns:
+            df = df[_texto_sem_espacos(df[base_col]) != ""]
+    return df
+
+
+def _registro_migracao(versao, modo, linhas_antes, linhas_depois):
+    return {
+        "de": versao,
+        "para": VERSAO_ESQUEMA_SLA,
+        "modo": modo,
+        "em": datetime.now().isoformat(timespec="seconds"),
+        "linhas_antes": linhas_antes,
+        "linhas_depois": linhas_depois,
+    }
+
+
+def _carregar_acumulado_sla(csv_path):
+    """
+    Lê o acumulado SLA já no esquema atual.
+
+    Um acumulado de esquema anterior é migrado em memória (com aviso) e a migração
+    volta em `migracao`, para ser registrada quando o resultado for salvo.
+
+    Returns:
+        tuple: (DataFrame, migracao | None)
+
+    Raises:
+        ValueError: se o acumulado estiver num esquema mais novo que o suportado.
+    """
+    _, latest_path = _caminhos_acumulado(csv_path)
+    df_antigo = _read_acumulado_safe(csv_path, dtype=DTYPES_SLA)
+    if df_antigo.empty:
+        return df_antigo, None
+
+    versao = ler_versao_esquema(latest_path) or 1
+    if versao > VERSAO_ESQUEMA_SLA:
+        raise ValueError(
+            f"{os.path.basename(latest_path)} está no esquema v{versao}, mais novo que o suportado "
+            f"(v{VERSAO_ESQUEMA_SLA}). Atualize o report_generator antes de acumular."
+        )
+    if versao == VERSAO_ESQUEMA_SLA:
+        return df_antigo, None
+
+    logging.warning(
+        f"⚠️ {os.path.basename(latest_path)} está no esquema v{versao}; migrando para v{VERSAO_ESQUEMA_SLA} nesta execução. "
+        f"Para migrar todos de uma vez: python -m report_generator.accumulator"
+    )
+    linhas_antes = len(df_antigo)
+    df_antigo = _migrar_sla_legado(df_antigo)
+    return df_antigo, _registro_migracao(versao, "automática", linhas_antes, len(df_antigo))
+
+
+def migrar_acumulado_sla(csv_path, exportar_csv=False):
+    """
+    Migra explicitamente um acumulado SLA para o esquema atual e registra a migração.
+
+    Returns:
+        bool: True se houve migração (False se já estava no esquema atual ou não existe).
+    """
+    _, latest_path = _caminhos_acumulado(csv_path)
+    if not os.path.exists(latest_path):
+        logging.info(f"ℹ️ {os.path.basename(latest_path)} não existe; nada a migrar.")
+        return False
+
+    versao = ler_versao_esquema(latest_path) or 1
+    if versao >= VERSAO_ESQUEMA_SLA:
+        logging.info(f"ℹ️ {os.path.basename(latest_path)} já está no esquema v{versao}.")
+        return False
+
+    df_antigo = _read_acumulado_safe(latest_path, dtype=DTYPES_SLA)
+    linhas_antes = len(df_antigo)
+    df_migrado = _clean_strings(_migrar_sla_legado(df_antigo).reset_index(drop=True))
+    if _salvar_acumulado_com_versionamento(df_migrado, latest_path, exportar_csv) is None:
+        logging.error(f"❌ {os.path.basename(latest_path)} não foi migrado; continua no esquema v{versao}.")
+        return False
+    gravar_versao_esquema(
+        latest_path, VERSAO_ESQUEMA_SLA, _registro_migracao(versao, "explícita", linhas_antes, len(df_migrado))
+    )
+    logging.info(
+        f"🔁 {os.path.basename(latest_path)} migrado v{versao} → v{VERSAO_ESQUEMA_SLA} "
+        f"({linhas_antes} → {len(df_migrado)} linhas)"
+    )
+    return True
+
+
+def migrar_acumulados_sla(diretorio="."):
+    """Migra todos os `acumulado_sla_config_*_latest` (CSV e Parquet) do diretório."""
+    migrados = []
+    for path in sorted(glob.glob(os.path.join(diretorio, "acumulado_sla_config_*_latest.*"))):
+        if os.path.splitext(path)[1] in (".csv", ".parquet") and migrar_acumulado_sla(path):
+            migrados.append(path)
+    return migrados
+
+
+def acumular_report_sla(df_sla, csv_path, exportar_csv=False, reconstruir=False, watermark_path=None,
+                        substituir_ordens=False, exigir_gravacao=False):
     """
     Acumula e deduplica o SLA por chave GRANULAR (evento), priorizando:
       1) ["ID da Ordem","Etapa","Código do Status","Data do Evento"]
       2) ["ID da Ordem","Etapa","Código do Status"]
       3) ["ID da Ordem","Etapa"]
-    Faz migração automática do CSV antigo para criar colunas ausentes.
-    """
-    import datetime as _dt
-
-    def _try_parse_dt(s):
-        if pd.isna(s):
-            return None
-        s = str(s).strip()
-        # tenta formatos mais comuns
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M"):
-            try:
-                return _dt.datetime.strptime(s, fmt)
-            except Exception:
-                pass
-        # fallback tolerante
-        try:
-            v = pd.to_datetime(s, dayfirst=True, errors="coerce")
-            return None if pd.isna(v) else v.to_pydatetime()
-        except Exception:
-            return None
-
+    O acumulado antigo é lido já no esquema atual (`VERSAO_ESQUEMA_SLA`); um arquivo
+    de esquema anterior é migrado automaticamente, com aviso, e a migração fica registrada.
+    `csv_path` pode apontar para um .csv ou .parquet (backend escolhido pela extensão).
+    Com `reconstruir`, ignora o acumulado existente e o substitui por `df_sla`.
+    Com `substituir_ordens`, as ordens presentes em `df_sla` perdem todas as linhas antigas
+    (a nova versão de cada ordem substitui a anterior inteira) e as demais ordens ficam como estão.
+    Com `watermark_path`, o índice de watermarks por ordem (ver `sla_watermark`) é
+    atualizado junto com o acumulado.
+    Com `exigir_gravacao`, uma falha ao gravar o acumulado levanta a exceção (senão só vai para o log).
+    """
     df_sla = df_sla.copy()
     for col in df_sla.select_dtypes(include="object").columns:
-        df_sla[col] = df_sla[col].astype(str).str.strip()
-
-    CANDIDATAS = [
-        ["ID da Ordem", "Etapa", "Código do Status", "Data do Evento"],
-        ["ID da Ordem", "Etapa", "Código do Status"],
-        ["ID da Ordem", "Etapa"],
-    ]
-    key_cols_new = next((ks for ks in CANDIDATAS if all(k in df_sla.columns for k in ks)), None)
+        df_sla[col] = _texto_sem_espacos(df_sla[col])
+
+    key_cols_new = next((ks for ks in CANDIDATAS_CHAVE_SLA if all(k in df_sla.columns for k in ks)), None)
     if key_cols_new is None:
         raise ValueError(
             "Não foi possível determinar colunas-chave do SLA no dataframe novo. "
@@ -124,94 +367,89 @@ def acumular_report_sla(df_sla, csv_path):
 
     # garante "Código do Status" no df novo (caso ainda venha como 'Código')
     if "Código do Status" in key_cols_new and "Código do Status" not in df_sla.columns and "Código" in df_sla.columns:
-        df_sla["Código do Status"] = df_sla["Código"].astype(str).str.strip()
+        df_sla["Código do Status"] = _texto_sem_espacos(df_sla["Código"])
+
+    # o esquema atual não guarda linhas sem ID/Etapa
+    df_sla = _sem_linhas_vazias(df_sla)
 
     # cria chave no novo
-    df_sla["__chave__"] = df_sla[key_cols_new].astype(str).agg("|".join, axis=1)
+    chave_nova = _chave_hash(df_sla, key_cols_new)
 
-    # carrega acumulado antigo
-    dtypes = {k: "string" for k in set(sum(CANDIDATAS, []))}
-    df_antigo = _read_csv_safe(csv_path, dtype=dtypes)
+    # carrega acumulado antigo (já no esquema atual)
+    df_antigo, migracao = (pd.DataFrame(), None) if reconstruir else _carregar_acumulado_sla(csv_path)
+    chave_antiga = None
 
-    # ---- MIGRAÇÃO DO ANTIGO (se necessário) ----
     if not df_antigo.empty:
-        for col in df_antigo.select_dtypes(include="object").columns:
-            df_antigo[col] = df_antigo[col].astype(str).str.strip()
-
-        # cria 'Código do Status' a partir de 'Código'
-        if "Código do Status" not in df_antigo.columns and "Código" in df_antigo.columns:
-            df_antigo["Código do Status"] = df_antigo["Código"].astype(str).str.strip()
-
-        # cria 'Data do Evento' a partir de colunas de data existentes
-        if "Data do Evento" not in df_antigo.columns:
-            candidato_data = None
-            for c in ["Data do Evento", "Data Início Execução", "Data Inicio Execucao", "Data Início", "Data Inicio"]:
-                if c in df_antigo.columns:
-                    candidato_data = c
-                    break
-            if candidato_data:
-                parsed = df_antigo[candidato_data].apply(_try_parse_dt)
-                # formata para o padrão usado no novo
-                df_antigo["Data do Evento"] = parsed.apply(
-                    lambda x: x.strftime("%Y-%m-%d %H:%M:%S") if isinstance(x, _dt.datetime) else ""
-                )
-
-        # remove linhas sem ID/Etapa
-        for base_col in ["ID da Ordem", "Etapa"]:
-            if base_col in df_antigo.columns:
-                df_antigo = df_antigo[df_antigo[base_col].astype(str).str.strip() != ""]
-
-        # agora tentamos usar a MESMA key do novo; se faltar algo, caímos para uma menos granular
-        def _pick_key_for_old():
-            for ks in CANDIDATAS:
-                if all(k in df_antigo.columns for k in ks):
-                    return ks
-            return None
-
-        key_cols_old = _pick_key_for_old()
+        # usa a MESMA key do novo; se faltar algo no antigo, cai para uma menos granular
+        key_cols_old = next((ks for ks in CANDIDATAS_CHAVE_SLA if all(k in df_antigo.columns for k in ks)), None)
 
         if key_cols_old is None:
-            # não dá pra migrar; assume antigo vazio
+            # não dá pra aproveitar; assume antigo vazio
             logging.warning("⚠️ CSV SLA antigo não tinha colunas mínimas; inicia acumulado do zero.")
             df_antigo = pd.DataFrame()
         else:
             # cria chave no antigo
-            df_antigo["__chave__"] = df_antigo[key_cols_old].astype(str).agg("|".join, axis=1)
+            chave_antiga = _chave_hash(df_antigo, key_cols_old)
+
+            if substituir_ordens and not df_sla.empty:
+                da_nova = df_antigo["ID da Ordem"].isin(df_sla["ID da Ordem"].unique()).to_numpy()
+                df_antigo = df_antigo[~da_nova]
+                chave_antiga = chave_antiga[~da_nova]
 
             # Se a chave do novo é mais GRANULAR do que a do antigo,
             # removemos do antigo por uma chave compatível (interseção)
             inter = [c for c in key_cols_old if c in key_cols_new]
             if inter:
-                df_sla["__chave_inter__"] = df_sla[inter].astype(str).agg("|".join, axis=1)
-                df_antigo["__chave_inter__"] = df_antigo[inter].astype(str).agg("|".join, axis=1)
                 # drop do antigo tudo que conflita com o novo pela chave de interseção
-                df_antigo = df_antigo[~df_antigo["__chave_inter__"].isin(set(df_sla["__chave_inter__"]))]
-                df_antigo.drop(columns=[c for c in ["__chave_inter__"] if c in df_antigo.columns], inplace=True, errors="ignore")
-                df_sla.drop(columns=[c for c in ["__chave_inter__"] if c in df_sla.columns], inplace=True, errors="ignore")
+                conflita = _chave_hash(df_antigo, inter).isin(_chave_hash(df_sla, inter).unique())
+                df_antigo = df_antigo[~conflita.to_numpy()]
+                chave_antiga = chave_antiga[~conflita.to_numpy()]
 
     # ---- MERGE INCREMENTAL ----
-    if not df_antigo.empty and "__chave__" in df_antigo.columns:
+    if not df_antigo.empty and chave_antiga is not None:
         # remove do antigo as chaves que chegaram novas (pela chave do NOVO)
-        chaves_novas = set(df_sla["__chave__"].unique())
-        df_antigo_filtrado = df_antigo[~df_antigo["__chave__"].isin(chaves_novas)]
-        df_sla_final = pd.concat([df_antigo_filtrado, df_sla], ignore_index=True)
-    elif not df_antigo.empty:
-        # sem __chave__ no antigo (caso extremo): concatena e dedup por interseção das colunas
-        inter = [c for c in ["ID da Ordem","Etapa","Código do Status","Data do Evento"] if c in df_antigo.columns and c in df_sla.columns]
-        if inter:
-            df_tmp = pd.concat([df_antigo, df_sla], ignore_index=True)
-            df_sla_final = df_tmp.drop_duplicates(subset=inter, keep="last")
+        df_antigo_filtrado = df_antigo[~chave_antiga.isin(chave_nova.unique()).to_numpy()]
+        if df_sla.empty:
+            # lote vazio: só mantém o antigo (com as colunas do novo)
+            colunas = df_antigo_filtrado.columns.union(df_sla.columns, sort=False)
+            df_sla_final = df_antigo_filtrado.reindex(columns=colunas).reset_index(drop=True)
         else:
-            df_sla_final = pd.concat([df_antigo, df_sla], ignore_index=True)
+            df_sla_final = pd.concat([df_antigo_filtrado, df_sla], ignore_index=True)
     else:
         df_sla_final = df_sla.copy()
 
     # limpeza
-    for col in df_sla_final.select_dtypes(include="object").columns:
-        if col != "__chave__":
-            df_sla_final[col] = df_sla_final[col].map(clean_illegal_chars)
-    if "__chave__" in df_sla_final.columns:
-        df_sla_final.drop(columns="__chave__", inplace=True, errors="ignore")
-
-    _salvar_acumulado_com_versionamento(df_sla_final, csv_path)
+    df_sla_final = _clean_strings(df_sla_final)
+
+    latest_path = _caminhos_acumulado(csv_path)[1]
+    sha256_anterior = None if reconstruir else ler_impressao_digital(latest_path)
+    sha256 = _salvar_acumulado_com_versionamento(df_sla_final, csv_path, exportar_csv, exigir_gravacao)
+    if sha256 is None:
+        # o arquivo em disco continua o anterior: esquema e watermarks ficam como estavam
+        return df_sla_final
+    gravar_versao_esquema(latest_path, VERSAO_ESQUEMA_SLA, migracao)
+    if watermark_path:
+        _atualizar_watermarks(
+            watermark_path, df_sla, df_sla_final, sha256_anterior, sha256, migracao, recalcular=substituir_ordens
+        )
     return df_sla_final
+
+
+def _atualizar_watermarks(watermark_path, df_sla, df_sla_final, sha256_anterior, sha256, migracao, recalcular=False):
+    """
+    Mantém o índice de watermarks em dia com o acumulado recém-salvo: se ele
+    correspondia ao acumulado anterior, basta mesclar as linhas novas; senão (ou com
+    `recalcular`, quando linhas antigas foram removidas) é recalculado a partir do acumulado final.
+    """
+    indice = None if migracao or recalcular else ler_watermarks(watermark_path, sha256_anterior)
+    if indice is None:
+        indice = calcular_watermarks(df_sla_final)
+    else:
+        indice = mesclar_watermarks(indice, calcular_watermarks(df_sla))
+    gravar_watermarks(watermark_path, indice, sha256)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    migrados = migrar_acumulados_sla()
+    print(f"✅ {len(migrados)} acumulados SLA migrados para o esquema v{VERSAO_ESQUEMA_SLA}.")
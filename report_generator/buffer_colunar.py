@@ -0,0 +1,205 @@
+# buffer_colunar.py
+
+import os
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+# linhas agrupadas em cada bloco colunar
+LINHAS_POR_BLOCO = 2000
+# memória máxima dos blocos mantidos em RAM antes de irem para o disco
+LIMITE_MEMORIA_MB = 256
+
+# valores que podem fazer `pd.Series(linha)` sair numérica (sem eles a linha é sempre object)
+_ESCALARES_NUMERICOS = (bool, int, float, np.bool_, np.number, type(None))
+
+
+def _juntar_blocos(blocos):
+    """
+    Concatena blocos `object` coluna a coluna, com NaN onde o bloco não tem a coluna.
+    (`pd.concat` troca NaN por None em blocos só com nulos, o que muda a inferência final.)
+    """
+    colunas = {}
+    for bloco in blocos:
+        for col in bloco.columns:
+            colunas.setdefault(col, None)
+    juntas = {}
+    for col in colunas:
+        partes = []
+        for bloco in blocos:
+            if col in bloco.columns:
+                partes.append(bloco[col].to_numpy(dtype=object))
+            else:
+                partes.append(np.full(len(bloco), np.nan, dtype=object))
+        juntas[col] = np.concatenate(partes)
+    return pd.DataFrame(juntas, index=pd.RangeIndex(sum(len(b) for b in blocos)), copy=False)
+
+
+class BufferColunar:
+    """
+    Acumula linhas de relatório em blocos colunares (DataFrames de até
+    `linhas_por_bloco` linhas, colunas `object`). Quando os blocos em memória
+    passam de `limite_mb`, eles são gravados em disco e só voltam em `para_dataframe`.
+
+    Usado pelo processamento em fluxo das ordens: cada ordem vira uma linha
+    (ou um bloco de linhas, no SLA) e o JSON dela pode ser descartado.
+
+    `para_dataframe` devolve o que a montagem com tudo em memória daria —
+    `pd.DataFrame([pd.Series(l) for l in linhas])` para linhas avulsas ou
+    `pd.DataFrame({coluna: lista})` para blocos: os blocos guardam os valores
+    sem inferência e os tipos são decididos uma única vez no final.
+    """
+
+    def __init__(self, nome, linhas_por_bloco=LINHAS_POR_BLOCO, limite_mb=LIMITE_MEMORIA_MB, diretorio=None):
+        """
+        Args:
+            nome (str): Identificação do buffer (logs e arquivos temporários).
+            linhas_por_bloco (int): Linhas por bloco colunar.
+            limite_mb (float): Memória máxima dos blocos em RAM antes de ir para o disco.
+            diretorio (str, optional): Onde criar os arquivos temporários (padrão: tempdir do sistema).
+        """
+        self.nome = nome
+        self.linhas_por_bloco = max(1, int(linhas_por_bloco))
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self.diretorio = diretorio
+        self._pendentes = []    # linhas (dicts) do bloco em formação
+        self._blocos = []       # DataFrame em memória ou caminho do bloco em disco
+        self._bytes_memoria = 0
+        self._pasta_temp = None
+        self._total = 0
+        self._modo = None       # "linhas" (adicionar) ou "blocos" (adicionar_df)
+        # linhas cuja Series sai numérica: (posição, dtype da linha, nº de colunas da linha)
+        self._linhas_numericas = []
+        self.blocos_em_disco = 0
+
+    def __len__(self):
+        return self._total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _definir_modo(self, modo):
+        if self._modo not in (None, modo):
+            raise ValueError(f"Buffer '{self.nome}' não mistura linhas avulsas e blocos")
+        self._modo = modo
+
+    def adicionar(self, linha):
+        """Adiciona uma linha (dict coluna -> valor)."""
+        self._definir_modo("linhas")
+        if linha and all(isinstance(v, _ESCALARES_NUMERICOS) for v in linha.values()):
+            serie = pd.Series(linha)
+            if serie.dtype != object:
+                # a linha sai numérica em `pd.Series(linha)`: guarda os valores já promovidos
+                self._linhas_numericas.append((self._total, serie.dtype, len(serie)))
+                linha = dict(zip(serie.index, serie.to_numpy()))
+        self._pendentes.append(linha)
+        self._total += 1
+        if len(self._pendentes) >= self.linhas_por_bloco:
+            self._fechar_bloco()
+
+    def adicionar_df(self, df):
+        """Adiciona um bloco já colunar (ex.: linhas de SLA de um lote de ordens)."""
+        self._definir_modo("blocos")
+        if df is None or df.empty:
+            return
+        self._total += len(df)
+        self._guardar(df.reset_index(drop=True).astype(object))
+
+    def _fechar_bloco(self):
+        if not self._pendentes:
+            return
+        colunas = {}
+        for linha in self._pendentes:
+            for chave in linha:
+                colunas.setdefault(chave, None)
+        bloco = pd.DataFrame({
+            chave: pd.Series([linha.get(chave, np.nan) for linha in self._pendentes], dtype=object)
+            for chave in colunas
+        }, index=pd.RangeIndex(len(self._pendentes)))
+        self._pendentes = []
+        self._guardar(bloco)
+
+    def _guardar(self, bloco):
+        self._blocos.append(bloco)
+        self._bytes_memoria += int(bloco.memory_usage(deep=True).sum())
+        if self._bytes_memoria > self.limite_bytes:
+            self._derramar()
+
+    def _derramar(self):
+        """Grava em disco os blocos que ainda estão em memória."""
+        if self._pasta_temp is None:
+            self._pasta_temp = tempfile.mkdtemp(prefix=f"buffer_{self.nome}_", dir=self.diretorio)
+        for i, bloco in enumerate(self._blocos):
+            if isinstance(bloco, pd.DataFrame):
+                caminho = os.path.join(self._pasta_temp, f"bloco_{i:06d}.pkl")
+                bloco.to_pickle(caminho)
+                self._blocos[i] = caminho
+                self.blocos_em_disco += 1
+        logging.debug(f"💾 Buffer {self.nome}: {self.blocos_em_disco} blocos em disco ({self._total} linhas)")
+        self._bytes_memoria = 0
+
+    def para_dataframe(self):
+        """Junta os blocos em um único DataFrame, com os tipos que a montagem em memória daria."""
+        self._fechar_bloco()
+        if not self._blocos:
+            return pd.DataFrame()
+        blocos = [pd.read_pickle(b) if isinstance(b, str) else b for b in self._blocos]
+        df = blocos[0] if len(blocos) == 1 else _juntar_blocos(blocos)
+        del blocos
+        if self._modo == "blocos":
+            return self._tipos_de_blocos(df)
+        return self._tipos_de_linhas(df)
+
+    def _tipos_de_blocos(self, df):
+        """Tipos de `pd.DataFrame({coluna: lista})` com todas as linhas dos blocos (inferência por coluna)."""
+        colunas = {col: df[col].tolist() for col in df.columns}
+        del df
+        return pd.DataFrame(colunas)
+
+    def _tipos_de_linhas(self, df):
+        """
+        Tipos de `pd.DataFrame([pd.Series(l) for l in linhas])`: as linhas são alinhadas
+        (linha numérica sem alguma coluna vira float/object), empilhadas e, se o resultado
+        for object, cada coluna passa pela mesma conversão do construtor do pandas.
+        """
+        n_colunas = len(df.columns)
+        if not n_colunas:
+            return pd.DataFrame(index=pd.RangeIndex(len(df)))
+        tipos_linhas = []
+        for pos, tipo, n in self._linhas_numericas:
+            if n < n_colunas:
+                # alinhamento: NaN nas colunas ausentes promove a linha
+                if tipo.kind in "iu":
+                    presentes = df.iloc[pos].notna().to_numpy()
+                    df.iloc[pos, np.flatnonzero(presentes)] = [
+                        float(v) for v in df.iloc[pos].to_numpy()[presentes]
+                    ]
+                    tipo = np.dtype("float64")
+                elif tipo.kind == "b":
+                    tipo = np.dtype(object)
+            tipos_linhas.append(tipo)
+
+        if len(self._linhas_numericas) == self._total:
+            tipo = np.result_type(*tipos_linhas)
+            if tipo != object:
+                # empilhamento numérico: sem conversão por coluna
+                return pd.DataFrame(df.to_numpy().astype(tipo), columns=df.columns)
+
+        # linhas como tuplas: mesmo caminho de conversão (por coluna) do construtor
+        colunas = df.columns
+        tuplas = list(df.itertuples(index=False, name=None))
+        del df
+        return pd.DataFrame(tuplas, columns=colunas)
+
+    def close(self):
+        """Remove os blocos gravados em disco."""
+        self._blocos = []
+        self._pendentes = []
+        if self._pasta_temp is not None:
+            shutil.rmtree(self._pasta_temp, ignore_errors=True)
+            self._pasta_temp = None
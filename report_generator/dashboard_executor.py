@@ -4,6 +4,70 @@ import os
 import logging
 import importlib.util
 
+def _carregar_modulo_dashboard(config_id):
+    """Importa `dash_config_{config_id}.py` do diretório atual (None se não existir)."""
+    dashboard_module_name = f"dash_config_{config_id}"
+    dashboard_filename = f"{dashboard_module_name}.py"
+    if not os.path.exists(dashboard_filename):
+        return None
+    spec = importlib.util.spec_from_file_location(dashboard_module_name, dashboard_filename)
+    dashboard_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dashboard_module)
+    return dashboard_module
+
+def possui_abas_dashboard(config_id):
+    """True se `dash_config_{config_id}.py` existe e expõe `adicionar_abas_dashboard`."""
+    try:
+        dashboard_module = _carregar_modulo_dashboard(config_id)
+    except Exception:
+        return False  # o erro de carga é registrado por adicionar_dashboard_ao_workbook
+    return hasattr(dashboard_module, "adicionar_abas_dashboard")
+
+def adicionar_dashboard_ao_workbook(config_id, workbook, df_final):
+    """
+    Deixa o dashboard personalizado adicionar abas ao workbook do relatório.
+
+    O módulo `dash_config_{config_id}.py` deve expor
+    `adicionar_abas_dashboard(workbook, df_final)`. O workbook é sempre um
+    `xlsxwriter.Workbook` (sem xlsxwriter o relatório com dashboard não é gerado)
+    aberto com `constant_memory`: em cada aba, as linhas precisam ser gravadas em
+    ordem crescente (linha a linha, de cima para baixo). Células gravadas numa
+    linha anterior à última já escrita são descartadas pelo xlsxwriter sem erro.
+    Formatos, gráficos e imagens não têm essa restrição.
+
+    Returns:
+        bool: True se o dashboard adicionou suas abas.
+    """
+    try:
+        dashboard_module = _carregar_modulo_dashboard(config_id)
+    except Exception as e:
+        logging.error(f"❌ Erro ao carregar dashboard personalizado: {e}")
+        return False
+
+    if dashboard_module is None:
+        logging.info(f"ℹ️ Nenhum dashboard customizado encontrado para config {config_id}.")
+        return False
+
+    if hasattr(dashboard_module, "adicionar_abas_dashboard"):
+        try:
+            logging.info(f"📊 Adicionando abas do dashboard específico da config {config_id}")
+            dashboard_module.adicionar_abas_dashboard(workbook, df_final)
+            logging.info("✅ Dashboard personalizado executado com sucesso.")
+            return True
+        except Exception as e:
+            logging.error(f"❌ Erro ao executar dashboard personalizado: {e}")
+            return False
+
+    if hasattr(dashboard_module, "gerar_dashboard_excel"):
+        # gerar_dashboard_excel grava um arquivo próprio, que era sobrescrito pelo relatório
+        logging.warning(
+            f"⚠️ dash_config_{config_id}.py só tem 'gerar_dashboard_excel' (arquivo próprio); "
+            f"implemente 'adicionar_abas_dashboard(workbook, df_final)' para incluir o dashboard no relatório."
+        )
+    else:
+        logging.warning(f"⚠️ Função 'adicionar_abas_dashboard' não encontrada em dash_config_{config_id}.py")
+    return False
+
 def executar_dashboard_personalizado(config_id, df_final, file_path):
     """
     Tenta executar o dashboard personalizado para a configuração.
@@ -19,9 +83,7 @@ def executar_dashboard_personalizado(config_id, df_final, file_path):
     if os.path.exists(dashboard_filename):
         try:
             logging.info(f"📊 Executando dashboard específico: {dashboard_filename}")
-            spec = importlib.util.spec_from_file_location(dashboard_module_name, dashboard_filename)
-            dashboard_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(dashboard_module)
+            dashboard_module = _carregar_modulo_dashboard(config_id)
 
             if hasattr(dashboard_module, "gerar_dashboard_excel"):
                 dashboard_module.gerar_dashboard_excel(df_final, file_path)
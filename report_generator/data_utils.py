@@ -6,29 +6,17 @@ import select
 import logging
 from datetime import datetime
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from .http_client import get_client
 
-def get_with_retry(url, headers=None, timeout=30, max_retries=3, params=None):
-    session = requests.Session()
-    retry = Retry(
-        total=max_retries,
-        backoff_factor=5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "OPTIONS"]
+def get_with_retry(url, headers=None, timeout=30, max_retries=3, params=None, retornar_falha=False):
+    """
+    GET com retry usando o cliente HTTP compartilhado (conexões keep-alive).
+    `max_retries` é mantido por compatibilidade; as tentativas são as do cliente.
+    Com `retornar_falha`, devolve também a resposta de erro final (ver `ZapformClient.get_with_retry`).
+    """
+    return get_client().get_with_retry(
+        url, headers=headers, timeout=timeout, params=params, retornar_falha=retornar_falha
     )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-
-    try:
-        response = session.get(url, headers=headers, timeout=timeout, params=params)
-        response.raise_for_status()
-        return response
-    except requests.exceptions.RequestException as e:
-        print(f"🚨 Erro mesmo após {max_retries} tentativas: {e}")
-        return None
 
 
 def format_date(date_string):
@@ -0,0 +1,195 @@
+# email_outbox.py
+
+import time
+import queue
+import smtplib
+import logging
+import threading
+
+from .email_sender import SMTP_HOST, SMTP_PORTA
+from .metrics import get_registro
+
+# mensagens aguardando envio (cada uma pode levar um anexo de alguns MB)
+MAX_FILA = 20
+TENTATIVAS_ENVIO = 3
+# conexão parada por mais tempo que isso é encerrada (o servidor derruba conexões ociosas)
+OCIOSO_S = 120
+TIMEOUT_SMTP_S = 60
+
+_FIM = object()
+
+
+class CaixaSaida:
+    """
+    Caixa de saída de e-mails: `enviar` só coloca a mensagem na fila e uma thread
+    a entrega por uma única conexão SMTP autenticada, reaberta quando cai ou fica ociosa.
+    `esvaziar` espera a fila acabar e devolve o status de entrega de cada mensagem.
+
+    Com `servidor="host:porta"` usa SMTP sem TLS e, sem senha, sem login — para testes
+    com um servidor local (ex.: `python -m aiosmtpd -n -l localhost:8025`).
+    """
+
+    def __init__(self, from_email, app_password, servidor=None, tentativas=TENTATIVAS_ENVIO,
+                 max_fila=MAX_FILA, ocioso_s=OCIOSO_S, timeout=TIMEOUT_SMTP_S):
+        if servidor:
+            host, _, porta = servidor.rpartition(":")
+            self.host, self.porta, self.usar_ssl = host or "localhost", int(porta), False
+        else:
+            self.host, self.porta, self.usar_ssl = SMTP_HOST, SMTP_PORTA, True
+        self.from_email = from_email
+        self.app_password = app_password
+        self.tentativas = tentativas
+        self.ocioso_s = ocioso_s
+        self.timeout = timeout
+        self._fila = queue.Queue(maxsize=max_fila)
+        self._lock = threading.Lock()
+        self._entregas = []  # status das mensagens desde o último `esvaziar`
+        self._sequencia = 0
+        self._smtp = None
+        self._thread = None
+
+    def enviar(self, msg, referencia=None):
+        """
+        Coloca a mensagem na fila (bloqueia só se a fila estiver cheia).
+
+        Args:
+            msg (EmailMessage): Mensagem pronta (ver `email_sender.montar_email`).
+            referencia (str, optional): Ex.: o ID da config, para o resumo da execução.
+
+        Returns:
+            dict: status da entrega, atualizado pela thread de envio
+                (`status`: "na_fila", "enviado" ou "falha").
+        """
+        with self._lock:
+            self._sequencia += 1
+            entrega = {
+                "id": self._sequencia,
+                "referencia": referencia,
+                "assunto": msg["Subject"],
+                "destinatarios": msg["To"],
+                "status": "na_fila",
+                "tentativas": 0,
+                "erro": None,
+                "duracao_s": None,
+            }
+            self._entregas.append(entrega)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name="caixa-saida", daemon=True)
+                self._thread.start()
+        self._fila.put((msg, entrega))
+        logging.info(f"📨 E-mail '{entrega['assunto']}' na fila para: {entrega['destinatarios']}")
+        return entrega
+
+    def esvaziar(self):
+        """
+        Espera a entrega de tudo que está na fila.
+
+        Returns:
+            list[dict]: status das mensagens enfileiradas desde a última chamada.
+        """
+        self._fila.join()
+        with self._lock:
+            entregas, self._entregas = self._entregas, []
+        if entregas:
+            enviados = sum(1 for e in entregas if e["status"] == "enviado")
+            logging.info(f"📬 Caixa de saída: {enviados}/{len(entregas)} e-mails entregues")
+            for e in entregas:
+                if e["status"] != "enviado":
+                    logging.error(
+                        f"❌ E-mail '{e['assunto']}' para {e['destinatarios']} não entregue "
+                        f"após {e['tentativas']} tentativa(s): {e['erro']}"
+                    )
+        return entregas
+
+    def fechar(self):
+        """`esvaziar`, encerra a thread e a conexão SMTP."""
+        entregas = self.esvaziar()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(_FIM)
+            thread.join()
+        return entregas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # ============================
+    # Thread de envio
+    # ============================
+    def _laco(self):
+        while True:
+            try:
+                item = self._fila.get(timeout=self.ocioso_s)
+            except queue.Empty:
+                self._desconectar()
+                continue
+            try:
+                if item is _FIM:
+                    self._desconectar()
+                    return
+                self._entregar(*item)
+            except Exception as e:
+                logging.exception(f"❌ Erro inesperado na caixa de saída: {e}")
+            finally:
+                self._fila.task_done()
+
+    def _conectar(self):
+        if self._smtp is None:
+            classe = smtplib.SMTP_SSL if self.usar_ssl else smtplib.SMTP
+            smtp = classe(self.host, self.porta, timeout=self.timeout)
+            try:
+                if self.app_password:
+                    smtp.login(self.from_email, self.app_password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            get_registro().contar("email_conexoes_total")
+            logging.info(f"🔌 Conexão SMTP aberta com {self.host}:{self.porta}")
+        return self._smtp
+
+    def _desconectar(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _entregar(self, msg, entrega):
+        inicio = time.time()
+        for tentativa in range(1, self.tentativas + 1):
+            entrega["tentativas"] = tentativa
+            try:
+                self._conectar().send_message(msg)
+                entrega["status"], entrega["erro"] = "enviado", None
+                logging.info(f"📧 E-mail '{entrega['assunto']}' enviado para: {entrega['destinatarios']}")
+                break
+            except smtplib.SMTPRecipientsRefused as e:
+                # destinatários recusados: tentar de novo não resolve
+                entrega["status"], entrega["erro"] = "falha", str(e)
+                break
+            except smtplib.SMTPResponseException as e:
+                entrega["erro"] = f"{e.smtp_code} {e.smtp_error!r}"
+                if e.smtp_code >= 500:
+                    # erro permanente (ex.: login recusado, mensagem rejeitada)
+                    entrega["status"] = "falha"
+                    break
+            except (smtplib.SMTPException, OSError) as e:
+                entrega["erro"] = str(e) or type(e).__name__
+            # erro temporário ou conexão caída: reabre a conexão e tenta de novo
+            self._desconectar()
+            if tentativa < self.tentativas:
+                get_registro().contar("email_retentativas_total")
+                time.sleep(min(2 ** (tentativa - 1), 10))
+        else:
+            entrega["status"] = "falha"
+
+        entrega["duracao_s"] = round(time.time() - inicio, 2)
+        get_registro().contar("email_envios_total", status=entrega["status"])
+        get_registro().observar("email_entrega_duracao_segundos", entrega["duracao_s"])
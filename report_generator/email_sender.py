@@ -5,6 +5,41 @@ import logging
 from email.message import EmailMessage
 from typing import Union, List
 
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORTA = 465
+
+
+def montar_email(
+    from_email: str,
+    to_email: Union[str, List[str]],
+    subject: str,
+    body: str,
+    attachment_path: str = None
+) -> EmailMessage:
+    """
+    Monta a mensagem, com anexo opcional (o arquivo é lido aqui).
+
+    Raises:
+        OSError: se o anexo não puder ser lido.
+    """
+    if isinstance(to_email, str):
+        to_email = [to_email]
+
+    msg = EmailMessage()
+    msg["From"] = from_email
+    msg["To"] = ", ".join(to_email)
+    msg["Subject"] = subject
+    msg.set_content(body)
+
+    if attachment_path:
+        with open(attachment_path, "rb") as file:
+            file_data = file.read()
+        file_name = os.path.basename(attachment_path)
+        mime_type, _ = mimetypes.guess_type(file_name)
+        main_type, sub_type = mime_type.split("/", 1) if mime_type else ("application", "octet-stream")
+        msg.add_attachment(file_data, maintype=main_type, subtype=sub_type, filename=file_name)
+    return msg
+
 
 def send_email_with_attachment(
     from_email: str,
@@ -12,7 +47,9 @@ def send_email_with_attachment(
     subject: str,
     body: str,
     app_password: str,
-    attachment_path: str
+    attachment_path: str,
+    caixa=None,
+    referencia: str = None
 ):
     """
     Envia um e-mail com um anexo (arquivo Excel ou outro).
@@ -24,34 +61,30 @@ def send_email_with_attachment(
         body (str): Corpo do e-mail.
         app_password (str): Senha de app do Gmail.
         attachment_path (str): Caminho do arquivo a anexar.
-    """
-    if isinstance(to_email, str):
-        to_email = [to_email]
-
-    msg = EmailMessage()
-    msg["From"] = from_email
-    msg["To"] = ", ".join(to_email)
-    msg["Subject"] = subject
-    msg.set_content(body)
+        caixa (CaixaSaida, optional): Enfileira na caixa de saída em vez de enviar na hora.
+        referencia (str, optional): Identificação da mensagem no status da caixa (ex.: ID da config).
 
+    Returns:
+        dict | bool: status da entrega, quando enviado pela caixa de saída; senão, se o e-mail saiu.
+    """
     try:
-        with open(attachment_path, "rb") as file:
-            file_data = file.read()
-            file_name = os.path.basename(attachment_path)
-            mime_type, _ = mimetypes.guess_type(file_name)
-            main_type, sub_type = mime_type.split("/", 1) if mime_type else ("application", "octet-stream")
-            msg.add_attachment(file_data, maintype=main_type, subtype=sub_type, filename=file_name)
+        msg = montar_email(from_email, to_email, subject, body, attachment_path)
     except Exception as e:
         logging.error(f"❌ Erro ao anexar o arquivo '{attachment_path}': {e}")
-        return
+        return False
+
+    if caixa is not None:
+        return caixa.enviar(msg, referencia=referencia)
 
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORTA) as smtp:
             smtp.login(from_email, app_password)
             smtp.send_message(msg)
-            logging.info(f"📧 E-mail com anexo enviado com sucesso para: {to_email}")
+            logging.info(f"📧 E-mail com anexo enviado com sucesso para: {msg['To']}")
+        return True
     except Exception as e:
         logging.error(f"❌ Erro ao enviar e-mail com anexo: {e}")
+        return False
 
 
 def send_simple_email(
@@ -59,7 +92,9 @@ def send_simple_email(
     to_emails: Union[str, List[str]],
     subject: str,
     body: str,
-    app_password: str
+    app_password: str,
+    caixa=None,
+    referencia: str = None
 ):
     """
     Envia um e-mail simples, sem anexos.
@@ -70,20 +105,23 @@ def send_simple_email(
         subject (str): Assunto do e-mail.
         body (str): Corpo do e-mail.
         app_password (str): Senha de app do Gmail.
+        caixa (CaixaSaida, optional): Enfileira na caixa de saída em vez de enviar na hora.
+        referencia (str, optional): Identificação da mensagem no status da caixa.
+
+    Returns:
+        dict | bool: status da entrega, quando enviado pela caixa de saída; senão, se o e-mail saiu.
     """
-    if isinstance(to_emails, str):
-        to_emails = [to_emails]
+    msg = montar_email(from_email, to_emails, subject, body)
 
-    msg = EmailMessage()
-    msg["From"] = from_email
-    msg["To"] = ", ".join(to_emails)
-    msg["Subject"] = subject
-    msg.set_content(body)
+    if caixa is not None:
+        return caixa.enviar(msg, referencia=referencia)
 
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORTA) as smtp:
             smtp.login(from_email, app_password)
             smtp.send_message(msg)
-            logging.info(f"📧 E-mail simples enviado com sucesso para: {to_emails}")
+            logging.info(f"📧 E-mail simples enviado com sucesso para: {msg['To']}")
+        return True
     except Exception as e:
         logging.error(f"❌ Erro ao enviar e-mail simples: {e}")
+        return False
@@ -0,0 +1,118 @@
+# excel_writer.py
+
+import math
+import logging
+from datetime import datetime, date
+import pandas as pd
+
+from .dashboard_executor import adicionar_dashboard_ao_workbook, possui_abas_dashboard
+
+try:
+    import xlsxwriter
+except ImportError:  # sem xlsxwriter, cai para o ExcelWriter do openpyxl
+    xlsxwriter = None
+
+# linhas convertidas por vez (limita a memória da conversão para tipos nativos)
+LINHAS_POR_BLOCO = 5000
+
+
+def _valor_celula(valor):
+    """Converte um valor do DataFrame para o que o xlsxwriter grava (None = célula vazia)."""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if valor is pd.NaT or valor is pd.NA:
+        return None
+    if isinstance(valor, pd.Timestamp):
+        valor = valor.to_pydatetime()
+    if isinstance(valor, datetime) and valor.tzinfo is not None:
+        valor = valor.replace(tzinfo=None)
+    return valor
+
+
+def _escrever_aba(workbook, nome, df, fmt_cabecalho, fmt_data_hora, fmt_data):
+    """Grava `df` em uma nova aba, linha a linha (compatível com `constant_memory`)."""
+    ws = workbook.add_worksheet(nome)
+    colunas = list(df.columns)
+    for c, coluna in enumerate(colunas):
+        ws.write_string(0, c, str(coluna), fmt_cabecalho)
+
+    linha = 1
+    for inicio in range(0, len(df), LINHAS_POR_BLOCO):
+        bloco = df.iloc[inicio:inicio + LINHAS_POR_BLOCO]
+        valores = [bloco[coluna].tolist() for coluna in bloco.columns]
+        for registro in zip(*valores):
+            for c, valor in enumerate(registro):
+                valor = _valor_celula(valor)
+                if valor is None:
+                    continue
+                if isinstance(valor, str):
+                    ws.write_string(linha, c, valor)
+                elif isinstance(valor, bool):
+                    ws.write_boolean(linha, c, valor)
+                elif isinstance(valor, (int, float)):
+                    if math.isinf(valor):
+                        ws.write_string(linha, c, str(valor))
+                    else:
+                        ws.write_number(linha, c, valor)
+                elif isinstance(valor, datetime):
+                    ws.write_datetime(linha, c, valor, fmt_data_hora)
+                elif isinstance(valor, date):
+                    ws.write_datetime(linha, c, valor, fmt_data)
+                else:
+                    ws.write_string(linha, c, str(valor))
+            linha += 1
+    return ws
+
+
+def gerar_excel_relatorio(config_id, abas, file_path, df_dashboard=None):
+    """
+    Gera o Excel do relatório em uma única passada.
+
+    As abas de dados são gravadas em modo streaming (xlsxwriter `constant_memory`)
+    e o dashboard personalizado da config (`dash_config_{id}.py`) adiciona as suas
+    abas ao mesmo workbook via `adicionar_abas_dashboard(workbook, df_final)`, com a
+    mesma restrição de ordem de linhas (ver `adicionar_dashboard_ao_workbook`).
+
+    Args:
+        config_id (str): ID da configuração (para localizar o dashboard).
+        abas (list): [(nome_aba, DataFrame), ...] na ordem em que devem aparecer.
+        file_path (str): Caminho do .xlsx.
+        df_dashboard (pd.DataFrame, optional): Dados entregues ao dashboard (padrão: a primeira aba).
+
+    Raises:
+        ImportError: a config tem dashboard personalizado e o xlsxwriter não está instalado.
+    """
+    if df_dashboard is None and abas:
+        df_dashboard = abas[0][1]
+
+    if xlsxwriter is None:
+        if possui_abas_dashboard(config_id):
+            # o dashboard é escrito contra a API do xlsxwriter; o workbook do openpyxl é incompatível
+            raise ImportError(
+                f"dash_config_{config_id}.py exige o xlsxwriter; instale 'xlsxwriter' para gerar o relatório."
+            )
+        logging.warning("⚠️ 'xlsxwriter' não instalado; gerando Excel com openpyxl (sem streaming).")
+        with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
+            for nome, df in abas:
+                df.to_excel(writer, sheet_name=nome, index=False)
+        return file_path
+
+    workbook = xlsxwriter.Workbook(file_path, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "strings_to_numbers": False,
+    })
+    try:
+        fmt_cabecalho = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        fmt_data_hora = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        fmt_data = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        for nome, df in abas:
+            _escrever_aba(workbook, nome, df, fmt_cabecalho, fmt_data_hora, fmt_data)
+        adicionar_dashboard_ao_workbook(config_id, workbook, df_dashboard)
+    finally:
+        workbook.close()
+    logging.info(f"✅ Excel gerado em: {file_path}")
+    return file_path
@@ -1,92 +1,235 @@
 # extractor.py
 
+import re
 import json
 import logging
+from datetime import datetime
 from .data_utils import format_date, parse_option_list
 
-def extract_data(order_json, campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes):
-    def get_label_title(label_id):
-        return etiquetas_dict.get(label_id, "-")
-
-    def handle_media(valor):
-        if isinstance(valor, dict):
-            tipo = valor.get("_type")
-            if tipo == "image":
-                return valor.get("url", "-")
-            elif tipo == "location":
-                lat = valor.get("lat")
-                lng = valor.get("lng")
-                if lat and lng:
-                    return f"https://www.google.com/maps/search/?api=1&query={lat},{lng}"
-                return "-"
-            elif tipo in ["file", "document", "video"]:
-                return valor.get("url", "-")
-            else:
-                return json.dumps(valor)
-        return valor
-
-    try:
-        # 🏷️ Etiquetas
-        etiqueta_raw = order_json["order"].get("Etiquetas", "")
-        if isinstance(etiqueta_raw, str) and "," in etiqueta_raw:
-            etiqueta_ids = [eid.strip() for eid in etiqueta_raw.split(",") if eid.strip()]
-            etiqueta_title = ", ".join([get_label_title(eid) for eid in etiqueta_ids])
+PRIORIDADES = {0: "Sem prioridade", 1: "Baixa", 2: "Média", 3: "Alta"}
+
+# acessores dos campos padrão com tratamento especial (demais tags: order_json.get(tag, "-"))
+ACESSORES_PADRAO = {
+    "unidade": lambda o: o["location"].get("name", "-"),
+    "cliente": lambda o: o["client"].get("name", "-"),
+    "cliente_numero": lambda o: o["client"].get("number", "-"),
+    "status": lambda o: o["status"].get("status", "-"),
+    "status_code": lambda o: o["status"].get("code", "-"),
+}
+# chave de primeiro nível da ordem lida por cada campo padrão (demais tags: a própria tag)
+CHAVES_PADRAO = {
+    "unidade": "location",
+    "cliente": "client",
+    "cliente_numero": "client",
+    "status": "status",
+    "status_code": "status",
+}
+
+
+def handle_media(valor):
+    if isinstance(valor, dict):
+        tipo = valor.get("_type")
+        if tipo == "image":
+            return valor.get("url", "-")
+        elif tipo == "location":
+            lat = valor.get("lat")
+            lng = valor.get("lng")
+            if lat and lng:
+                return f"https://www.google.com/maps/search/?api=1&query={lat},{lng}"
+            return "-"
+        elif tipo in ["file", "document", "video"]:
+            return valor.get("url", "-")
         else:
-            etiqueta_title = get_label_title(etiqueta_raw)
+            return json.dumps(valor)
+    return valor
 
-        # 🔺 Prioridade
-        priority_map = {0: "Sem prioridade", 1: "Baixa", 2: "Média", 3: "Alta"}
-        priority_value = order_json.get("priority_ordering", 0)
-        priority_text = priority_map.get(priority_value, "Sem prioridade")
 
-        # 🧩 Campos padrão
-        data = {}
-        for tag, header in campos_padroes:
+# datas ISO que o format_date aceita ("%Y-%m-%dT%H:%M:%S", com "Z" ou ".%fZ" opcionais)
+_DATA_ISO = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})(?:\.[0-9]{1,6}Z|Z)?")
+
+
+def _formatar_data(valor):
+    """`format_date` sem as tentativas de strptime no caso comum (data ISO válida)."""
+    if isinstance(valor, str):
+        m = _DATA_ISO.fullmatch(valor)
+        if m and m.group(1) >= "1000":
             try:
-                if tag == "unidade":
-                    valor = order_json["location"].get("name", "-")
-                elif tag == "cliente":
-                    valor = order_json["client"].get("name", "-")
-                elif tag == "cliente_numero":
-                    valor = order_json["client"].get("number", "-")
-                elif tag == "status":
-                    valor = order_json["status"].get("status", "-")
-                elif tag == "status_code":
-                    valor = order_json["status"].get("code", "-")
-                else:
-                    valor = order_json.get(tag, "-")
-
-                if "time_" in tag:
-                    valor = format_date(valor)
+                datetime(*map(int, m.groups()))
+                return f"{m.group(3)}/{m.group(2)}/{m.group(1)}"
+            except ValueError:
+                pass
+    return format_date(valor)
 
-                data[header] = valor
-            except Exception as e:
-                data[header] = f"⚠️ Erro: {e}"
 
-        if "etiquetas" in [t for t, _ in campos_padroes]:
-            data["Etiquetas"] = etiqueta_title
-        if "priority" in [t for t, _ in campos_padroes]:
-            data["Prioridade"] = priority_text
+def _acessor_padrao(tag):
+    acessor = ACESSORES_PADRAO.get(tag)
+    if acessor is None:
+        acessor = lambda o: o.get(tag, "-")
+    if "time_" in tag:
+        return lambda o: _formatar_data(acessor(o))
+    return acessor
+
+
+def _nomes_usados(codigo):
+    """Nomes referenciados por um código compilado, incluindo lambdas/compreensões internas."""
+    nomes = set(codigo.co_names)
+    for const in codigo.co_consts:
+        if hasattr(const, "co_names"):
+            nomes |= _nomes_usados(const)
+    return nomes
+
+
+def _falha(erro):
+    """Acessor que repete, a cada ordem, um erro detectado na compilação."""
+    def acessor(*_):
+        raise erro
+    return acessor
+
+
+class PlanoExtracao:
+    """
+    Plano de extração de uma config, compilado uma única vez a partir da planilha
+    (`campos_padroes`, `campos_variaveis`, `header_report_dict`) e aplicado a cada
+    ordem com `extrair`. Expressões dos campos "customizado" são pré-compiladas.
+    """
+
+    def __init__(self, campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes):
+        self.campos_variaveis = campos_variaveis
+        self.etiquetas_dict = etiquetas_dict
+        self.header_report_dict = header_report_dict
+        self.campos_padroes = campos_padroes
 
-        # Campos variáveis
+        self._padrao = [(header, _acessor_padrao(tag)) for tag, header in campos_padroes]
+        tags = {t for t, _ in campos_padroes}
+        self._com_etiquetas = "etiquetas" in tags
+        self._com_prioridade = "priority" in tags
+        self._ultimo_padrao = campos_padroes[-1] if campos_padroes else None
+
+        # (expressao, tipo, header, código do "customizado" | None, erro de compilação | None)
+        self._variaveis = []
         for expressao, tipo in campos_variaveis:
-            tipo = tipo.lower().strip()
             try:
-                valor = order_json["order"].get(expressao, "-")
-                valor = handle_media(valor)
-                if tipo == "lista de opções":
-                    valor = parse_option_list(valor)
-                elif tipo == "customizado":
-                    valor = eval(expressao)
+                tipo = tipo.lower().strip()
+                header = header_report_dict.get(expressao, expressao)
             except Exception as e:
-                valor = f"⚠️ Erro: {e}"
+                # mesmo efeito de antes: a ordem inteira cai no tratamento de erro
+                self._variaveis.append((expressao, tipo, None, _falha(e), None))
+                break
+            codigo, erro = None, None
+            if tipo == "customizado":
+                try:
+                    codigo = compile(expressao, "<string>", "eval")
+                except Exception as e:
+                    erro = e
+            self._variaveis.append((expressao, tipo, header, codigo, erro))
+
+    def chaves_ordem(self):
+        """
+        Chaves de primeiro nível da ordem lidas pelo plano (para saber se o objeto da
+        listagem basta). None se algum campo "customizado" usa `order_json` diretamente.
+        """
+        chaves = {"order", "priority_ordering"}
+        for tag, _ in self.campos_padroes:
+            chaves.add(CHAVES_PADRAO.get(tag, tag))
+        for expressao, tipo, header, codigo, erro in self._variaveis:
+            if header is not None and codigo is not None and "order_json" in _nomes_usados(codigo):
+                return None
+        return chaves
+
+    def _etiqueta(self, etiqueta_raw):
+        if isinstance(etiqueta_raw, str) and "," in etiqueta_raw:
+            etiqueta_ids = [eid.strip() for eid in etiqueta_raw.split(",") if eid.strip()]
+            return etiqueta_ids, ", ".join([self.etiquetas_dict.get(eid, "-") for eid in etiqueta_ids])
+        return None, self.etiquetas_dict.get(etiqueta_raw, "-")
+
+    def extrair(self, order_json):
+        """Extrai a linha do report principal de uma ordem."""
+        # 🏷️ Etiquetas e 🔺 Prioridade (erros aqui derrubam a ordem inteira)
+        etiqueta_raw = order_json["order"].get("Etiquetas", "")
+        etiqueta_ids, etiqueta_title = self._etiqueta(etiqueta_raw)
+        priority_value = order_json.get("priority_ordering", 0)
+        priority_text = PRIORIDADES.get(priority_value, "Sem prioridade")
+
+        data = {}
+        try:
+            # 🧩 Campos padrão
+            for header, acessor in self._padrao:
+                try:
+                    data[header] = acessor(order_json)
+                except Exception as e:
+                    data[header] = f"⚠️ Erro: {e}"
 
-            header = header_report_dict.get(expressao, expressao)
-            data[header] = valor
+            if self._com_etiquetas:
+                data["Etiquetas"] = etiqueta_title
+            if self._com_prioridade:
+                data["Prioridade"] = priority_text
 
-        logging.info(f"✅ Dados extraídos da ordem {order_json.get('id', '-')}")
-        return data
+            # Campos variáveis
+            pedidos = order_json["order"]
+            ultimo_header = self._ultimo_padrao[1] if self._ultimo_padrao else None
+            for expressao, tipo, header, codigo, erro in self._variaveis:
+                if header is None:
+                    codigo()
+                try:
+                    valor = pedidos.get(expressao, "-")
+                    valor = handle_media(valor)
+                    if tipo == "lista de opções":
+                        valor = parse_option_list(valor)
+                    elif tipo == "customizado":
+                        if erro is not None:
+                            raise erro
+                        valor = eval(codigo, globals(), self._contexto_customizado(
+                            order_json, data, valor, tipo, expressao, ultimo_header,
+                            etiqueta_raw, etiqueta_ids, etiqueta_title, priority_value, priority_text,
+                        ))
+                except Exception as e:
+                    valor = f"⚠️ Erro: {e}"
 
-    except Exception as e:
-        logging.error(f"❌ Erro ao extrair dados da ordem: {e}")
-        return {key: "-" for key in data.keys()}
+                data[header] = valor
+                ultimo_header = header
+
+            logging.debug(f"✅ Dados extraídos da ordem {order_json.get('id', '-')}")
+            return data
+
+        except Exception as e:
+            logging.error(f"❌ Erro ao extrair dados da ordem: {e}")
+            return {key: "-" for key in data.keys()}
+
+    def _contexto_customizado(self, order_json, data, valor, tipo, expressao, header,
+                              etiqueta_raw, etiqueta_ids, etiqueta_title, priority_value, priority_text):
+        """Nomes visíveis para as expressões "customizado" (os mesmos do extract_data original)."""
+        contexto = {
+            "order_json": order_json,
+            "campos_variaveis": self.campos_variaveis,
+            "etiquetas_dict": self.etiquetas_dict,
+            "header_report_dict": self.header_report_dict,
+            "campos_padroes": self.campos_padroes,
+            "get_label_title": lambda label_id: self.etiquetas_dict.get(label_id, "-"),
+            "handle_media": handle_media,
+            "etiqueta_raw": etiqueta_raw,
+            "etiqueta_title": etiqueta_title,
+            "priority_map": dict(PRIORIDADES),
+            "priority_value": priority_value,
+            "priority_text": priority_text,
+            "data": data,
+            "valor": valor,
+            "tipo": tipo,
+            "expressao": expressao,
+        }
+        if etiqueta_ids is not None:
+            contexto["etiqueta_ids"] = etiqueta_ids
+        if self._ultimo_padrao is not None:
+            contexto["tag"] = self._ultimo_padrao[0]
+        if header is not None:
+            contexto["header"] = header
+        return contexto
+
+
+def compilar_plano_extracao(campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes):
+    """Compila o plano de extração da config (uma vez por execução)."""
+    return PlanoExtracao(campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes)
+
+
+def extract_data(order_json, campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes):
+    """Extração avulsa de uma ordem; para várias ordens, use `compilar_plano_extracao`."""
+    return compilar_plano_extracao(campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes).extrair(order_json)
@@ -0,0 +1,211 @@
+# http_client.py
+
+import logging
+import threading
+import contextlib
+import requests
+from requests.adapters import HTTPAdapter
+from .rate_controller import ControladorTaxa, STATUS_SOBRECARGA
+from .metrics import get_registro
+
+# status que valem nova tentativa em `get_with_retry`: os mesmos que o controlador trata como
+# sobrecarga, para que toda nova tentativa passe pela redução da janela e pela pausa
+STATUS_RETENTAVEIS = STATUS_SOBRECARGA
+
+
+def _token_dos_headers(headers):
+    """Token do cabeçalho `Authorization: Token <token>` (None se ausente)."""
+    autorizacao = (headers or {}).get("Authorization") or ""
+    return autorizacao.split(" ", 1)[1] if autorizacao.startswith("Token ") else None
+
+
+def _bytes_recebidos(response):
+    """
+    Tamanho do corpo como veio pela rede (comprimido, com gzip): o `Content-Length`;
+    sem ele (resposta em chunks), o corpo já descomprimido.
+    """
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return len(response.content)
+
+
+class ZapformClient:
+    """
+    Cliente HTTP compartilhado para a API Zapform.
+
+    Mantém uma única `requests.Session` com pool de conexões keep-alive,
+    negocia gzip e expõe contadores de reaproveitamento de conexão, para
+    que cada requisição não pague um novo handshake TCP+TLS.
+
+    Toda requisição passa pelo `ControladorTaxa` (janela AIMD global e por
+    token, `Retry-After`); as novas tentativas de `get_with_retry` esperam
+    o que o controlador mandar, sem pausas fixas.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=32, max_retries=3, controlador=None):
+        """
+        Args:
+            pool_connections (int): Quantidade de pools (hosts) mantidos em cache.
+            pool_maxsize (int): Conexões keep-alive mantidas por host.
+            max_retries (int): Novas tentativas de `get_with_retry` (429/5xx e erros de rede).
+            controlador (ControladorTaxa, optional): Controle de ritmo (padrão: um novo por cliente).
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.controlador = controlador or ControladorTaxa()
+
+        # sem retry do urllib3: as tentativas (e as esperas) são decididas pelo controlador
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        self._lock = threading.Lock()
+        self._requisicoes = 0
+        self._falhas = 0
+
+    def _contar(self, falha=False):
+        with self._lock:
+            self._requisicoes += 1
+            if falha:
+                self._falhas += 1
+
+    def _requisitar(self, metodo, url, headers=None, **kwargs):
+        """Uma requisição, dentro de uma vaga do controlador (e do limite global entre processos)."""
+        token = _token_dos_headers(headers)
+        with self.controlador.vaga(token) as inicio:
+            try:
+                with _limite_global or contextlib.nullcontext():
+                    response = self.session.request(metodo, url, headers=headers, **kwargs)
+            except requests.exceptions.RequestException:
+                self.controlador.registrar(token, inicio, erro=True)
+                self._contar(falha=True)
+                get_registro().contar("zapform_requisicoes_total", metodo=metodo, status="erro_rede")
+                raise
+            self.controlador.registrar(
+                token, inicio, status=response.status_code, retry_after=response.headers.get("Retry-After")
+            )
+        self._contar()
+        metricas = get_registro()
+        metricas.contar("zapform_requisicoes_total", metodo=metodo, status=response.status_code)
+        metricas.contar("zapform_bytes_baixados_total", _bytes_recebidos(response))
+        return response
+
+    def get(self, url, headers=None, timeout=30, params=None):
+        """GET simples pelo pool compartilhado. Exceções de rede são propagadas."""
+        return self._requisitar("GET", url, headers=headers, timeout=timeout, params=params)
+
+    def post(self, url, headers=None, json=None, timeout=10):
+        """POST simples pelo pool compartilhado. Exceções de rede são propagadas."""
+        return self._requisitar("POST", url, headers=headers, json=json, timeout=timeout)
+
+    def get_with_retry(self, url, headers=None, timeout=30, params=None, retornar_falha=False):
+        """
+        GET com retry; retorna None se a requisição falhar mesmo após as tentativas.
+
+        Com `retornar_falha`, devolve a última resposta mesmo com erro HTTP (None só em
+        erro de rede), para quem precisa decidir pelo status (ex.: trocar o token recusado).
+        """
+        erro = None
+        for tentativa in range(self.max_retries + 1):
+            try:
+                response = self.get(url, headers=headers, timeout=timeout, params=params)
+            except requests.exceptions.RequestException as e:
+                erro = e
+                if tentativa < self.max_retries:
+                    get_registro().contar("zapform_retentativas_total", motivo="erro_rede")
+                continue
+            if response.status_code in STATUS_RETENTAVEIS and tentativa < self.max_retries:
+                get_registro().contar("zapform_retentativas_total", motivo=response.status_code)
+                continue
+            try:
+                response.raise_for_status()
+                return response
+            except requests.exceptions.HTTPError as e:
+                if retornar_falha:
+                    return response
+                erro = e
+                break
+        print(f"🚨 Erro mesmo após {self.max_retries} tentativas: {erro}")
+        return None
+
+    def estatisticas(self):
+        """
+        Contadores de uso do pool.
+
+        Returns:
+            dict: requisições feitas, falhas de rede, conexões abertas (handshakes),
+            requisições que reaproveitaram uma conexão já aberta e o estado do controlador de ritmo.
+        """
+        conexoes = 0
+        requisicoes_pool = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            conexoes += pool.num_connections
+            requisicoes_pool += pool.num_requests
+
+        with self._lock:
+            return {
+                "requisicoes": self._requisicoes,
+                "falhas": self._falhas,
+                "conexoes_abertas": conexoes,
+                "conexoes_reutilizadas": max(requisicoes_pool - conexoes, 0),
+                "ritmo": self.controlador.estatisticas(),
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_cliente_lock = threading.Lock()
+_cliente_padrao = None
+_limite_global = None
+
+
+def definir_limite_global(semaforo):
+    """
+    Define um semáforo (ex.: `multiprocessing.BoundedSemaphore`) que limita as
+    requisições simultâneas à API somando todos os processos. None remove o limite.
+    """
+    global _limite_global
+    _limite_global = semaforo
+
+
+def get_client():
+    """Retorna o cliente compartilhado do processo, criando-o na primeira chamada."""
+    global _cliente_padrao
+    with _cliente_lock:
+        if _cliente_padrao is None:
+            _cliente_padrao = ZapformClient()
+        return _cliente_padrao
+
+
+def configurar_cliente(**kwargs):
+    """
+    Recria o cliente compartilhado com outros parâmetros (ex.: `pool_maxsize`).
+
+    Returns:
+        ZapformClient: o novo cliente compartilhado.
+    """
+    global _cliente_padrao
+    with _cliente_lock:
+        if _cliente_padrao is not None:
+            _cliente_padrao.close()
+        _cliente_padrao = ZapformClient(**kwargs)
+        logging.info(
+            f"🔌 Cliente HTTP configurado: pool_connections={_cliente_padrao.pool_connections}, "
+            f"pool_maxsize={_cliente_padrao.pool_maxsize}"
+        )
+        return _cliente_padrao
@@ -3,6 +3,19 @@
 import logging
 from report_generator.data_utils import get_with_retry
 
+def extrair_etiquetas(workflow_data):
+    """
+    Extrai as etiquetas (labels) de um documento de workflow já carregado.
+
+    Args:
+        workflow_data (dict): JSON do workflow.
+
+    Returns:
+        dict: Dicionário {label_id: label_title}.
+    """
+    labels = (workflow_data or {}).get("extra_data", {}).get("labels", [])
+    return {label["id"]: label["title"] for label in labels}
+
 def fetch_labels_from_workflow(config_id, token, get_with_retry=get_with_retry):
     """
     Busca as etiquetas (labels) associadas a um workflow da Zapform.
@@ -25,9 +38,7 @@ def fetch_labels_from_workflow(config_id, token, get_with_retry=get_with_retry):
     try:
         response = get_with_retry(url, headers=headers)
         if response and response.status_code == 200:
-            workflow_data = response.json()
-            labels = workflow_data.get("extra_data", {}).get("labels", [])
-            etiquetas_dict = {label["id"]: label["title"] for label in labels}
+            etiquetas_dict = extrair_etiquetas(response.json())
             logging.info(f"🎯 {len(etiquetas_dict)} etiquetas carregadas do workflow {config_id}")
             return etiquetas_dict
         else:
@@ -0,0 +1,236 @@
+# metrics.py
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# limites (segundos) dos histogramas de duração
+BUCKETS_DURACAO = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+# textos do HELP no arquivo Prometheus (métricas sem entrada usam o próprio nome)
+DESCRICOES = {
+    "report_etapa_duracao_segundos": "Duração de cada etapa do processamento de uma config",
+    "report_config_duracao_segundos": "Duração total do processamento da config na última execução",
+    "report_config_ordens": "Ordens da config na última execução, por tipo",
+    "report_configs_total": "Configs processadas, por status",
+    "report_execucao_duracao_segundos": "Duração da última execução",
+    "report_execucao_ultima_timestamp_segundos": "Instante (epoch) do fim da última execução",
+    "zapform_requisicoes_total": "Requisições à API Zapform, por método e status",
+    "zapform_bytes_baixados_total": "Bytes recebidos da API Zapform (corpo comprimido, pelo Content-Length)",
+    "zapform_retentativas_total": "Novas tentativas de GET à API Zapform, por motivo",
+    "zapform_rotacoes_token_total": "Trocas de token por erro",
+    "zapform_relogins_total": "Logins refeitos após falhas seguidas do token",
+    "zapform_logins_total": "Logins na API Zapform, por resultado",
+    "email_envios_total": "E-mails entregues pela caixa de saída, por status",
+    "email_conexoes_total": "Conexões SMTP abertas pela caixa de saída",
+    "email_retentativas_total": "Novas tentativas de envio de e-mail",
+    "email_entrega_duracao_segundos": "Duração da entrega de cada e-mail (tentativas incluídas)",
+}
+
+
+def _chave(rotulos):
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(valor):
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas do processo: contadores, medidores (gauges) e histogramas,
+    cada um identificado por nome + rótulos (ex.: `config`, `etapa`).
+
+    Seguro entre threads. No modo paralelo, cada worker devolve `retirar()` junto com
+    o resultado da config e o processo principal junta com `mesclar`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._medidores = {}
+        self._histogramas = {}  # (nome, rótulos) -> {"buckets": (...), "contagens": [...], "soma", "total"}
+
+    def contar(self, nome, valor=1, **rotulos):
+        """Soma `valor` ao contador."""
+        with self._lock:
+            chave = (nome, _chave(rotulos))
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        """Define o valor atual do medidor."""
+        with self._lock:
+            self._medidores[(nome, _chave(rotulos))] = valor
+
+    def observar(self, nome, valor, buckets=BUCKETS_DURACAO, **rotulos):
+        """Registra uma observação no histograma."""
+        with self._lock:
+            chave = (nome, _chave(rotulos))
+            hist = self._histogramas.get(chave)
+            if hist is None:
+                hist = self._histogramas[chave] = {
+                    "buckets": tuple(buckets), "contagens": [0] * len(buckets), "soma": 0.0, "total": 0
+                }
+            for i, limite in enumerate(hist["buckets"]):
+                if valor <= limite:
+                    hist["contagens"][i] += 1
+            hist["soma"] += valor
+            hist["total"] += 1
+
+    @contextmanager
+    def medir_etapa(self, etapa, config_id=None):
+        """Mede a duração do bloco em `report_etapa_duracao_segundos{config, etapa}`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar_etapa(etapa, time.perf_counter() - inicio, config_id)
+
+    def observar_etapa(self, etapa, segundos, config_id=None):
+        """Duração de etapa já medida (ex.: soma de trechos intercalados no fluxo)."""
+        rotulos = {"etapa": etapa}
+        if config_id is not None:
+            rotulos["config"] = config_id
+        self.observar("report_etapa_duracao_segundos", segundos, **rotulos)
+
+    def instantaneo(self):
+        """
+        Returns:
+            dict: cópia serializável (JSON/pickle) de todas as métricas.
+        """
+        with self._lock:
+            return self._copiar()
+
+    def _copiar(self):
+        return {
+            "contadores": [[nome, dict(rot), valor] for (nome, rot), valor in self._contadores.items()],
+            "medidores": [[nome, dict(rot), valor] for (nome, rot), valor in self._medidores.items()],
+            "histogramas": [
+                [nome, dict(rot), {**hist, "buckets": list(hist["buckets"]), "contagens": list(hist["contagens"])}]
+                for (nome, rot), hist in self._histogramas.items()
+            ],
+        }
+
+    def mesclar(self, instantaneo):
+        """Junta as métricas de outro registro (ex.: de um worker): soma contadores e histogramas."""
+        for nome, rotulos, valor in instantaneo.get("contadores", []):
+            self.contar(nome, valor, **rotulos)
+        for nome, rotulos, valor in instantaneo.get("medidores", []):
+            self.definir(nome, valor, **rotulos)
+        with self._lock:
+            for nome, rotulos, outro in instantaneo.get("histogramas", []):
+                chave = (nome, _chave(rotulos))
+                hist = self._histogramas.get(chave)
+                if hist is None or list(hist["buckets"]) != list(outro["buckets"]):
+                    self._histogramas[chave] = {
+                        "buckets": tuple(outro["buckets"]), "contagens": list(outro["contagens"]),
+                        "soma": outro["soma"], "total": outro["total"],
+                    }
+                    continue
+                hist["contagens"] = [a + b for a, b in zip(hist["contagens"], outro["contagens"])]
+                hist["soma"] += outro["soma"]
+                hist["total"] += outro["total"]
+
+    def limpar(self):
+        with self._lock:
+            self._limpar()
+
+    def _limpar(self):
+        self._contadores.clear()
+        self._medidores.clear()
+        self._histogramas.clear()
+
+    def retirar(self):
+        """`instantaneo()` e `limpar()` de uma vez (o worker envia só o que mediu desde a última vez)."""
+        with self._lock:
+            dados = self._copiar()
+            self._limpar()
+            return dados
+
+    def para_prometheus(self):
+        """Métricas no formato de texto do Prometheus (para o textfile collector do node_exporter)."""
+        dados = self.instantaneo()
+        por_nome = {}
+        for tipo, chave in (("counter", "contadores"), ("gauge", "medidores"), ("histogram", "histogramas")):
+            for nome, rotulos, valor in dados[chave]:
+                por_nome.setdefault(nome, (tipo, []))[1].append((sorted(rotulos.items()), valor))
+
+        linhas = []
+        for nome in sorted(por_nome):
+            tipo, series = por_nome[nome]
+            linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in sorted(series, key=lambda s: s[0]):
+                if tipo != "histogram":
+                    linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {_numero(valor)}")
+                    continue
+                for limite, contagem in zip(valor["buckets"], valor["contagens"]):
+                    linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, [('le', _numero(limite))])} {contagem}")
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, [('le', '+Inf')])} {valor['total']}")
+                linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {_numero(valor['soma'])}")
+                linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {valor['total']}")
+        return "\n".join(linhas) + "\n"
+
+
+def _gravar_atomico(caminho, conteudo):
+    # o textfile collector pode ler a qualquer momento: grava ao lado e troca o arquivo
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def exportar_metricas(diretorio="metricas", registro=None, prefixo_prometheus="report_generator"):
+    """
+    Grava as métricas da execução: `metricas_<data>.json` (um por execução, para histórico)
+    e `<prefixo_prometheus>.prom` (sobrescrito a cada execução, para o node_exporter).
+
+    Returns:
+        tuple[str, str]: caminhos do JSON e do arquivo Prometheus.
+    """
+    registro = registro or get_registro()
+    os.makedirs(diretorio, exist_ok=True)
+    agora = datetime.now()
+    caminho_json = os.path.join(diretorio, f"metricas_{agora.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    caminho_prom = os.path.join(diretorio, f"{prefixo_prometheus}.prom")
+    _gravar_atomico(caminho_json, json.dumps(
+        {"gerado_em": agora.isoformat(timespec="seconds"), **registro.instantaneo()},
+        indent=2, ensure_ascii=False, default=str
+    ))
+    _gravar_atomico(caminho_prom, registro.para_prometheus())
+    logging.info(f"📈 Métricas gravadas em {caminho_json} e {caminho_prom}")
+    return caminho_json, caminho_prom
+
+
+_registro_lock = threading.Lock()
+_registro_padrao = None
+
+
+def get_registro():
+    """Retorna o registro de métricas do processo, criando-o na primeira chamada."""
+    global _registro_padrao
+    with _registro_lock:
+        if _registro_padrao is None:
+            _registro_padrao = RegistroMetricas()
+        return _registro_padrao
+
+
+def medir_etapa(etapa, config_id=None):
+    """Atalho para `get_registro().medir_etapa(...)`."""
+    return get_registro().medir_etapa(etapa, config_id)
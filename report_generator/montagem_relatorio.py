@@ -0,0 +1,105 @@
+# montagem_relatorio.py
+
+import time
+import pandas as pd
+
+from .buffer_colunar import BufferColunar, LIMITE_MEMORIA_MB
+from .data_utils import clean_illegal_chars
+from .profiler import criar_perfilador
+from .sla_report_generator import linha_sem_historico
+
+# ordens por lote enviado ao gerador de SLA
+ORDENS_POR_LOTE_SLA = 500
+
+
+class MontagemRelatorio:
+    """
+    Monta em fluxo as linhas do report e do SLA de uma config: cada ordem vira
+    uma linha do report (plano de extração) e, em lotes de `ORDENS_POR_LOTE_SLA`,
+    linhas de SLA; o JSON da ordem pode ser descartado logo depois.
+
+    Compartilhada pela execução normal (ordens da API) e pelo rebuild (ordens do armazém).
+    """
+
+    def __init__(self, config_id, plano_extracao, gerador_sla, status_list=None,
+                 limite_memoria_mb=LIMITE_MEMORIA_MB, perfil=None):
+        """
+        Args:
+            config_id (str): ID da configuração.
+            plano_extracao: Plano compilado por `compilar_plano_extracao`.
+            gerador_sla (GeradorSLA): Gerador das linhas de SLA.
+            status_list (list, optional): Códigos de status aceitos (vazio = todos).
+            limite_memoria_mb (float): Memória dos buffers de linhas antes de os blocos irem para o disco.
+            perfil (Perfilador, optional): Perfilador das etapas "extrair" e "sla".
+        """
+        self.plano_extracao = plano_extracao
+        self.gerador_sla = gerador_sla
+        self.status_list = status_list or []
+        self.perfil = perfil or criar_perfilador()
+        self.buffer_report = BufferColunar(f"report_{config_id}", limite_mb=limite_memoria_mb)
+        self.buffer_sla = BufferColunar(f"sla_{config_id}", limite_mb=limite_memoria_mb)
+        self._lote_sla = []
+        self.total_ordens = 0
+        self.tempo_extracao = 0.0
+        self.tempo_sla = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def blocos_em_disco(self):
+        return self.buffer_report.blocos_em_disco + self.buffer_sla.blocos_em_disco
+
+    def aceita(self, order_data):
+        """True se o status da ordem passa pelo filtro de status da config."""
+        code = str(order_data.get("status", {}).get("code", "")).strip()
+        return not self.status_list or code in self.status_list
+
+    def adicionar(self, order_data, sla=True):
+        """
+        Extrai a linha do report da ordem e, se `sla`, a coloca no lote de SLA.
+        O filtro de status fica com quem chama (`aceita`).
+        """
+        self.total_ordens += 1
+        inicio = time.time()
+        with self.perfil.etapa("extrair"):
+            self.buffer_report.adicionar(self.plano_extracao.extrair(order_data))
+        self.tempo_extracao += time.time() - inicio
+
+        if sla:
+            self._lote_sla.append(order_data)
+            if len(self._lote_sla) >= ORDENS_POR_LOTE_SLA:
+                self._gerar_sla_do_lote()
+
+    def _gerar_sla_do_lote(self):
+        inicio = time.time()
+        with self.perfil.etapa("sla"):
+            self.buffer_sla.adicionar_df(self.gerador_sla.processar(self._lote_sla))
+        self._lote_sla = []
+        self.tempo_sla += time.time() - inicio
+
+    def finalizar(self):
+        """
+        Processa o último lote de SLA e devolve os DataFrames montados.
+
+        Returns:
+            tuple: (df_report, df_sla); sem histórico, o SLA tem a linha de `linha_sem_historico`.
+        """
+        if self._lote_sla:
+            self._gerar_sla_do_lote()
+        df_report = self.buffer_report.para_dataframe()
+        df_sla = self.buffer_sla.para_dataframe()
+
+        if df_sla.empty:
+            df_sla = pd.DataFrame([linha_sem_historico()])
+        # limpeza leve
+        for col in df_sla.select_dtypes(include="object").columns:
+            df_sla[col] = df_sla[col].map(clean_illegal_chars)
+        return df_report, df_sla
+
+    def close(self):
+        self.buffer_report.close()
+        self.buffer_sla.close()
@@ -0,0 +1,195 @@
+# order_store.py
+
+import json
+import zlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+
+class OrderStore:
+    """
+    Armazém local dos JSONs de ordem retornados por `fetch_order_data`.
+
+    Cada ordem é guardada uma vez por versão (`time_last_updated`), o que
+    permite servir localmente ordens que não mudaram e reconstruir os
+    relatórios de uma config sem chamar a API.
+
+    A tabela `acumuladas` guarda, por ordem, a última versão que chegou aos
+    acumulados (marcada só depois de eles serem gravados): é ela, e não a
+    presença do JSON no armazém, que indica que uma ordem listada já foi processada.
+    """
+
+    def __init__(self, path="orders_store.sqlite"):
+        """
+        Args:
+            path (str): Arquivo SQLite do armazém.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS orders (
+                    config_id TEXT NOT NULL,
+                    order_id TEXT NOT NULL,
+                    time_last_updated TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    armazenado_em TEXT NOT NULL,
+                    PRIMARY KEY (config_id, order_id, time_last_updated)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS acumuladas (
+                    config_id TEXT NOT NULL,
+                    order_id TEXT NOT NULL,
+                    time_last_updated TEXT NOT NULL,
+                    acumulado_em TEXT NOT NULL,
+                    PRIMARY KEY (config_id, order_id)
+                )
+                """
+            )
+
+    @staticmethod
+    def _versao(order_json):
+        return str(order_json.get("time_last_updated") or "")
+
+    def salvar(self, config_id, order_json):
+        """Guarda o JSON da ordem (no-op se essa versão já estiver armazenada)."""
+        payload = zlib.compress(json.dumps(order_json, ensure_ascii=False).encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO orders VALUES (?, ?, ?, ?, ?)",
+                (
+                    str(config_id),
+                    str(order_json.get("id")),
+                    self._versao(order_json),
+                    payload,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def obter(self, config_id, order_id, time_last_updated=None):
+        """
+        Retorna o JSON armazenado da ordem.
+
+        Args:
+            time_last_updated (str, optional): Versão exata desejada. Se omitida, a mais recente.
+
+        Returns:
+            dict | None: None se a ordem (ou a versão pedida) não estiver no armazém.
+        """
+        if time_last_updated is None:
+            sql = (
+                "SELECT payload FROM orders WHERE config_id = ? AND order_id = ? "
+                "ORDER BY time_last_updated DESC LIMIT 1"
+            )
+            args = (str(config_id), str(order_id))
+        else:
+            sql = "SELECT payload FROM orders WHERE config_id = ? AND order_id = ? AND time_last_updated = ?"
+            args = (str(config_id), str(order_id), str(time_last_updated))
+
+        with self._lock:
+            row = self._conn.execute(sql, args).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def possui(self, config_id, order_id, time_last_updated):
+        """Indica se a versão da ordem está no armazém (sem ler o JSON)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM orders WHERE config_id = ? AND order_id = ? AND time_last_updated = ?",
+                (str(config_id), str(order_id), str(time_last_updated)),
+            ).fetchone()
+        return row is not None
+
+    def iter_ultimas(self, config_id):
+        """
+        Itera a versão mais recente de cada ordem armazenada da config (ordem por ID).
+
+        Só as chaves são lidas de uma vez; cada JSON é carregado quando chega a sua vez.
+        """
+        sql = (
+            "SELECT order_id, MAX(time_last_updated) FROM orders WHERE config_id = ? "
+            "GROUP BY order_id ORDER BY CAST(order_id AS INTEGER), order_id"
+        )
+        with self._lock:
+            chaves = self._conn.execute(sql, (str(config_id),)).fetchall()
+        for order_id, versao in chaves:
+            order_data = self.obter(config_id, order_id, versao)
+            if order_data is not None:
+                yield order_data
+
+    def contar(self, config_id):
+        """Quantidade de ordens distintas armazenadas para a config."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(DISTINCT order_id) FROM orders WHERE config_id = ?", (str(config_id),)
+            ).fetchone()
+        return row[0]
+
+    def marcar_acumuladas(self, config_id, versoes):
+        """
+        Registra as versões que chegaram aos acumulados (chamar só depois de gravá-los).
+
+        Args:
+            versoes (dict): order_id -> `time_last_updated` da versão acumulada.
+        """
+        agora = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO acumuladas VALUES (?, ?, ?, ?)",
+                [(str(config_id), str(oid), str(versao), agora) for oid, versao in versoes.items() if versao],
+            )
+
+    def acumulada(self, config_id, order_id, time_last_updated):
+        """Indica se essa versão da ordem é a última que chegou aos acumulados."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM acumuladas WHERE config_id = ? AND order_id = ? AND time_last_updated = ?",
+                (str(config_id), str(order_id), str(time_last_updated)),
+            ).fetchone()
+        return row is not None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def ids_acumulados(config_id, order_ids, versoes, order_store):
+    """IDs de `order_ids` cuja versão listada (`versoes[id]`) já chegou aos acumulados."""
+    return {
+        order_id for order_id in order_ids
+        if versoes and versoes.get(order_id) and order_store.acumulada(config_id, order_id, versoes[order_id])
+    }
+
+
+def iter_com_armazem(config_id, order_ids, versoes, order_store, buscar):
+    """
+    Serve do armazém as ordens cuja versão listada (`versoes[id]`) já está guardada
+    e delega as demais a `buscar` (ex.: `iter_orders_data`), preservando a ordem de `order_ids`.
+
+    Yields:
+        tuple: (order_id, order_data, veio_do_armazem)
+    """
+    locais = set()
+    for order_id in order_ids:
+        versao = versoes.get(order_id) if versoes else None
+        if versao and order_store.possui(config_id, order_id, versao):
+            locais.add(order_id)
+
+    if locais:
+        logging.info(f"🗄️ {len(locais)} ordens sem alteração servidas do armazém local (config {config_id})")
+
+    # o JSON de cada ordem local só é lido na sua vez, para não manter todos em memória
+    remotas = iter(buscar([oid for oid in order_ids if oid not in locais]))
+    for order_id in order_ids:
+        if order_id in locais:
+            yield order_id, order_store.obter(config_id, order_id, versoes[order_id]), True
+        else:
+            remote_id, order_data = next(remotas)
+            yield remote_id, order_data, False
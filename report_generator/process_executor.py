@@ -1,19 +1,27 @@
 import os
 import json
 import logging
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timezone
-import pandas as pd
 from tqdm import tqdm
-from .data_utils import clean_illegal_chars
 
 from .accumulator import acumular_relatorio_principal, acumular_report_sla
+from .sla_watermark import caminho_watermark, carregar_cutoffs
+from .snapshot_store import configurar_snapshot_store
+from .storage import EXTENSOES, DTYPES_SLA, ler_acumulado, garantir_parquet, impressao_do_acumulado
 from .zapform_api_client import (
     fetch_orders_by_date,
     fetch_all_orders,
-    fetch_order_data,
-    get_config_name
+    fetch_orders_by_ids,
+    iter_orders_data,
+    avaliar_hidratacao,
+    PAGE_SIZE_LISTAGEM,
+    PAGINAS_SIMULTANEAS
 )
-from .label_fetcher import fetch_labels_from_workflow
+from .workflow_repository import WorkflowRepository
+from .order_store import OrderStore, iter_com_armazem, ids_acumulados
 from .sheet_config_reader import (
     read_config_sheet,
     build_filters_from_sheet,
@@ -21,281 +29,801 @@ from .sheet_config_reader import (
     extract_variable_fields,
     extract_email_list,
     extract_header_report_map,
-    aplicar_filtro_incremental
+    extract_politica_sem_mudancas,
+    aplicar_filtro_incremental,
+    registrar_ultima_execucao,
+    instante_utc
 )
-from .email_sender import send_email_with_attachment
-from .dashboard_executor import executar_dashboard_personalizado
+from .email_sender import send_email_with_attachment, send_simple_email
+from .email_outbox import CaixaSaida
+from .excel_writer import gerar_excel_relatorio
 from .data_utils import get_with_retry
-from .zapform_auth import TokenManager
-from .extractor import extract_data
-from .sla_report_generator import gerar_report_sla
-from .utils.sla_utils import fetch_sla_by_config
+from .http_client import configurar_cliente, definir_limite_global
+from .rate_controller import ControladorTaxa
+from .zapform_auth import TokenPool
+from .extractor import compilar_plano_extracao
+from .metrics import get_registro, exportar_metricas
+from .profiler import criar_perfilador
+from .sla_report_generator import GeradorSLA
+from .buffer_colunar import LIMITE_MEMORIA_MB
+from .montagem_relatorio import MontagemRelatorio
 import time
 
-
-def executar_processo(logins, spreadsheet):
-    from_email, app_password = _carregar_credenciais_email()
-    token_manager = TokenManager(logins)
-    workflow_cache = {}
-
+# chaves da ordem usadas fora do plano de extração (filtro de status, watermark e SLA)
+CHAVES_ORDEM_EXECUCAO = {"id", "status", "time_last_updated", "status_history"}
+
+
+def executar_processo(
+    logins,
+    spreadsheet,
+    max_in_flight=8,
+    pool_maxsize=None,
+    workflow_ttl_horas=24,
+    paralelo=False,
+    max_workers=4,
+    limite_global_api=None,
+    formato_acumulado="csv",
+    exportar_csv=False,
+    snapshot_reter_ultimos=30,
+    snapshot_reter_dias=None,
+    snapshot_compressao=None,
+    order_store_path="orders_store.sqlite",
+    limite_memoria_mb=LIMITE_MEMORIA_MB,
+    page_size_listagem=PAGE_SIZE_LISTAGEM,
+    paginas_simultaneas=PAGINAS_SIMULTANEAS,
+    hidratar_listagem=True,
+    diretorio_metricas="metricas",
+    perfil=None,
+    perfil_etapas=None,
+    perfil_top=25,
+    smtp_servidor=None,
+    caixa_saida=None
+):
+    """
+    Executa o processamento de todas as abas "config*" da planilha.
+
+    Args:
+        logins (list): Logins de integração da API Zapform.
+        spreadsheet: Planilha (gspread) com as abas de configuração.
+        max_in_flight (int): Máximo de requisições simultâneas na busca detalhada de ordens.
+        pool_maxsize (int, optional): Conexões keep-alive por host no cliente HTTP.
+            Padrão: o suficiente para `max_in_flight`.
+        workflow_ttl_horas (float): Validade da cópia em disco do workflow de cada config.
+        paralelo (bool): Processa as configs em um pool de processos, isolando falhas por config.
+        max_workers (int): Número de processos no modo paralelo.
+        limite_global_api (int, optional): Máximo de requisições simultâneas à API somando
+            todos os processos. Padrão: número de logins de integração.
+        formato_acumulado (str): Backend dos acumulados: "csv" ou "parquet" (requer pyarrow).
+        exportar_csv (bool): Com "parquet", exporta também o `_latest.csv` de cada acumulado.
+        snapshot_reter_ultimos (int, optional): Snapshots datados mantidos por acumulado.
+        snapshot_reter_dias (int, optional): Idade máxima, em dias, dos snapshots datados.
+        snapshot_compressao (str, optional): "zstd", "gzip" ou "nenhuma" (padrão: zstd se disponível).
+        order_store_path (str): Arquivo SQLite do armazém local de JSONs de ordem.
+        limite_memoria_mb (float): Memória dos buffers de linhas (report e SLA) de cada config
+            antes de os blocos irem para o disco.
+        page_size_listagem (int, optional): Ordens por página pedidas nas listagens (None: padrão da API).
+        paginas_simultaneas (int): Páginas da listagem buscadas em paralelo (1: segue o `next` em série).
+        hidratar_listagem (bool): Monta as ordens com os objetos da listagem quando eles trazem os campos
+            usados pela config (GET individual só das que faltarem) e busca listas manuais de IDs em lote.
+        diretorio_metricas (str, optional): Pasta do JSON de métricas da execução e do arquivo
+            Prometheus (`report_generator.prom`). None não grava.
+        perfil (str, optional): Perfila cada config com "cprofile" (arquivo .pstats) ou "amostragem"
+            (pilhas .collapsed.txt, vê também as threads da busca detalhada). None desliga.
+        perfil_etapas (list, optional): Restringe o perfil a estas etapas (`ETAPAS_PERFIL` em profiler.py).
+            Padrão: a config inteira.
+        perfil_top (int): Funções mais quentes listadas no log ao fim de cada config perfilada.
+        smtp_servidor (str, optional): "host:porta" de um servidor SMTP local, sem TLS (testes).
+            Padrão: Gmail.
+        caixa_saida (CaixaSaida, optional): Caixa de saída compartilhada com quem chama (modo
+            sequencial); é esvaziada, mas não fechada, no fim. Sem ela, a execução usa a sua.
+
+    Returns:
+        list[dict]: Resumo por config (status, ordens, duração, arquivo, erro, status do e-mail).
+    """
+    opcoes = {
+        "max_in_flight": max_in_flight,
+        "pool_maxsize": pool_maxsize,
+        "workflow_ttl_horas": workflow_ttl_horas,
+        "formato_acumulado": formato_acumulado,
+        "exportar_csv": exportar_csv,
+        "snapshot_reter_ultimos": snapshot_reter_ultimos,
+        "snapshot_reter_dias": snapshot_reter_dias,
+        "snapshot_compressao": snapshot_compressao,
+        "order_store_path": order_store_path,
+        "limite_memoria_mb": limite_memoria_mb,
+        "page_size_listagem": page_size_listagem,
+        "paginas_simultaneas": paginas_simultaneas,
+        "hidratar_listagem": hidratar_listagem,
+        "perfil": perfil,
+        "perfil_etapas": perfil_etapas,
+        "perfil_top": perfil_top,
+        "smtp_servidor": smtp_servidor,
+    }
+    # valida as opções de perfil aqui, antes de abrir os workers
+    criar_perfilador(perfil, perfil_etapas, perfil_top)
+
+    # métricas desta execução (o registro do processo é reiniciado a cada execução agendada)
+    inicio_execucao = time.time()
+    get_registro().limpar()
+
+    # a leitura da planilha fica no processo principal (objetos gspread não vão para os workers)
+    configs = []
     for ws in spreadsheet.worksheets():
         if not ws.title.startswith("config"):
             continue
-
-        start_config_time = time.time()
         config_id = ws.title.replace("config", "").strip()
-        print(f"\n🔁 Processando aba: {ws.title} (config {config_id})")
-
-        df = read_config_sheet(ws)
-        if df is None or "orders" not in df.columns or not str(df["orders"].iloc[0]).strip():
-            print(f"⏭️ Pulando aba {ws.title}, 'orders' está vazio.")
-            continue
-
-        filtros = build_filters_from_sheet(df)
-        filtros = aplicar_filtro_incremental(config_id, filtros)
-
-        status_raw = filtros.get("status", "")
-        status_list = [s.strip() for s in status_raw.split(",") if s.strip()] if status_raw else []
-
-        usar_todas = str(df["orders"].iloc[0]).strip().lower() == "all"
-
-        campos_padroes = extract_default_fields(df)
-        campos_variaveis = extract_variable_fields(df)
-        header_report_dict = extract_header_report_map(df)
-        emails = extract_email_list(df)
+        configs.append((config_id, ws.title, read_config_sheet(ws)))
 
-        etiquetas_dict = fetch_labels_from_workflow(
-            config_id,
-            token_manager.get_token(),
-            get_with_retry=get_with_retry
+    if paralelo:
+        resumo = _executar_em_paralelo(configs, logins, opcoes, max_workers, limite_global_api or len(logins))
+    else:
+        ctx = _ContextoExecucao(logins, opcoes, caixa_saida)
+        resumo = []
+        try:
+            resumo = [_processar_config(config_id, titulo, df, ctx) for config_id, titulo, df in configs]
+        finally:
+            # os e-mails saem em segundo plano durante a execução; aqui espera os que faltam
+            _anexar_entregas(resumo, _esvaziar_caixa(ctx, fechar=not caixa_saida))
+        ctx.registrar_estatisticas_http()
+
+    logging.info("📋 Resumo da execução:\n" + formatar_resumo(resumo))
+    _registrar_metricas_resumo(resumo, time.time() - inicio_execucao)
+    if diretorio_metricas:
+        try:
+            exportar_metricas(diretorio_metricas)
+        except OSError as e:
+            logging.warning(f"⚠️ Não consegui gravar as métricas em {diretorio_metricas}: {e}")
+    return resumo
+
+
+def _registrar_metricas_resumo(resumo, duracao_execucao):
+    metricas = get_registro()
+    for r in resumo:
+        metricas.contar("report_configs_total", status=r["status"])
+        metricas.definir("report_config_duracao_segundos", r["duracao_s"], config=r["config_id"])
+    metricas.definir("report_execucao_duracao_segundos", round(duracao_execucao, 2))
+    metricas.definir("report_execucao_ultima_timestamp_segundos", int(time.time()))
+
+
+class _ContextoExecucao:
+    """Recursos compartilhados pelas configs processadas em um mesmo processo."""
+
+    def __init__(self, logins, opcoes, caixa_saida=None):
+        self.max_in_flight = opcoes["max_in_flight"]
+        self.formato_acumulado = opcoes["formato_acumulado"]
+        self.exportar_csv = opcoes["exportar_csv"]
+        self.limite_memoria_mb = opcoes["limite_memoria_mb"]
+        self.hidratar_listagem = opcoes["hidratar_listagem"]
+        self.perfil = criar_perfilador(opcoes["perfil"], opcoes["perfil_etapas"], opcoes["perfil_top"])
+        # opções das listagens de ordens (fetch_orders_by_date / fetch_all_orders)
+        self.opcoes_listagem = {
+            "page_size": opcoes["page_size_listagem"],
+            "paginas_simultaneas": opcoes["paginas_simultaneas"],
+        }
+        self.from_email, self.app_password = _carregar_credenciais_email()
+        self.caixa_saida = caixa_saida or CaixaSaida(
+            self.from_email, self.app_password, servidor=opcoes["smtp_servidor"]
+        )
+        # relatórios na caixa de saída: só viram entrega registrada depois que o e-mail sai
+        self.registros_pendentes = []
+        self.http_client = configurar_cliente(
+            pool_maxsize=opcoes["pool_maxsize"] or max(self.max_in_flight, 10),
+            controlador=ControladorTaxa(inicial=self.max_in_flight)
+        )
+        self.token_manager = TokenPool(logins)
+        self.workflow_repo = WorkflowRepository(ttl_horas=opcoes["workflow_ttl_horas"])
+        self.order_store = OrderStore(opcoes["order_store_path"])
+        configurar_snapshot_store(
+            reter_ultimos=opcoes["snapshot_reter_ultimos"],
+            reter_dias=opcoes["snapshot_reter_dias"],
+            compressao=opcoes["snapshot_compressao"]
         )
-        logging.info(f"🎯 {len(etiquetas_dict)} etiquetas carregadas para config {config_id}")
 
-        sla_config_dict = fetch_sla_by_config(
-            config_id,
-            token_manager.get_token(),
-            get_with_retry=get_with_retry
+    def registrar_estatisticas_http(self):
+        stats = self.http_client.estatisticas()
+        logging.info(
+            f"🔌 HTTP: {stats['requisicoes']} requisições, {stats['conexoes_abertas']} conexões abertas, "
+            f"{stats['conexoes_reutilizadas']} reaproveitadas, {stats['falhas']} falhas de rede"
         )
-        logging.info(f"📜 SLA config carregado para {config_id}")
-
-        # cache do workflow
-        if config_id not in workflow_cache:
-            url = f"https://api.zapform.com.br/api/v2/workflow/{config_id}/"
-            headers = {
-                "accept": "application/json",
-                "Authorization": f"Token {token_manager.get_token()}"
-            }
-            response = get_with_retry(url, headers=headers)
-            workflow_cache[config_id] = response.json() if response and response.status_code == 200 else {}
-
-        # ⚙️ Metadados e caminhos
-        current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M")
-        config_name = workflow_cache.get(config_id, {}).get("name") or get_config_name(
-            config_id, token_manager.get_token()
+        ritmo = stats["ritmo"]
+        logging.info(
+            f"🚦 Ritmo da API: {ritmo['taxa']} req/s, janela final {ritmo['janela']}, "
+            f"{ritmo['sobrecargas']} respostas de sobrecarga, latência média {ritmo['latencia_media_s']}s, "
+            f"{ritmo['espera_total_s']}s de espera por vaga ({len(ritmo['taxa_por_token'])} tokens)"
         )
-        safe_name = "".join(c if c.isalnum() or c in "._-" else "_" for c in config_name)[:40]
-        file_path = f"report_{safe_name}_{current_datetime}.xlsx"
-        csv_acumulado_latest = f"acumulado_config_{config_id}_latest.csv"
-        csv_acumulado_sla_latest = f"acumulado_sla_config_{config_id}_latest.csv"
-
-        # ============================
-        # 1) Buscar IDs incrementais
-        # ============================
-        order_ids = []
-        start_fetch_ids = time.time()
-        if usar_todas:
-            print(f"🔍 Iniciando busca de ordens para config {config_id}...")
-            logging.info(f"🔍 Iniciando busca de ordens para config {config_id}...")
-
-            if status_list:
-                for status in status_list:
-                    f = {**filtros, "status": status}
-                    ids = fetch_orders_by_date(
-                        token_manager.get_token(),
-                        config_id,
-                        f,
-                        get_with_retry=get_with_retry
-                    )
-                    order_ids.extend(ids)
-            elif filtros:
-                grupo_filtro = {}
-                for prefixo in ["time_created", "time_last_updated", "time_status"]:
-                    grupo = {k: v for k, v in filtros.items() if k.startswith(prefixo)}
-                    if grupo:
-                        grupo_filtro = grupo
-                        break
-
-                if not grupo_filtro:
-                    print(f"⚠️ Nenhum filtro de data encontrado. Pulando config {config_id}.")
-                    continue
-
-                print(f"🔎 Buscando ordens com filtro: {grupo_filtro}")
-                order_ids = fetch_all_orders(
-                    token_manager,
-                    config_id,
-                    grupo_filtro,
-                    get_with_retry=get_with_retry
-                )
-            else:
-                print(f"🔎 Buscando todas as ordens da config {config_id} sem filtros")
-                order_ids = fetch_all_orders(
-                    token_manager,
+
+
+# ============================
+# Execução paralela (pool de processos)
+# ============================
+_contexto_worker = None
+
+
+def _inicializar_worker(logins, opcoes, semaforo_api):
+    global _contexto_worker
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    definir_limite_global(semaforo_api)
+    _contexto_worker = _ContextoExecucao(logins, opcoes)
+
+
+def _processar_config_isolado(config_id, titulo, df):
+    """Executa uma config no worker; qualquer falha fica restrita a ela."""
+    start_config_time = time.time()
+    try:
+        resultado = _processar_config(config_id, titulo, df, _contexto_worker)
+    except Exception as e:
+        logging.exception(f"❌ Falha na config {config_id}: {e}")
+        resultado = _resultado(config_id, "erro", start_config_time, erro=str(e))
+    finally:
+        _contexto_worker.registrar_estatisticas_http()
+    # o worker pode ser encerrado logo após a última config: entrega os e-mails antes de devolver
+    _anexar_entregas([resultado], _esvaziar_caixa(_contexto_worker))
+    # as métricas medidas no worker voltam com o resultado; o processo principal as junta
+    resultado["metricas"] = get_registro().retirar()
+    return resultado
+
+
+def _executar_em_paralelo(configs, logins, opcoes, max_workers, limite_global_api):
+    logging.info(
+        f"🧵 Modo paralelo: {len(configs)} configs, {max_workers} processos, "
+        f"até {limite_global_api} requisições simultâneas à API"
+    )
+    semaforo_api = multiprocessing.BoundedSemaphore(limite_global_api)
+    resultados = {}
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_inicializar_worker,
+        initargs=(logins, opcoes, semaforo_api)
+    ) as executor:
+        futuros = {
+            executor.submit(_processar_config_isolado, config_id, titulo, df): config_id
+            for config_id, titulo, df in configs
+        }
+        for futuro in as_completed(futuros):
+            config_id = futuros[futuro]
+            try:
+                resultados[config_id] = futuro.result()
+                get_registro().mesclar(resultados[config_id].pop("metricas", None) or {})
+            except Exception as e:
+                # ex.: worker encerrado abruptamente
+                logging.error(f"❌ Worker da config {config_id} falhou: {e}")
+                resultados[config_id] = _resultado(config_id, "erro", time.time(), erro=str(e))
+
+    return [resultados[config_id] for config_id, _, _ in configs]
+
+
+def _resultado(config_id, status, start_config_time, ordens=0, arquivo=None, erro=None, falhas=0):
+    return {
+        "config_id": config_id,
+        "status": status,
+        "ordens": ordens,
+        "falhas": falhas,
+        "duracao_s": round(time.time() - start_config_time, 2),
+        "arquivo": arquivo,
+        "erro": erro,
+        "email": None,
+    }
+
+
+def _anexar_entregas(resumo, entregas):
+    """Status de e-mail de cada config no resumo: "enviado", "falha" ou None (nenhum e-mail)."""
+    por_config = {}
+    for entrega in entregas:
+        por_config.setdefault(entrega["referencia"], []).append(entrega["status"])
+    for r in resumo:
+        status = por_config.get(r["config_id"])
+        if status:
+            r["email"] = "enviado" if all(s == "enviado" for s in status) else "falha"
+
+
+def formatar_resumo(resumo):
+    """Formata o resumo por config para log e e-mail."""
+    icones = {"ok": "✅", "sem_mudancas": "🔕", "sem_dados": "⏭️", "pulada": "⏭️", "erro": "❌"}
+    linhas = []
+    for r in resumo:
+        linha = f"{icones.get(r['status'], '•')} config {r['config_id']}: {r['status']} — {r['ordens']} ordens em {r['duracao_s']}s"
+        if r.get("erro"):
+            linha += f" ({r['erro']})"
+        if r.get("falhas"):
+            linha += f" — ⚠️ {r['falhas']} ordens não obtidas (voltam na próxima execução)"
+        if r.get("email") == "falha":
+            linha += " — 📭 e-mail não entregue"
+        linhas.append(linha)
+    return "\n".join(linhas) if linhas else "Nenhuma config processada."
+
+
+# ============================
+# Processamento de uma config
+# ============================
+def _processar_config(config_id, titulo, df, ctx):
+    with ctx.perfil.config(config_id):
+        return _executar_config(config_id, titulo, df, ctx)
+
+
+@contextmanager
+def _etapa(ctx, etapa, config_id):
+    """Mede a etapa nas métricas e a perfila, se ela foi escolhida em `perfil_etapas`."""
+    with get_registro().medir_etapa(etapa, config_id), ctx.perfil.etapa(etapa):
+        yield
+
+
+def _executar_config(config_id, titulo, df, ctx):
+    start_config_time = time.time()
+    print(f"\n🔁 Processando aba: {titulo} (config {config_id})")
+
+    if df is None or "orders" not in df.columns or not str(df["orders"].iloc[0]).strip():
+        print(f"⏭️ Pulando aba {titulo}, 'orders' está vazio.")
+        return _resultado(config_id, "pulada", start_config_time, erro="'orders' vazio")
+
+    filtros = build_filters_from_sheet(df)
+    filtros = aplicar_filtro_incremental(config_id, filtros)
+
+    status_raw = filtros.get("status", "")
+    status_list = [s.strip() for s in status_raw.split(",") if s.strip()] if status_raw else []
+
+    usar_todas = str(df["orders"].iloc[0]).strip().lower() == "all"
+
+    campos_padroes = extract_default_fields(df)
+    campos_variaveis = extract_variable_fields(df)
+    header_report_dict = extract_header_report_map(df)
+    emails = extract_email_list(df)
+    politica_sem_mudancas = extract_politica_sem_mudancas(df)
+
+    # 📄 Workflow: uma única busca por execução (com cache em disco)
+    etiquetas_dict = ctx.workflow_repo.labels(config_id, ctx.token_manager.get_token())
+    logging.info(f"🎯 {len(etiquetas_dict)} etiquetas carregadas para config {config_id}")
+    plano_extracao = compilar_plano_extracao(campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes)
+
+    sla_config_dict = ctx.workflow_repo.sla_config(config_id, ctx.token_manager.get_token())
+    logging.info(f"📜 SLA config carregado para {config_id}")
+
+    # ⚙️ Metadados e caminhos
+    current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    config_name = ctx.workflow_repo.nome(config_id, ctx.token_manager.get_token())
+    safe_name = "".join(c if c.isalnum() or c in "._-" else "_" for c in config_name)[:40]
+    file_path = f"report_{safe_name}_{current_datetime}.xlsx"
+    ext = EXTENSOES[ctx.formato_acumulado]
+    acumulado_latest = f"acumulado_config_{config_id}_latest{ext}"
+    acumulado_sla_latest = f"acumulado_sla_config_{config_id}_latest{ext}"
+    garantir_parquet(acumulado_latest)
+    garantir_parquet(acumulado_sla_latest, dtype=DTYPES_SLA)
+
+    # ============================
+    # 1) Buscar IDs incrementais
+    # ============================
+    order_ids = []
+    versoes = {}  # order_id -> time_last_updated informado na listagem
+    objetos = {} if ctx.hidratar_listagem else None  # order_id -> JSON da listagem (hidratação)
+    start_fetch_ids = time.time()
+    inicio_listagem_utc = datetime.now(timezone.utc)
+    ctx.perfil.iniciar_etapa("listar_ids")
+    if usar_todas:
+        print(f"🔍 Iniciando busca de ordens para config {config_id}...")
+        logging.info(f"🔍 Iniciando busca de ordens para config {config_id}...")
+
+        if status_list:
+            for status in status_list:
+                f = {**filtros, "status": status}
+                ids = fetch_orders_by_date(
+                    ctx.token_manager.get_token(),
                     config_id,
-                    {},
-                    get_with_retry=get_with_retry
+                    f,
+                    get_with_retry=get_with_retry,
+                    versoes=versoes,
+                    objetos=objetos,
+                    **ctx.opcoes_listagem
                 )
-
-            order_ids = list(dict.fromkeys(order_ids))  # dedup preservando ordem
-            logging.info(f"✅ {len(order_ids)} ordens encontradas para a config {config_id}")
+                order_ids.extend(ids)
+        elif filtros:
+            grupo_filtro = {}
+            for prefixo in ["time_created", "time_last_updated", "time_status"]:
+                grupo = {k: v for k, v in filtros.items() if k.startswith(prefixo)}
+                if grupo:
+                    grupo_filtro = grupo
+                    break
+
+            if not grupo_filtro:
+                print(f"⚠️ Nenhum filtro de data encontrado. Pulando config {config_id}.")
+                return _resultado(config_id, "pulada", start_config_time, erro="nenhum filtro de data")
+
+            print(f"🔎 Buscando ordens com filtro: {grupo_filtro}")
+            order_ids = fetch_all_orders(
+                ctx.token_manager,
+                config_id,
+                grupo_filtro,
+                get_with_retry=get_with_retry,
+                versoes=versoes,
+                objetos=objetos,
+                **ctx.opcoes_listagem
+            )
         else:
-            order_ids = [
-                oid.strip()
-                for oid in df["orders"].dropna().astype(str).tolist()
-                if oid.strip().lower() != "all" and oid.strip() != ""
-            ]
-            order_ids = list(dict.fromkeys(order_ids))  # dedup
-
-        logging.info(f"⏱️ Tempo para buscar IDs: {round(time.time() - start_fetch_ids, 2)}s")
-        logging.info(f"🧾 {len(order_ids)} IDs para processar em config {config_id}")
-
-        # short-circuit sem mudanças
-        
-        if not order_ids:
-            logging.info(f"🔕 Sem mudanças para config {config_id}. Reutilizando acumulados _latest e pulando API.")
-            df_final = pd.read_csv(csv_acumulado_latest) if os.path.exists(csv_acumulado_latest) else pd.DataFrame()
-            df_sla_final = (
-                pd.read_csv(csv_acumulado_sla_latest, dtype={"ID da Ordem": str, "Etapa": str})
-                if os.path.exists(csv_acumulado_sla_latest) else pd.DataFrame()
+            print(f"🔎 Buscando todas as ordens da config {config_id} sem filtros")
+            order_ids = fetch_all_orders(
+                ctx.token_manager,
+                config_id,
+                {},
+                get_with_retry=get_with_retry,
+                versoes=versoes,
+                objetos=objetos,
+                **ctx.opcoes_listagem
             )
 
-            executar_dashboard_personalizado(config_id, df_final, file_path)
+        order_ids = list(dict.fromkeys(order_ids))  # dedup preservando ordem
+        logging.info(f"✅ {len(order_ids)} ordens encontradas para a config {config_id}")
+    else:
+        order_ids = [
+            oid.strip()
+            for oid in df["orders"].dropna().astype(str).tolist()
+            if oid.strip().lower() != "all" and oid.strip() != ""
+        ]
+        order_ids = list(dict.fromkeys(order_ids))  # dedup
+        if ctx.hidratar_listagem and order_ids:
+            fetch_orders_by_ids(
+                ctx.token_manager,
+                config_id,
+                order_ids,
+                get_with_retry=get_with_retry,
+                versoes=versoes,
+                objetos=objetos,
+                paginas_simultaneas=ctx.opcoes_listagem["paginas_simultaneas"]
+            )
+
+    ctx.perfil.parar_etapa("listar_ids")
+    metricas = get_registro()
+    metricas.observar_etapa("listar_ids", time.time() - start_fetch_ids, config_id)
+    metricas.definir("report_config_ordens", len(order_ids), config=config_id, tipo="listadas")
+    logging.info(f"⏱️ Tempo para buscar IDs: {round(time.time() - start_fetch_ids, 2)}s")
+
+    # ordens cuja versão listada já chegou aos acumulados (ex.: as que voltam na margem do
+    # watermark) não contam como mudança nem são processadas de novo
+    inalteradas = ids_acumulados(config_id, order_ids, versoes, ctx.order_store)
+    versoes_inalteradas = (instante_utc(versoes[oid]) for oid in inalteradas)
+    maior_inalterada = max((v for v in versoes_inalteradas if v is not None), default=None)
+    if inalteradas:
+        order_ids = [oid for oid in order_ids if oid not in inalteradas]
+        if objetos:
+            for oid in inalteradas:
+                objetos.pop(oid, None)
+        logging.info(f"🟰 {len(inalteradas)} ordens listadas sem alteração desde a última busca (config {config_id})")
+    metricas.definir("report_config_ordens", len(inalteradas), config=config_id, tipo="inalteradas")
+    logging.info(f"🧾 {len(order_ids)} IDs para processar em config {config_id}")
+
+    # short-circuit sem mudanças
+    if not order_ids:
+        logging.info(f"🔕 Sem mudanças para config {config_id}. Reutilizando acumulados _latest e pulando API.")
+        impressoes = _impressoes_acumulados(acumulado_latest, acumulado_sla_latest)
+        entrega = _entregar_sem_mudancas(
+            config_id, impressoes, politica_sem_mudancas, emails, config_name, current_datetime, ctx, start_config_time
+        )
+        if entrega is None:
+            df_final = ler_acumulado(acumulado_latest)
+            df_sla_final = ler_acumulado(acumulado_sla_latest, dtype={"ID da Ordem": str, "Etapa": str})
+
             if not df_final.empty or not df_sla_final.empty:
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    if not df_final.empty:
-                        df_final.to_excel(writer, sheet_name="report", index=False)
-                    if not df_sla_final.empty:
-                        df_sla_final.to_excel(writer, sheet_name="report_SLA", index=False)
+                abas = [(nome, df_aba) for nome, df_aba in (("report", df_final), ("report_SLA", df_sla_final)) if not df_aba.empty]
+                with _etapa(ctx, "excel", config_id):
+                    gerar_excel_relatorio(config_id, abas, file_path, df_dashboard=df_final)
             else:
                 logging.info(f"⏭️ Nenhum dado para gerar Excel na config {config_id}, pulando.")
-                continue
-
+                return _resultado(config_id, "sem_dados", start_config_time)
 
             subject, body = _montar_email(config_name, config_id, current_datetime)
             to_email = ", ".join(emails)
-            send_email_with_attachment(from_email, to_email, subject, body, app_password, file_path)
-
-            with open(f"last_run_config_{config_id}.json", "w") as f:
-                json.dump({"last_updated": datetime.now().isoformat()}, f)
+            with _etapa(ctx, "email", config_id):
+                envio = send_email_with_attachment(
+                    ctx.from_email, to_email, subject, body, ctx.app_password, file_path,
+                    caixa=ctx.caixa_saida, referencia=config_id
+                )
+            _registrar_entrega_apos_envio(ctx, envio, config_id, impressoes, file_path)
+
+        # só ordens já processadas (ou nenhuma): o watermark avança no máximo até elas
+        registrar_ultima_execucao(config_id, maior_inalterada)
+
+        logging.info(f"🏁 Config {config_id} concluída em {round(time.time() - start_config_time, 2)}s (sem mudanças)")
+        return entrega or _resultado(config_id, "sem_mudancas", start_config_time, arquivo=file_path)
+
+    # ============================
+    # 2) Watermark por ordem (SLA incremental por evento)
+    # ============================
+    # índice persistido (ordem -> último evento), atualizado a cada acumulação do SLA
+    watermark_path = caminho_watermark(config_id)
+    try:
+        cutoff_by_order = carregar_cutoffs(watermark_path, acumulado_sla_latest, order_ids)
+    except Exception as e:
+        cutoff_by_order = {}
+        logging.warning(f"⚠️ Não consegui ler watermark do SLA antigo: {e}")
+
+    # aplica cutoff_by_order (event_time > watermark) e colapsa A,A,B,A,B -> A,B,A,B
+    gerador_sla = GeradorSLA(
+        config_id,
+        {config_id: ctx.workflow_repo.obter(config_id, ctx.token_manager.get_token())},
+        cutoff_by_order=cutoff_by_order,
+        sla_config=sla_config_dict
+    )
 
-            logging.info(f"🏁 Config {config_id} concluída em {round(time.time() - start_config_time, 2)}s (sem mudanças)")
-            continue
+    # ============================
+    # 3) Busca detalhada SOMENTE dos IDs incrementais, em fluxo:
+    #    cada ordem vira linha do report e (em lotes) linhas de SLA, e o JSON é descartado
+    # ============================
+    start_fetch_orders = time.time()
+    montagem = MontagemRelatorio(
+        config_id, plano_extracao, gerador_sla, status_list=status_list,
+        limite_memoria_mb=ctx.limite_memoria_mb, perfil=ctx.perfil
+    )
+    ids_pedidos = {str(oid) for oid in order_ids}
+    ids_no_sla = set()
+    ordens_do_armazem = 0
+    ordens_com_falha = 0
+    # watermark incremental: maior time_last_updated (UTC) da listagem entre as ordens buscadas,
+    # limitado pelas ordens que falharam
+    maior_atualizacao = maior_inalterada
+    limite_seguro = None
+    versoes_acumuladas = {}  # order_id -> versão que vai para os acumulados
+    avancar_watermark = True
+
+    def _buscar_detalhes(ids):
+        return iter_orders_data(
+            config_id,
+            ids,
+            ctx.token_manager,
+            get_with_retry=get_with_retry,
+            max_in_flight=ctx.max_in_flight
+        )
 
-        # ============================
-        # 2) Busca detalhada SOMENTE dos IDs incrementais
-        # ============================
-        results = []
-        raw_orders = []
-        start_fetch_orders = time.time()
-        for order_id in tqdm(order_ids, desc=f"Config {config_id}"):
-            order_data = fetch_order_data(
-                config_id,
-                order_id,
-                token_manager,
-                get_with_retry=get_with_retry
-            )
+    # hidratação: as ordens cujo objeto da listagem basta não passam pelo GET individual
+    hidratacao = None
+    if objetos:
+        chaves = plano_extracao.chaves_ordem()
+        hidratacao = avaliar_hidratacao(
+            config_id,
+            objetos,
+            None if chaves is None else chaves | CHAVES_ORDEM_EXECUCAO,
+            ctx.token_manager,
+            get_with_retry
+        )
+        if hidratacao is None:
+            objetos.clear()
+
+    def _buscar(ids):
+        if hidratacao is not None:
+            return hidratacao.iterar(ids, _buscar_detalhes)
+        return _buscar_detalhes(ids)
+
+    # o perfil de "buscar_detalhes" cobre o laço inteiro (extração e SLA acontecem nele)
+    ctx.perfil.iniciar_etapa("buscar_detalhes")
+    try:
+        detalhes = iter_com_armazem(config_id, order_ids, versoes, ctx.order_store, _buscar)
+        for order_id, order_data, veio_do_armazem in tqdm(detalhes, total=len(order_ids), desc=f"Config {config_id}"):
             if not order_data:
+                ordens_com_falha += 1
+                versao_falha = instante_utc(versoes.get(order_id))
+                if versao_falha is None:
+                    avancar_watermark = False
+                elif limite_seguro is None or versao_falha < limite_seguro:
+                    limite_seguro = versao_falha
                 continue
+            # objetos parciais da listagem não vão para o armazém (o rebuild precisa da ordem completa)
+            parcial = hidratacao is not None and not hidratacao.completa and order_id in hidratacao.servidas
+            if veio_do_armazem:
+                ordens_do_armazem += 1
+            elif not parcial:
+                ctx.order_store.salvar(config_id, order_data)
+
+            # a versão do detalhe pode ser posterior à listagem (a ordem mudou durante a execução);
+            # o watermark não passa do instante da listagem, senão perderia o que mudou depois dela
+            atualizacao = instante_utc(versoes.get(order_id))
+            if atualizacao is None:
+                atualizacao = instante_utc(order_data.get("time_last_updated"))
+                if atualizacao is not None:
+                    atualizacao = min(atualizacao, inicio_listagem_utc)
+            if atualizacao is not None and (maior_atualizacao is None or atualizacao > maior_atualizacao):
+                maior_atualizacao = atualizacao
 
             # filtro de status (se solicitado)
-            code = str(order_data.get("status", {}).get("code", "")).strip()
-            if status_list and code not in status_list:
+            if not montagem.aceita(order_data):
                 continue
 
-            raw_orders.append(order_data)
-            data = extract_data(order_data, campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes)
-            results.append(pd.Series(data))
-
-        logging.info(f"📦 {len(raw_orders)} ordens detalhadas buscadas")
-        logging.info(f"⏱️ Tempo para buscar ordens: {round(time.time() - start_fetch_orders, 2)}s")
-
-        df_result = pd.DataFrame(results)
-
-        # ============================
-        # 3) Watermark por ordem (SLA incremental por evento)
-        # ============================
-        cutoff_by_order = {}
-        if os.path.exists(csv_acumulado_sla_latest):
-            try:
-                df_sla_antigo = pd.read_csv(csv_acumulado_sla_latest, dtype={"ID da Ordem": str})
-                if "ID da Ordem" in df_sla_antigo.columns and "Data do Evento" in df_sla_antigo.columns:
-                    df_sla_antigo["ID da Ordem"] = df_sla_antigo["ID da Ordem"].astype(str).str.strip()
-                    # parser tolerante
-                    dt = pd.to_datetime(df_sla_antigo["Data do Evento"], errors="coerce", utc=False)
-                    mask = ~dt.isna()
-                    if mask.any():
-                        df_sla_antigo = df_sla_antigo.loc[mask].copy()
-                        df_sla_antigo["__dt__"] = dt.dt.tz_localize(None) if getattr(dt.dt, "tz", None) is not None else dt
-                        cutoff_by_order = df_sla_antigo.groupby("ID da Ordem")["__dt__"].max().to_dict()
-            except Exception as e:
-                logging.warning(f"⚠️ Não consegui ler watermark do SLA antigo: {e}")
-
-        # ============================
-        # 4) Gera SLA APENAS para novos/alterados (com colapso A,A,B,A,B -> A,B,A,B)
-        # ============================
-        start_sla_new = time.time()
-        ordens_por_id = {str(o["id"]): o for o in raw_orders}
-        raw_orders_novos = [ordens_por_id[str(oid)] for oid in order_ids if str(oid) in ordens_por_id]
-
-        # >>> Importante: sua função gerar_report_sla deve:
-        # - aplicar cutoff_by_order (event_time > watermark);
-        # - colapsar repetições consecutivas A,A,B,A,B -> A,B,A,B.
-        df_sla_novos = gerar_report_sla(
-            raw_orders_novos,
-            config_id,
-            workflow_cache,
-            cutoff_by_order=cutoff_by_order  # <<< novo parâmetro
+            versoes_acumuladas[order_id] = order_data.get("time_last_updated")
+            # SLA só das ordens pedidas, uma vez cada (na ordem de order_ids)
+            oid = str(order_data.get("id"))
+            no_sla = oid in ids_pedidos and oid not in ids_no_sla
+            if no_sla:
+                ids_no_sla.add(oid)
+            montagem.adicionar(order_data, sla=no_sla)
+
+        df_result, df_sla_novos = montagem.finalizar()
+        ctx.perfil.parar_etapa("buscar_detalhes")
+        total_ordens = montagem.total_ordens
+        tempo_extracao, tempo_sla = montagem.tempo_extracao, montagem.tempo_sla
+
+        tempo_fetch_orders = time.time() - start_fetch_orders
+        metricas.observar_etapa("buscar_detalhes", max(0.0, tempo_fetch_orders - tempo_extracao - tempo_sla), config_id)
+        metricas.observar_etapa("extrair", tempo_extracao, config_id)
+        metricas.observar_etapa("sla", tempo_sla, config_id)
+        for tipo, quantidade in (("processadas", total_ordens), ("armazem", ordens_do_armazem), ("falhas", ordens_com_falha),
+                                 ("hidratadas", len(hidratacao.servidas) if hidratacao is not None else 0)):
+            metricas.definir("report_config_ordens", quantidade, config=config_id, tipo=tipo)
+        vazao = len(order_ids) / tempo_fetch_orders if tempo_fetch_orders > 0 else 0.0
+        logging.info(f"📦 {total_ordens} ordens detalhadas buscadas")
+        if ordens_com_falha:
+            logging.warning(
+                f"⚠️ {ordens_com_falha} ordens da config {config_id} não puderam ser obtidas; "
+                f"o watermark fica antes delas"
+            )
+        if hidratacao is not None:
+            logging.info(
+                f"💧 {len(hidratacao.servidas)} ordens montadas da listagem, "
+                f"{hidratacao.buscadas} buscadas uma a uma"
+            )
+        logging.info(f"⏱️ Tempo para buscar ordens: {round(tempo_fetch_orders, 2)}s")
+        logging.info(f"🚀 Vazão da busca detalhada: {vazao:.2f} ordens/s ({ctx.max_in_flight} requisições simultâneas)")
+        if montagem.blocos_em_disco:
+            logging.info(
+                f"💾 Buffers acima de {ctx.limite_memoria_mb} MB: "
+                f"{montagem.blocos_em_disco} blocos foram para o disco"
+            )
+    finally:
+        montagem.close()
+
+    # ============================
+    # 4) SLA APENAS dos novos/alterados
+    # ============================
+    df_sla_novos.to_csv(f"novos_sla_config_{config_id}.csv", index=False)
+    logging.info(f"🆕 SLA (novos) gerado em {round(tempo_sla, 2)}s")
+
+    # ============================
+    # 5) Acumular (sem reconsultar API para antigas)
+    # ============================
+    # uma falha na gravação interrompe a config: as ordens só são marcadas como acumuladas
+    # depois de os dois acumulados estarem em disco, e voltam na próxima execução
+    with _etapa(ctx, "acumular", config_id):
+        df_final = acumular_relatorio_principal(
+            df_result, acumulado_latest, exportar_csv=ctx.exportar_csv, exigir_gravacao=True
         )
+        df_sla_final = acumular_report_sla(
+            df_sla_novos, acumulado_sla_latest, exportar_csv=ctx.exportar_csv, watermark_path=watermark_path,
+            exigir_gravacao=True
+        )
+    ctx.order_store.marcar_acumuladas(config_id, versoes_acumuladas)
+
+    # cópias datadas: o accumulator registra cada versão no repositório de snapshots
+    # (deduplicado por conteúdo), então não há mais cópias datadas extras aqui.
+
+    # ============================
+    # 6) Excel, dashboard e envio
+    # ============================
+    impressoes = _impressoes_acumulados(acumulado_latest, acumulado_sla_latest)
+    entrega = _entregar_sem_mudancas(
+        config_id, impressoes, politica_sem_mudancas, emails, config_name, current_datetime, ctx, start_config_time,
+        ordens=total_ordens
+    )
+    if entrega is None:
+        with _etapa(ctx, "excel", config_id):
+            gerar_excel_relatorio(config_id, [("report", df_final), ("report_SLA", df_sla_final)], file_path)
 
-        # limpeza leve
-        for col in df_sla_novos.select_dtypes(include="object").columns:
-            df_sla_novos[col] = df_sla_novos[col].map(clean_illegal_chars)
-
-        df_sla_novos.to_csv(f"novos_sla_config_{config_id}.csv", index=False)
-        logging.info(f"🆕 SLA (novos) gerado em {round(time.time() - start_sla_new, 2)}s")
+        subject, body = _montar_email(config_name, config_id, current_datetime)
+        to_email = ", ".join(emails)
+        with _etapa(ctx, "email", config_id):
+            envio = send_email_with_attachment(
+                ctx.from_email, to_email, subject, body, ctx.app_password, file_path,
+                caixa=ctx.caixa_saida, referencia=config_id
+            )
+        _registrar_entrega_apos_envio(ctx, envio, config_id, impressoes, file_path)
+
+    # registro execução (watermark incremental derivado do servidor)
+    registrar_ultima_execucao(config_id, maior_atualizacao, limite_seguro, avancar=avancar_watermark)
+
+    logging.info(f"🏁 Config {config_id} concluída em {round(time.time() - start_config_time, 2)}s")
+    resultado = entrega or _resultado(config_id, "ok", start_config_time, ordens=total_ordens, arquivo=file_path)
+    resultado["falhas"] = ordens_com_falha
+    return resultado
+
+
+# ============================
+# Detecção de relatório inalterado
+# ============================
+def _impressoes_acumulados(acumulado_latest, acumulado_sla_latest):
+    """Impressões digitais dos dois acumulados (lidas do arquivo lateral, sem reler os dados)."""
+    return {
+        "report": impressao_do_acumulado(acumulado_latest),
+        "report_SLA": impressao_do_acumulado(acumulado_sla_latest, dtype={"ID da Ordem": str, "Etapa": str}),
+    }
+
+
+def _ler_ultima_entrega(config_id):
+    path = f"entrega_config_{config_id}.json"
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"⚠️ Erro ao ler {path}: {e}")
+        return None
+
+
+def _registrar_entrega(config_id, impressoes, arquivo):
+    """Guarda as impressões digitais e o xlsx do último relatório entregue."""
+    with open(f"entrega_config_{config_id}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "impressoes": impressoes,
+            "arquivo": arquivo,
+            "entregue_em": datetime.now().isoformat(timespec="seconds"),
+        }, f, ensure_ascii=False)
+
+
+def _registrar_entrega_apos_envio(ctx, envio, config_id, impressoes, arquivo):
+    """
+    Registra o relatório como entregue só se o e-mail saiu: na hora (envio síncrono, `envio` True)
+    ou quando a caixa de saída for esvaziada (`envio` é o status da caixa).
+    Sem registro, a próxima execução inalterada envia o relatório de novo.
+    """
+    if isinstance(envio, dict):
+        ctx.registros_pendentes.append((envio, config_id, impressoes, arquivo))
+    elif envio:
+        _registrar_entrega(config_id, impressoes, arquivo)
+    else:
+        logging.warning(f"⚠️ E-mail da config {config_id} não enviado; a entrega não foi registrada.")
+
+
+def _esvaziar_caixa(ctx, fechar=False):
+    """Espera os e-mails na fila e registra as entregas dos relatórios que saíram."""
+    entregas = ctx.caixa_saida.fechar() if fechar else ctx.caixa_saida.esvaziar()
+    pendentes, ctx.registros_pendentes = ctx.registros_pendentes, []
+    for envio, config_id, impressoes, arquivo in pendentes:
+        if envio["status"] == "enviado":
+            _registrar_entrega(config_id, impressoes, arquivo)
+        else:
+            logging.warning(
+                f"⚠️ Relatório da config {config_id} não entregue; a entrega não foi registrada "
+                f"e o relatório será enviado de novo na próxima execução."
+            )
+    return entregas
 
-        # ============================
-        # 5) Acumular (sem reconsultar API para antigas)
-        # ============================
-        df_final = acumular_relatorio_principal(df_result, csv_acumulado_latest)
-        df_sla_final = acumular_report_sla(df_sla_novos, csv_acumulado_sla_latest)
 
-        # (Opcional) salvos adicionais datados — o accumulator já gera _latest + datado.
-        # Mantidos aqui caso você queira versionamento extra com sufixo de config+timestamp:
-        csv_acumulado_path = f"acumulado_config_{config_id}_{current_datetime}.csv"
-        csv_acumulado_sla_path = f"acumulado_sla_config_{config_id}_{current_datetime}.csv"
-        try:
-            df_final.to_csv(csv_acumulado_path, index=False)
-            df_sla_final.to_csv(csv_acumulado_sla_path, index=False)
-        except Exception as e:
-            logging.warning(f"⚠️ Falha ao salvar cópias datadas adicionais: {e}")
-
-        # ============================
-        # 6) Excel, dashboard e envio
-        # ============================
-        executar_dashboard_personalizado(config_id, df_final, file_path)
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            df_final.to_excel(writer, sheet_name="report", index=False)
-            df_sla_final.to_excel(writer, sheet_name="report_SLA", index=False)
+def _entregar_sem_mudancas(config_id, impressoes, politica, emails, config_name, current_datetime, ctx, start, ordens=0):
+    """
+    Se os acumulados têm as mesmas impressões digitais do último relatório entregue,
+    aplica a política "sem_mudancas:" da planilha sem remontar o Excel.
 
-        subject, body = _montar_email(config_name, config_id, current_datetime)
-        to_email = ", ".join(emails)
-        send_email_with_attachment(from_email, to_email, subject, body, app_password, file_path)
+    Returns:
+        dict | None: resultado da config, ou None se o relatório precisa ser gerado.
+    """
+    ultima = _ler_ultima_entrega(config_id)
+    if not ultima or None in impressoes.values() or ultima.get("impressoes") != impressoes:
+        return None
 
-        # registro execução
-        with open(f"last_run_config_{config_id}.json", "w") as f:
-            json.dump({"last_updated": datetime.now().isoformat()}, f)
+    arquivo = ultima.get("arquivo")
+    if politica == "reenviar" and not (arquivo and os.path.exists(arquivo)):
+        logging.info(f"ℹ️ Último xlsx da config {config_id} não encontrado; o relatório será gerado de novo.")
+        return None
 
-        logging.info(f"🏁 Config {config_id} concluída em {round(time.time() - start_config_time, 2)}s")
+    logging.info(f"🟰 Relatório da config {config_id} idêntico ao entregue em {ultima.get('entregue_em')} (política: {politica})")
+    to_email = ", ".join(emails)
+    if politica == "reenviar":
+        subject, body = _montar_email(config_name, config_id, current_datetime)
+        with _etapa(ctx, "email", config_id):
+            send_email_with_attachment(
+                ctx.from_email, to_email, subject, body, ctx.app_password, arquivo,
+                caixa=ctx.caixa_saida, referencia=config_id
+            )
+    elif politica == "aviso":
+        subject, _ = _montar_email(config_name, config_id, current_datetime)
+        body = (
+            f"Olá!\n\n"
+            f"O relatório da configuração {config_id} não teve alterações desde o envio de {ultima.get('entregue_em')}.\n"
+            f"O último arquivo enviado continua válido: {os.path.basename(arquivo or '')}\n\n"
+            f"Atenciosamente,\nEquipe Zapform 😉"
+        )
+        with _etapa(ctx, "email", config_id):
+            send_simple_email(
+                ctx.from_email, to_email, f"{subject} (sem alterações)", body, ctx.app_password,
+                caixa=ctx.caixa_saida, referencia=config_id
+            )
+    else:
+        logging.info(f"⏭️ Envio pulado para config {config_id} (sem alterações).")
+    return _resultado(config_id, "sem_mudancas", start, ordens=ordens, arquivo=arquivo)
 
 
 def _carregar_credenciais_email():
@@ -0,0 +1,222 @@
+# profiler.py
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+MODOS_PERFIL = ("cprofile", "amostragem")
+# etapas que podem ser perfiladas isoladamente ("config" = a config inteira)
+ETAPAS_PERFIL = ("config", "listar_ids", "buscar_detalhes", "extrair", "sla", "acumular", "excel", "email")
+# intervalo entre amostras do modo "amostragem"
+INTERVALO_AMOSTRAGEM_S = 0.005
+
+
+class _Amostrador:
+    """
+    Profiler por amostragem (tempo de parede): a cada `intervalo_s` guarda a pilha de
+    todas as threads do processo — inclusive as da busca detalhada, que o cProfile não vê.
+    """
+
+    def __init__(self, intervalo_s=INTERVALO_AMOSTRAGEM_S):
+        self.intervalo_s = intervalo_s
+        self.pilhas = Counter()
+        self.amostras = 0
+        self._ligado = threading.Event()
+        self._fim = threading.Event()
+        self._thread = threading.Thread(target=self._laco, name="perfil-amostragem", daemon=True)
+        self._thread.start()
+
+    def _laco(self):
+        proprio = threading.get_ident()
+        while not self._fim.wait(self.intervalo_s):
+            if not self._ligado.is_set():
+                continue
+            nomes = {t.ident: t.name for t in threading.enumerate()}
+            self.amostras += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                pilha = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pilha.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                    frame = frame.f_back
+                pilha.append(nomes.get(ident, "thread"))
+                self.pilhas[";".join(reversed(pilha))] += 1
+
+    def enable(self):
+        self._ligado.set()
+
+    def disable(self):
+        self._ligado.clear()
+
+    def encerrar(self):
+        self._ligado.clear()
+        self._fim.set()
+        self._thread.join()
+
+    def gravar(self, caminho):
+        # formato "collapsed" (flamegraph.pl, speedscope): pilha;separada;por;ponto-e-vírgula contagem
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, contagem in self.pilhas.most_common():
+                f.write(f"{pilha} {contagem}\n")
+
+    def resumo(self, top):
+        proprio, inclusivo = Counter(), Counter()
+        for pilha, contagem in self.pilhas.items():
+            quadros = pilha.split(";")[1:]
+            if not quadros:
+                continue
+            proprio[quadros[-1]] += contagem
+            for quadro in set(quadros):
+                inclusivo[quadro] += contagem
+        total = sum(self.pilhas.values()) or 1
+        linhas = [f"{'próprio':>8} {'total':>8}  função ({self.amostras} amostras, {len(self.pilhas)} pilhas)"]
+        for quadro, contagem in proprio.most_common(top):
+            linhas.append(f"{100 * contagem / total:7.1f}% {100 * inclusivo[quadro] / total:7.1f}%  {quadro}")
+        return "\n".join(linhas)
+
+
+class _SessaoPerfil:
+    """Perfil de uma config: liga/desliga o profiler nas etapas escolhidas (aninhamento contado)."""
+
+    def __init__(self, modo, intervalo_s):
+        self.modo = modo
+        self.profiler = cProfile.Profile() if modo == "cprofile" else _Amostrador(intervalo_s)
+        self.profundidade = 0
+        self.inicio = time.perf_counter()
+
+    def ligar(self):
+        if self.profundidade == 0:
+            self.profiler.enable()
+        self.profundidade += 1
+
+    def desligar(self):
+        if self.profundidade == 0:
+            return
+        self.profundidade -= 1
+        if self.profundidade == 0:
+            self.profiler.disable()
+
+    def finalizar(self, base, top):
+        while self.profundidade:
+            self.desligar()
+        if self.modo == "cprofile":
+            caminho = f"{base}.pstats"
+            self.profiler.dump_stats(caminho)
+            saida = io.StringIO()
+            estatisticas = pstats.Stats(self.profiler, stream=saida)
+            if not estatisticas.stats:
+                return caminho, "(nenhuma chamada registrada)"
+            estatisticas.strip_dirs().sort_stats("tottime").print_stats(top)
+            return caminho, saida.getvalue().strip()
+        self.profiler.encerrar()
+        caminho = f"{base}.collapsed.txt"
+        self.profiler.gravar(caminho)
+        return caminho, self.profiler.resumo(top)
+
+
+class Perfilador:
+    """
+    Perfil de execução por config e por etapa (`--profile` no `main.py`).
+
+    Cada config processada gera um arquivo ao lado do relatório:
+    `perfil_config_<id>[_<etapas>]_<data>.pstats` (cProfile) ou `.collapsed.txt`
+    (amostragem, pilhas no formato dos flame graphs), e o top-N das funções mais
+    quentes vai para o log.
+
+    Com `etapas`, o profiler só fica ligado dentro delas (ex.: só "sla"); sem, a config inteira.
+    O cProfile só enxerga a thread que processa a config; a amostragem vê todas as
+    threads (inclui a busca detalhada em paralelo).
+    """
+
+    def __init__(self, modo="cprofile", etapas=None, top=25, diretorio=".", intervalo_s=INTERVALO_AMOSTRAGEM_S):
+        if modo not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfil desconhecido: {modo}. Use um de {MODOS_PERFIL}.")
+        etapas = set(etapas or ["config"])
+        desconhecidas = etapas - set(ETAPAS_PERFIL)
+        if desconhecidas:
+            raise ValueError(f"Etapas de perfil desconhecidas: {sorted(desconhecidas)}. Use {ETAPAS_PERFIL}.")
+        self.modo = modo
+        self.etapas = etapas
+        self.top = top
+        self.diretorio = diretorio
+        self.intervalo_s = intervalo_s
+        self._sessao = None
+
+    @contextmanager
+    def config(self, config_id):
+        """Sessão de perfil de uma config; grava o arquivo e loga o resumo ao final."""
+        self._sessao = _SessaoPerfil(self.modo, self.intervalo_s)
+        if "config" in self.etapas:
+            self._sessao.ligar()
+        try:
+            yield
+        finally:
+            sessao, self._sessao = self._sessao, None
+            sufixo = "" if "config" in self.etapas else "_" + "-".join(sorted(self.etapas))
+            base = os.path.join(self.diretorio, f"perfil_config_{config_id}{sufixo}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}")
+            try:
+                caminho, resumo = sessao.finalizar(base, self.top)
+                logging.info(
+                    f"🔬 Perfil da config {config_id} ({self.modo}, {', '.join(sorted(self.etapas))}, "
+                    f"{time.perf_counter() - sessao.inicio:.1f}s) gravado em {caminho}. "
+                    f"Top {self.top} funções:\n{resumo}"
+                )
+            except Exception as e:
+                logging.warning(f"⚠️ Não consegui gravar o perfil da config {config_id}: {e}")
+
+    @contextmanager
+    def etapa(self, nome):
+        """Liga o profiler dentro da etapa, se ela foi escolhida (trechos intercalados se somam)."""
+        sessao = self._sessao
+        if sessao is None or nome not in self.etapas:
+            yield
+            return
+        sessao.ligar()
+        try:
+            yield
+        finally:
+            sessao.desligar()
+
+    def iniciar_etapa(self, nome):
+        """Como `etapa`, para blocos longos: liga até `parar_etapa` (ou o fim da config)."""
+        if self._sessao is not None and nome in self.etapas:
+            self._sessao.ligar()
+
+    def parar_etapa(self, nome):
+        if self._sessao is not None and nome in self.etapas:
+            self._sessao.desligar()
+
+
+class _SemPerfil:
+    """Perfilador desligado: mesma interface, sem custo."""
+
+    @contextmanager
+    def config(self, config_id):
+        yield
+
+    @contextmanager
+    def etapa(self, nome):
+        yield
+
+    def iniciar_etapa(self, nome):
+        pass
+
+    def parar_etapa(self, nome):
+        pass
+
+
+def criar_perfilador(modo=None, etapas=None, top=25, diretorio="."):
+    """`Perfilador` configurado, ou um perfilador desligado se `modo` for None."""
+    if not modo:
+        return _SemPerfil()
+    return Perfilador(modo, etapas=etapas, top=top, diretorio=diretorio)
@@ -0,0 +1,213 @@
+# rate_controller.py
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# respostas que indicam sobrecarga da API (reduzem a janela e, com Retry-After, pausam)
+STATUS_SOBRECARGA = (429, 500, 502, 503, 504)
+
+
+def ler_retry_after(valor):
+    """Segundos pedidos no cabeçalho `Retry-After` (número ou data HTTP); None se ausente/inválido."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        pass
+    try:
+        quando = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if quando.tzinfo is None:
+        quando = quando.replace(tzinfo=timezone.utc)
+    return max(0.0, (quando - datetime.now(timezone.utc)).total_seconds())
+
+
+class _JanelaAIMD:
+    """
+    Janela de requisições simultâneas com aumento aditivo e redução multiplicativa,
+    mais uma pausa (Retry-After ou backoff) e contadores para a taxa observada.
+    """
+
+    def __init__(self, inicial, minimo, maximo):
+        self.limite = float(inicial)
+        self.minimo = float(minimo)
+        self.maximo = float(maximo)
+        self.em_andamento = 0
+        self.pausa_ate = 0.0
+        self.ultima_reducao = 0.0
+        self.falhas_seguidas = 0
+        self.requisicoes = 0
+        self.sobrecargas = 0
+        self.inicio = time.monotonic()
+
+    def livre(self, agora):
+        return self.em_andamento < int(self.limite) and self.pausa_ate <= agora
+
+    def aumentar(self):
+        # +1 a cada janela cheia de sucessos
+        self.limite = min(self.maximo, self.limite + 1.0 / max(self.limite, 1.0))
+        self.falhas_seguidas = 0
+
+    def reduzir(self, agora, intervalo, fator):
+        # no máximo uma redução por "ida e volta", para uma rajada não zerar a janela
+        if agora - self.ultima_reducao >= intervalo:
+            self.limite = max(self.minimo, self.limite * fator)
+            self.ultima_reducao = agora
+
+    def pausar(self, agora, segundos):
+        self.pausa_ate = max(self.pausa_ate, agora + segundos)
+
+    def taxa(self, agora):
+        duracao = agora - self.inicio
+        return self.requisicoes / duracao if duracao > 0 else 0.0
+
+
+class ControladorTaxa:
+    """
+    Controle adaptativo (AIMD) das requisições à API Zapform, global e por token.
+
+    Cada requisição ocupa uma vaga da janela global e da janela do seu token
+    (`vaga`). O resultado (`registrar`) ajusta as janelas:
+
+    - sucesso rápido: aumento aditivo (+1 vaga por janela de sucessos);
+    - 429/5xx, erro de rede ou latência acima de `latencia_alvo_s`: redução multiplicativa;
+    - `Retry-After`: pausa o token (ou tudo, se a requisição não tinha token);
+      sem o cabeçalho, 429/5xx e erros de rede pausam o token com backoff exponencial.
+
+    Assim a busca roda no maior ritmo que a API aceita, sem esperas fixas.
+    """
+
+    def __init__(self, inicial=8, minimo=1, maximo=64, inicial_token=4, maximo_token=16,
+                 latencia_alvo_s=5.0, fator_reducao=0.5, backoff_base_s=0.5, backoff_max_s=60.0):
+        """
+        Args:
+            inicial (int): Requisições simultâneas permitidas no início (todas as contas).
+            minimo (int): Mínimo de requisições simultâneas (global e por token).
+            maximo (int): Máximo global de requisições simultâneas.
+            inicial_token (int): Requisições simultâneas por token no início.
+            maximo_token (int): Máximo de requisições simultâneas por token.
+            latencia_alvo_s (float): Latência acima da qual a resposta conta como sinal de sobrecarga.
+            fator_reducao (float): Fator da redução multiplicativa.
+            backoff_base_s (float): Primeira pausa após falha sem `Retry-After`.
+            backoff_max_s (float): Pausa máxima sem `Retry-After`.
+        """
+        self.minimo = minimo
+        self.inicial_token = inicial_token
+        self.maximo_token = maximo_token
+        self.latencia_alvo_s = latencia_alvo_s
+        self.fator_reducao = fator_reducao
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._global = _JanelaAIMD(inicial, minimo, maximo)
+        self._tokens = {}
+        self._latencia = None  # média móvel das latências de sucesso
+        self._espera_total = 0.0
+        self._cond = threading.Condition(threading.Lock())
+
+    def _janela_token(self, token):
+        janela = self._tokens.get(token)
+        if janela is None:
+            janela = self._tokens[token] = _JanelaAIMD(self.inicial_token, self.minimo, self.maximo_token)
+        return janela
+
+    @contextmanager
+    def vaga(self, token=None):
+        """
+        Espera uma vaga (global e do token) e a libera ao final da requisição.
+
+        Yields:
+            float: `time.monotonic()` do início da requisição (para a latência).
+        """
+        inicio_espera = time.monotonic()
+        with self._cond:
+            while True:
+                agora = time.monotonic()
+                janela = self._janela_token(token) if token else None
+                if self._global.livre(agora) and (janela is None or janela.livre(agora)):
+                    break
+                pausas = [j.pausa_ate for j in (self._global, janela) if j is not None and j.pausa_ate > agora]
+                self._cond.wait(min(pausas) - agora if pausas else None)
+            self._global.em_andamento += 1
+            if janela is not None:
+                janela.em_andamento += 1
+            self._espera_total += agora - inicio_espera
+        try:
+            yield agora
+        finally:
+            with self._cond:
+                self._global.em_andamento -= 1
+                if janela is not None:
+                    janela.em_andamento -= 1
+                self._cond.notify_all()
+
+    def registrar(self, token, inicio, status=None, retry_after=None, erro=False):
+        """
+        Ajusta as janelas com o resultado de uma requisição.
+
+        Args:
+            token (str | None): Token usado (None: requisição sem token, ex.: login).
+            inicio (float): Valor devolvido por `vaga`.
+            status (int, optional): Status HTTP (None se houve erro de rede).
+            retry_after (str, optional): Cabeçalho `Retry-After` da resposta.
+            erro (bool): Erro de rede/timeout.
+        """
+        agora = time.monotonic()
+        latencia = agora - inicio
+        sobrecarga = erro or status in STATUS_SOBRECARGA
+        espera = ler_retry_after(retry_after)
+
+        with self._cond:
+            janelas = [self._global] + ([self._janela_token(token)] if token else [])
+            for janela in janelas:
+                janela.requisicoes += 1
+            intervalo = self._latencia or latencia
+
+            if sobrecarga:
+                for janela in janelas:
+                    janela.sobrecargas += 1
+                    janela.falhas_seguidas += 1
+                    janela.reduzir(agora, intervalo, self.fator_reducao)
+                alvo = janelas[-1]  # o token; sem token, a janela global
+                if espera is None:
+                    espera = min(self.backoff_max_s, self.backoff_base_s * 2 ** (alvo.falhas_seguidas - 1))
+                alvo.pausar(agora, espera)
+                logging.debug(
+                    f"🐢 API sobrecarregada ({'erro de rede' if erro else status}): "
+                    f"janela global {self._global.limite:.1f}, pausa de {espera:.1f}s"
+                )
+            else:
+                if espera is not None and status is not None and status < 400:
+                    janelas[-1].pausar(agora, espera)
+                if status is not None and status < 400:
+                    self._latencia = latencia if self._latencia is None else 0.8 * self._latencia + 0.2 * latencia
+                    if latencia > self.latencia_alvo_s:
+                        for janela in janelas:
+                            janela.reduzir(agora, intervalo, self.fator_reducao)
+                    else:
+                        for janela in janelas:
+                            janela.aumentar()
+            self._cond.notify_all()
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: janela global atual, requisições, sobrecargas, taxa global (req/s),
+            latência média, tempo total de espera por vaga e taxa de cada token.
+        """
+        agora = time.monotonic()
+        with self._cond:
+            return {
+                "janela": round(self._global.limite, 1),
+                "requisicoes": self._global.requisicoes,
+                "sobrecargas": self._global.sobrecargas,
+                "taxa": round(self._global.taxa(agora), 2),
+                "latencia_media_s": round(self._latencia or 0.0, 3),
+                "espera_total_s": round(self._espera_total, 1),
+                "taxa_por_token": [round(j.taxa(agora), 2) for j in self._tokens.values()],
+            }
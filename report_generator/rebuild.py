@@ -0,0 +1,116 @@
+# rebuild.py
+
+import sys
+import logging
+
+from .accumulator import acumular_relatorio_principal, acumular_report_sla
+from .sla_watermark import caminho_watermark
+from .extractor import compilar_plano_extracao
+from .order_store import OrderStore
+from .sla_report_generator import GeradorSLA
+from .buffer_colunar import LIMITE_MEMORIA_MB
+from .montagem_relatorio import MontagemRelatorio
+from .storage import EXTENSOES
+from .workflow_repository import WorkflowRepository
+from .sheet_config_reader import (
+    read_config_sheet,
+    build_filters_from_sheet,
+    extract_default_fields,
+    extract_variable_fields,
+    extract_header_report_map
+)
+
+
+def reconstruir_config(config_id, df_config, order_store=None, workflow_repo=None, formato_acumulado="csv",
+                       limite_memoria_mb=LIMITE_MEMORIA_MB):
+    """
+    Regenera `acumulado_config_*` e `acumulado_sla_config_*` de uma config apenas
+    com os JSONs guardados no armazém local — nenhuma chamada à API Zapform.
+
+    Útil quando `tag_form`/`header_report` mudam na planilha: o relatório é
+    refeito com a versão mais recente de cada ordem armazenada. As ordens que não
+    estão no armazém (ex.: buscadas antes de ele existir) continuam no acumulado como estavam.
+
+    Args:
+        config_id (str): ID da configuração.
+        df_config (pd.DataFrame): Aba da config lida com `read_config_sheet`.
+        order_store (OrderStore, optional): Armazém de ordens (padrão: `orders_store.sqlite`).
+        workflow_repo (WorkflowRepository, optional): Repositório de workflow (padrão: offline, só disco).
+        formato_acumulado (str): "csv" ou "parquet".
+        limite_memoria_mb (float): Memória dos buffers de linhas antes de os blocos irem para o disco.
+
+    Returns:
+        tuple: (df_final, df_sla_final)
+    """
+    config_id = str(config_id)
+    order_store = order_store or OrderStore()
+    workflow_repo = workflow_repo or WorkflowRepository(offline=True)
+
+    filtros = build_filters_from_sheet(df_config)
+    status_raw = filtros.get("status", "")
+    status_list = [s.strip() for s in status_raw.split(",") if s.strip()] if status_raw else []
+
+    campos_padroes = extract_default_fields(df_config)
+    campos_variaveis = extract_variable_fields(df_config)
+    header_report_dict = extract_header_report_map(df_config)
+    etiquetas_dict = workflow_repo.labels(config_id, None)
+    plano_extracao = compilar_plano_extracao(campos_variaveis, etiquetas_dict, header_report_dict, campos_padroes)
+    sla_config_dict = workflow_repo.sla_config(config_id, None)
+
+    gerador_sla = GeradorSLA(
+        config_id,
+        {config_id: workflow_repo.obter(config_id, None)},
+        sla_config=sla_config_dict
+    )
+
+    # em fluxo: cada JSON do armazém vira linha do report e (em lotes) linhas de SLA
+    with MontagemRelatorio(config_id, plano_extracao, gerador_sla, status_list=status_list,
+                           limite_memoria_mb=limite_memoria_mb) as montagem:
+        for order_data in order_store.iter_ultimas(config_id):
+            if montagem.aceita(order_data):
+                montagem.adicionar(order_data)
+        df_result, df_sla = montagem.finalizar()
+
+    logging.info(f"♻️ Reconstruindo config {config_id} a partir de {montagem.total_ordens} ordens armazenadas")
+
+    ext = EXTENSOES[formato_acumulado]
+    # mescla com o acumulado: as ordens do armazém são substituídas, as demais ficam como estavam
+    df_final = acumular_relatorio_principal(df_result, f"acumulado_config_{config_id}_latest{ext}")
+    df_sla_final = acumular_report_sla(
+        df_sla, f"acumulado_sla_config_{config_id}_latest{ext}", substituir_ordens=True,
+        watermark_path=caminho_watermark(config_id)
+    )
+
+    chave = "ID do Card" if "ID do Card" in df_final.columns else "ID da Ordem"
+    if chave in df_final.columns and chave in df_result.columns:
+        fora_do_armazem = df_final[chave].nunique() - df_result[chave].astype(str).str.strip().nunique()
+        if fora_do_armazem > 0:
+            logging.warning(
+                f"⚠️ {fora_do_armazem} ordens do acumulado da config {config_id} não estão no armazém "
+                f"e foram mantidas sem reconstrução."
+            )
+    return df_final, df_sla_final
+
+
+def main(config_ids):
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    creds = ServiceAccountCredentials.from_json_keyfile_name("service_account.json", scope)
+    spreadsheet = gspread.authorize(creds).open("Report_Config")
+
+    for config_id in config_ids:
+        df_config = read_config_sheet(spreadsheet.worksheet(f"config{config_id}"))
+        if df_config is None:
+            logging.warning(f"⚠️ Aba config{config_id} vazia; nada a reconstruir.")
+            continue
+        reconstruir_config(config_id, df_config)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m report_generator.rebuild <config_id> [<config_id> ...]")
+        sys.exit(1)
+    main(sys.argv[1:])
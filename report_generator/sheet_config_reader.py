@@ -1,5 +1,5 @@
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
 import os
 import logging
@@ -45,22 +45,108 @@ def build_filters_from_sheet(df):
     return filtros
 
 
-def aplicar_filtro_incremental(config_id, filtros):
-    """Adiciona o filtro incremental de time_last_updated__gt se não estiver presente nos filtros da planilha."""
-    last_run_file = f"last_run_config_{config_id}.json"
-    if os.path.exists(last_run_file):
+# sobreposição da janela incremental (relógios/réplicas do servidor e ordens gravadas no mesmo instante)
+MARGEM_WATERMARK = timedelta(minutes=5)
+VERSAO_ULTIMA_EXECUCAO = 2
+
+
+def _arquivo_ultima_execucao(config_id):
+    return f"last_run_config_{config_id}.json"
+
+
+def instante_utc(valor):
+    """
+    Converte um `time_last_updated` da API (ISO 8601, com "Z" ou offset) em datetime UTC.
+    Datas sem fuso são tratadas como UTC. Retorna None se o valor não for uma data.
+    """
+    if isinstance(valor, datetime):
+        dt = valor
+    elif isinstance(valor, str) and valor.strip():
         try:
-            with open(last_run_file, "r") as f:
-                last_data = json.load(f)
-                last_updated = last_data.get("last_updated")
-                if last_updated and "time_last_updated__gt" not in filtros:
-                    filtros["time_last_updated__gt"] = last_updated
-                    logging.info(f"🕓 Filtro incremental aplicado: time_last_updated__gt = {last_updated}")
-        except Exception as e:
-            logging.warning(f"⚠️ Erro ao carregar filtro incremental de {last_run_file}: {e}")
+            dt = datetime.fromisoformat(valor.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def formatar_instante_api(dt):
+    """Datetime UTC no formato dos filtros da API ("%Y-%m-%dT%H:%M:%S.mmmZ")."""
+    dt = dt.astimezone(timezone.utc)
+    return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond // 1000:03d}Z"
+
+
+def ler_ultima_execucao(config_id):
+    """Registro da última execução da config (vazio se ausente ou ilegível)."""
+    path = _arquivo_ultima_execucao(config_id)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            registro = json.load(f)
+        return registro if isinstance(registro, dict) else {}
+    except Exception as e:
+        logging.warning(f"⚠️ Erro ao carregar filtro incremental de {path}: {e}")
+        return {}
+
+
+def watermark_registrado(registro):
+    """
+    Watermark (UTC) de um registro de execução e a sua origem. Registros antigos,
+    só com o horário local (naive) de término em `last_updated`, são convertidos para UTC.
+    """
+    if "watermark_utc" in registro:
+        return instante_utc(registro.get("watermark_utc")), "watermark do servidor"
+    try:
+        return datetime.fromisoformat(registro["last_updated"]).astimezone(timezone.utc), "horário local da última execução"
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+def aplicar_filtro_incremental(config_id, filtros):
+    """
+    Adiciona o filtro incremental de time_last_updated__gt se não estiver presente nos filtros da planilha.
+
+    O início da janela é o watermark da última execução — o maior `time_last_updated`
+    (UTC, do servidor) entre as ordens processadas — menos `MARGEM_WATERMARK`.
+    """
+    if "time_last_updated__gt" in filtros:
+        return filtros
+    watermark, origem = watermark_registrado(ler_ultima_execucao(config_id))
+    if watermark is not None:
+        filtros["time_last_updated__gt"] = formatar_instante_api(watermark - MARGEM_WATERMARK)
+        logging.info(f"🕓 Filtro incremental aplicado: time_last_updated__gt = {filtros['time_last_updated__gt']} ({origem})")
     return filtros
 
 
+def registrar_ultima_execucao(config_id, maior_atualizacao=None, limite_seguro=None, avancar=True):
+    """
+    Grava o registro da execução com o novo watermark incremental.
+
+    Args:
+        maior_atualizacao (datetime, optional): Maior `time_last_updated` (UTC) entre as ordens processadas.
+        limite_seguro (datetime, optional): O watermark não passa deste instante (ex.: versão
+            listada de uma ordem cuja busca falhou, para que ela volte na próxima janela).
+        avancar (bool): False mantém o watermark anterior (ex.: falhou a busca de uma ordem
+            sem versão conhecida).
+
+    O watermark nunca avança sem ordens observadas: sem mudanças, a janela continua a mesma.
+    """
+    watermark, _ = watermark_registrado(ler_ultima_execucao(config_id))
+    if maior_atualizacao is not None and avancar:
+        watermark = maior_atualizacao if watermark is None else max(watermark, maior_atualizacao)
+    if limite_seguro is not None and watermark is not None:
+        watermark = min(watermark, limite_seguro)
+
+    with open(_arquivo_ultima_execucao(config_id), "w") as f:
+        json.dump({
+            "versao": VERSAO_ULTIMA_EXECUCAO,
+            "last_updated": datetime.now().isoformat(),
+            "watermark_utc": formatar_instante_api(watermark) if watermark is not None else None,
+        }, f)
+
+
 def extract_default_fields(df):
     colunas = ["header_default", "ordem", "tag_default", "show_default"]
     if all(c in df.columns for c in colunas):
@@ -78,6 +164,26 @@ def extract_variable_fields(df):
     return []
 
 
+POLITICAS_SEM_MUDANCAS = ("reenviar", "pular", "aviso")
+
+
+def extract_politica_sem_mudancas(df):
+    """
+    Política quando o relatório não mudou desde a última entrega (parâmetro "sem_mudancas:"):
+      - "reenviar": reenvia o último xlsx entregue (padrão)
+      - "pular": não envia nada
+      - "aviso": envia um e-mail curto, sem anexo
+    """
+    if "parâmetros" in df.columns and "valor" in df.columns:
+        parametros = dict(zip(df["parâmetros"], df["valor"]))
+        politica = str(parametros.get("sem_mudancas:", "") or "").strip().lower()
+        if politica in POLITICAS_SEM_MUDANCAS:
+            return politica
+        if politica:
+            logging.warning(f"⚠️ Valor inválido para 'sem_mudancas:': {politica}. Usando 'reenviar'.")
+    return "reenviar"
+
+
 def extract_email_list(df):
     if "Emails" in df.columns:
         return df["Emails"].dropna().unique().tolist()
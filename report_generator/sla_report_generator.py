@@ -1,7 +1,9 @@
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import pytz
-from .utils.sla_utils import parse_sla_config, calculate_sla_deadline, calculate_working_time
+from .utils.sla_utils import parse_sla_config
+from .utils.sla_calendar import compilar_calendarios, para_us, deslocamento_us
 
 # Fuso horário padrão do Brasil
 TZ = pytz.timezone("America/Sao_Paulo")
@@ -25,169 +27,373 @@ def format_days(seconds):
         return "-"
     return f"{round(seconds / 86400, 2)} dias"
 
-def gerar_report_sla(raw_orders, config_id, workflow_cache, cutoff_by_order=None):
+COLUNAS_SLA = [
+    "ID da Ordem",
+    "Etapa",
+    "Código do Status",
+    "Modificado por",
+    "SLA",
+    "Data do Evento",
+    "Data Início Execução",
+    "Data Final Execução",
+    "Prazo Máximo",
+    "Duração Total",
+    "Duração Útil",
+    "Status SLA",
+    "Excedido Total (min)",
+    "Excedido Útil (min)",
+]
+
+MOTORES_SLA = ("vetorizado", "escalar")
+
+# prazo ainda não calculado: fica para o cálculo em lote do motor vetorizado
+_PRAZO_ADIADO = object()
+
+
+def gerar_report_sla(raw_orders, config_id, workflow_cache, cutoff_by_order=None, sla_config=None, motor="vetorizado"):
     """
     Gera o SLA:
       - aplica watermark por ordem (cutoff_by_order): só emite eventos > último processado
       - colapsa repetições consecutivas (A,A,B,A,B -> A,B,A,B)
       - mantém fuso America/Sao_Paulo
       - adiciona colunas granulares: 'Código do Status' e 'Data do Evento'
+      - se `sla_config` (já interpretado) for informado, não reinterpreta o workflow
+      - prazos e tempo útil vêm do calendário compilado de cada status (`CalendarioSLA`)
+
+    `motor="vetorizado"` monta uma tabela com as transições de todas as ordens e
+    calcula durações, prazos e excedentes em arrays por calendário;
+    `motor="escalar"` calcula linha a linha. Os dois geram o mesmo DataFrame.
     """
-    cutoff_by_order = cutoff_by_order or {}
-    linhas = []
+    gerador = GeradorSLA(config_id, workflow_cache, cutoff_by_order=cutoff_by_order, sla_config=sla_config, motor=motor)
+    df = gerador.processar(raw_orders)
+    if df.empty:
+        df = pd.DataFrame([linha_sem_historico()])
+    return df
 
-    sla_config = {}
-    if config_id in workflow_cache:
-        sla_config = parse_sla_config(workflow_cache[config_id])
-        import json
-        print(f"\n🔎 SLA extraído para config {config_id}: {json.dumps(sla_config, indent=2, default=str)}")
 
-    for order_json in raw_orders or []:
-        order_id = order_json.get("id", "")
-        status_history = order_json.get("status_history", []) or []
-        if not status_history:
-            continue
+class GeradorSLA:
+    """
+    Gerador de SLA de uma config, preparado uma vez (SLA config e calendários) e
+    aplicado a lotes de ordens com `processar` — o que permite gerar o SLA à medida
+    que as ordens chegam, sem manter todos os JSONs em memória.
+    """
 
-        # ---- 1) Ordena por tempo e identifica último status <= cutoff
-        def _ev_time(ev):
-            # teu JSON usa 'time_created'
-            return parse_datetime_safe(ev.get("time_created"))
-
-        # ordena por data crescente
-        status_history = sorted(status_history, key=_ev_time)
-
-        # determina último status conhecido no cutoff (se houver)
-        last_code_before_cutoff = None
-        last_dt_processed = cutoff_by_order.get(str(order_id))
-        if last_dt_processed is not None:
-            # normaliza cutoff para TZ (se veio naive)
-            if last_dt_processed.tzinfo is None:
-                last_dt_processed = TZ.localize(last_dt_processed)
-            for ev in status_history:
-                t = _ev_time(ev)
-                if t is None:
-                    continue
-                if t <= last_dt_processed:
-                    st = ev.get("status", {}) or {}
-                    last_code_before_cutoff = st.get("code")
-                else:
-                    break
+    def __init__(self, config_id, workflow_cache, cutoff_by_order=None, sla_config=None, motor="vetorizado"):
+        if motor not in MOTORES_SLA:
+            raise ValueError(f"Motor de SLA desconhecido: {motor}. Use um de {MOTORES_SLA}.")
+        self.motor = motor
+        self.cutoff_by_order = cutoff_by_order or {}
 
-        # ---- 2) Varre e COLAPSA repetições consecutivas; aplica cutoff
-        etapas = []
-        last_code_emitted = last_code_before_cutoff  # importante p/ colapso cruzando o cutoff
+        if sla_config is None:
+            sla_config = {}
+            if config_id in workflow_cache:
+                sla_config = parse_sla_config(workflow_cache[config_id])
+        if sla_config:
+            import json
+            print(f"\n🔎 SLA extraído para config {config_id}: {json.dumps(sla_config, indent=2, default=str)}")
+        self.sla_config = sla_config
+        self.calendarios = compilar_calendarios(sla_config)
 
-        for entry in status_history:
-            status = entry.get("status", {}) or {}
-            code = status.get("code")
-            title = status.get("status")  # mantém teu campo
-            time_created = _ev_time(entry)
-            user = entry.get("event_data", {}).get("user", "-")
+    def processar(self, raw_orders):
+        """Linhas de SLA de um lote de ordens (DataFrame vazio se nenhuma tiver transições)."""
+        transicoes = []
+        for order_json in raw_orders or []:
+            etapas = _etapas_da_ordem(order_json, self.cutoff_by_order, self.sla_config, self.calendarios,
+                                      adiar_prazo=(self.motor == "vetorizado"))
+            if etapas:
+                transicoes.append((order_json.get("id", ""), etapas))
 
-            if not code or not time_created:
-                continue
+        if self.motor == "vetorizado":
+            return _linhas_vetorizadas(transicoes)
+        linhas = [linha for order_id, etapas in transicoes for linha in _linhas_escalares(order_id, etapas)]
+        return pd.DataFrame(linhas)
 
-            # aplica cutoff: só eventos estritamente DEPOIS do último processado
-            if last_dt_processed is not None and time_created <= last_dt_processed:
-                # atualiza o colapso mesmo assim, pra evitar repetir o primeiro pós-cutoff
-                last_code_emitted = code
-                continue
 
-            # colapso: pula se mesmo status consecutivo
-            if code == last_code_emitted:
+def linha_sem_historico():
+    linha = {coluna: "-" for coluna in COLUNAS_SLA}
+    linha["ID da Ordem"] = "Nenhuma ordem com histórico válido"
+    return linha
+
+
+def _etapas_da_ordem(order_json, cutoff_by_order, sla_config, calendarios, adiar_prazo=False):
+    """
+    Transições colapsadas de uma ordem (após o cutoff), com o SLA de cada status.
+
+    Com `adiar_prazo`, o prazo dos calendários vetorizáveis fica como `_PRAZO_ADIADO`
+    (e os minutos de SLA em "Minutos SLA") para o cálculo em lote.
+    """
+    order_id = order_json.get("id", "")
+    status_history = order_json.get("status_history", []) or []
+    if not status_history:
+        return []
+
+    # ---- 1) Ordena por tempo e identifica último status <= cutoff
+    def _ev_time(ev):
+        # teu JSON usa 'time_created'
+        return parse_datetime_safe(ev.get("time_created"))
+
+    # ordena por data crescente
+    status_history = sorted(status_history, key=_ev_time)
+
+    # determina último status conhecido no cutoff (se houver)
+    last_code_before_cutoff = None
+    last_dt_processed = cutoff_by_order.get(str(order_id))
+    if last_dt_processed is not None:
+        # normaliza cutoff para TZ (se veio naive)
+        if last_dt_processed.tzinfo is None:
+            last_dt_processed = TZ.localize(last_dt_processed)
+        for ev in status_history:
+            t = _ev_time(ev)
+            if t is None:
                 continue
+            if t <= last_dt_processed:
+                st = ev.get("status", {}) or {}
+                last_code_before_cutoff = st.get("code")
+            else:
+                break
 
-            # --- SLA config (mantendo tua lógica atual)
-            sla_info = sla_config.get(str(code))
-            sla_segundos = None
-            prazo_maximo = None
-
-            if sla_info:
-                try:
-                    if "sla_time" in sla_info and sla_info["sla_time"]:
-                        h, m = map(int, sla_info["sla_time"].split(":"))
-                        sla_segundos = h * 3600 + m * 60
-                        prazo_maximo = calculate_sla_deadline(time_created, sla_info)
-                    else:
-                        print(f"⚠️ SLA sem sla_time para status {code} na ordem {order_id}: {sla_info}")
-                except Exception as e:
-                    print(f"❌ Erro ao calcular SLA para status {code} na ordem {order_id}: {e}")
-                    sla_segundos = None
-                    prazo_maximo = None
-
-            etapas.append({
-                "Etapa": title,
-                "Código": code,
-                "Código do Status": code,  # <<< coluna granular p/ accumulator
-                "Modificado por": user,
-                "SLA (segundos)": sla_segundos,
-                "Prazo Máximo": prazo_maximo,
-                "Data Início Execução": time_created,
-                "Data do Evento": time_created.strftime("%Y-%m-%d %H:%M:%S"),  # <<< granular
-                "SLA config": sla_info
-            })
+    # ---- 2) Varre e COLAPSA repetições consecutivas; aplica cutoff
+    etapas = []
+    last_code_emitted = last_code_before_cutoff  # importante p/ colapso cruzando o cutoff
+
+    for entry in status_history:
+        status = entry.get("status", {}) or {}
+        code = status.get("code")
+        title = status.get("status")  # mantém teu campo
+        time_created = _ev_time(entry)
+        user = entry.get("event_data", {}).get("user", "-")
+
+        if not code or not time_created:
+            continue
+
+        # aplica cutoff: só eventos estritamente DEPOIS do último processado
+        if last_dt_processed is not None and time_created <= last_dt_processed:
+            # atualiza o colapso mesmo assim, pra evitar repetir o primeiro pós-cutoff
             last_code_emitted = code
+            continue
 
-        # ---- 3) Linhas calculadas com base nas transições filtradas
-        for idx, etapa in enumerate(etapas):
-            inicio = etapa["Data Início Execução"]
-            fim = etapas[idx + 1]["Data Início Execução"] if idx + 1 < len(etapas) else None
-            sla = etapa.get("SLA (segundos)")
-            prazo_maximo = etapa.get("Prazo Máximo")
-            sla_info = etapa.get("SLA config", {})
-
-            duracao_total = (fim - inicio).total_seconds() if isinstance(fim, datetime) else None
-            duracao_util = calculate_working_time(inicio, fim, sla_info) if isinstance(fim, datetime) and sla_info else None
-
-            status_sla = "-"
-            excedido_total = "-"
-            excedido_util = "-"
-            if isinstance(fim, datetime) and isinstance(prazo_maximo, datetime):
-                try:
-                    if fim <= prazo_maximo:
-                        status_sla = "Dentro do SLA"
-                        excedido_total = "0"
-                        excedido_util = "0"
+        # colapso: pula se mesmo status consecutivo
+        if code == last_code_emitted:
+            continue
+
+        # --- SLA config (mantendo tua lógica atual)
+        sla_info = sla_config.get(str(code))
+        calendario = calendarios.get(str(code))
+        sla_segundos = None
+        sla_minutos = None
+        prazo_maximo = None
+
+        if sla_info:
+            try:
+                if "sla_time" in sla_info and sla_info["sla_time"]:
+                    h, m = map(int, sla_info["sla_time"].split(":"))
+                    sla_segundos = h * 3600 + m * 60
+                    sla_minutos = h * 60 + m
+                    if adiar_prazo and calendario.vetorizavel():
+                        prazo_maximo = _PRAZO_ADIADO
                     else:
-                        status_sla = "Atrasado"
-                        excedido_total = round((fim - prazo_maximo).total_seconds() / 60, 2)
-                        excedido_util = round(calculate_working_time(prazo_maximo, fim, sla_info) / 60, 2)
-                except Exception as e:
-                    print(f"❌ Erro comparando SLA em ordem {order_id}: {e}")
-
-            linhas.append({
-                "ID da Ordem": order_id,
-                "Etapa": etapa["Etapa"],
-                "Código do Status": etapa["Código do Status"],     # <<< mantém
-                "Modificado por": etapa["Modificado por"],
-                "SLA": format_duration(sla),
-                "Data do Evento": etapa["Data do Evento"],         # <<< mantém
-                "Data Início Execução": inicio.strftime("%d/%m/%Y %H:%M") if isinstance(inicio, datetime) else "-",
-                "Data Final Execução": fim.strftime("%d/%m/%Y %H:%M") if isinstance(fim, datetime) else "-",
-                "Prazo Máximo": prazo_maximo.strftime("%d/%m/%Y %H:%M") if isinstance(prazo_maximo, datetime) else "-",
-                "Duração Total": format_days(duracao_total),
-                "Duração Útil": format_days(duracao_util),
-                "Status SLA": status_sla,
-                "Excedido Total (min)": excedido_total,
-                "Excedido Útil (min)": excedido_util
-            })
-
-    if not linhas:
+                        prazo_maximo = calendario.prazo(time_created, sla_minutos)
+                else:
+                    print(f"⚠️ SLA sem sla_time para status {code} na ordem {order_id}: {sla_info}")
+            except Exception as e:
+                print(f"❌ Erro ao calcular SLA para status {code} na ordem {order_id}: {e}")
+                sla_segundos = None
+                prazo_maximo = None
+
+        etapas.append({
+            "Etapa": title,
+            "Código": code,
+            "Código do Status": code,  # <<< coluna granular p/ accumulator
+            "Modificado por": user,
+            "SLA (segundos)": sla_segundos,
+            "Minutos SLA": sla_minutos,
+            "Prazo Máximo": prazo_maximo,
+            "Data Início Execução": time_created,
+            "SLA config": sla_info,
+            "Calendário": calendario
+        })
+        last_code_emitted = code
+
+    return etapas
+
+
+def _linhas_escalares(order_id, etapas):
+    """---- 3) Linhas calculadas com base nas transições filtradas (linha a linha)."""
+    linhas = []
+    for idx, etapa in enumerate(etapas):
+        inicio = etapa["Data Início Execução"]
+        fim = etapas[idx + 1]["Data Início Execução"] if idx + 1 < len(etapas) else None
+        sla = etapa.get("SLA (segundos)")
+        prazo_maximo = etapa.get("Prazo Máximo")
+        sla_info = etapa.get("SLA config", {})
+        calendario = etapa.get("Calendário")
+
+        duracao_total = (fim - inicio).total_seconds() if isinstance(fim, datetime) else None
+        duracao_util = calendario.tempo_util(inicio, fim) if isinstance(fim, datetime) and sla_info else None
+
+        status_sla = "-"
+        excedido_total = "-"
+        excedido_util = "-"
+        if isinstance(fim, datetime) and isinstance(prazo_maximo, datetime):
+            try:
+                if fim <= prazo_maximo:
+                    status_sla = "Dentro do SLA"
+                    excedido_total = "0"
+                    excedido_util = "0"
+                else:
+                    status_sla = "Atrasado"
+                    excedido_total = round((fim - prazo_maximo).total_seconds() / 60, 2)
+                    excedido_util = round(calendario.tempo_util(prazo_maximo, fim) / 60, 2)
+            except Exception as e:
+                print(f"❌ Erro comparando SLA em ordem {order_id}: {e}")
+
         linhas.append({
-            "ID da Ordem": "Nenhuma ordem com histórico válido",
-            "Etapa": "-",
-            "Código do Status": "-",
-            "Modificado por": "-",
-            "SLA": "-",
-            "Data do Evento": "-",
-            "Data Início Execução": "-",
-            "Data Final Execução": "-",
-            "Prazo Máximo": "-",
-            "Duração Total": "-",
-            "Duração Útil": "-",
-            "Status SLA": "-",
-            "Excedido Total (min)": "-",
-            "Excedido Útil (min)": "-"
+            "ID da Ordem": order_id,
+            "Etapa": etapa["Etapa"],
+            "Código do Status": etapa["Código do Status"],     # <<< mantém
+            "Modificado por": etapa["Modificado por"],
+            "SLA": format_duration(sla),
+            "Data do Evento": inicio.strftime("%Y-%m-%d %H:%M:%S"),  # <<< granular
+            "Data Início Execução": inicio.strftime("%d/%m/%Y %H:%M") if isinstance(inicio, datetime) else "-",
+            "Data Final Execução": fim.strftime("%d/%m/%Y %H:%M") if isinstance(fim, datetime) else "-",
+            "Prazo Máximo": prazo_maximo.strftime("%d/%m/%Y %H:%M") if isinstance(prazo_maximo, datetime) else "-",
+            "Duração Total": format_days(duracao_total),
+            "Duração Útil": format_days(duracao_util),
+            "Status SLA": status_sla,
+            "Excedido Total (min)": excedido_total,
+            "Excedido Útil (min)": excedido_util
         })
+    return linhas
+
+
+def _formatar_hora_local(instante_us, desloc_us, formato):
+    """strftime em lote: instantes (µs) + deslocamento UTC → texto da hora local."""
+    if len(instante_us) == 0:
+        return []
+    return pd.to_datetime(np.asarray(instante_us) + np.asarray(desloc_us), unit="us").strftime(formato).tolist()
+
+
+def _linhas_vetorizadas(transicoes):
+    """
+    ---- 3) Mesmas linhas de `_linhas_escalares`, calculadas em lote.
+
+    Todas as transições viram uma tabela (início, fim, calendário, minutos de SLA);
+    durações, prazos, status e excedentes são calculados com arrays por calendário.
+    Calendários não vetorizáveis (turnos sobrepostos/fora de ordem) usam o cálculo escalar.
+    """
+    # ---- 3.1) Tabela de transições
+    ids, etapas_planas, inicios = [], [], []
+    tem_fim = []
+    for order_id, etapas in transicoes:
+        for idx, etapa in enumerate(etapas):
+            ids.append(order_id)
+            etapas_planas.append(etapa)
+            inicios.append(etapa["Data Início Execução"])
+            tem_fim.append(idx + 1 < len(etapas))
+    n = len(etapas_planas)
+    if n == 0:
+        return pd.DataFrame()
+
+    inicio_us = np.fromiter((para_us(dt) for dt in inicios), dtype=np.int64, count=n)
+    inicio_desloc = np.fromiter((deslocamento_us(dt) for dt in inicios), dtype=np.int64, count=n)
+    tem_fim = np.array(tem_fim, dtype=bool)
+    # fim de cada etapa = início da próxima etapa da mesma ordem
+    fim_us = np.where(tem_fim, np.roll(inicio_us, -1), 0)
+    fim_desloc = np.where(tem_fim, np.roll(inicio_desloc, -1), 0)
+
+    calendarios = [e["Calendário"] for e in etapas_planas]
+    tem_sla_info = np.array([bool(e["SLA config"]) for e in etapas_planas], dtype=bool)
+
+    # prazos já calculados (calendários não vetorizáveis); os adiados vêm no passo 3.2
+    prazo_us = np.zeros(n, dtype=np.int64)
+    prazo_desloc = np.zeros(n, dtype=np.int64)
+    tem_prazo = np.zeros(n, dtype=bool)
+    for i, etapa in enumerate(etapas_planas):
+        prazo = etapa["Prazo Máximo"]
+        if isinstance(prazo, datetime):
+            prazo_us[i] = para_us(prazo)
+            prazo_desloc[i] = deslocamento_us(prazo)
+            tem_prazo[i] = True
+
+    duracao_util = np.zeros(n, dtype=np.int64)
+    excedido_util_s = np.zeros(n, dtype=np.int64)
+    atrasado = np.zeros(n, dtype=bool)
+
+    # ---- 3.2) Cálculo por grupo de calendário
+    grupos = {}
+    for i, calendario in enumerate(calendarios):
+        if calendario is not None:
+            grupos.setdefault(id(calendario), (calendario, []))[1].append(i)
+
+    for calendario, indices in grupos.values():
+        idx = np.array(indices, dtype=np.int64)
+        adiados = np.array([etapas_planas[i]["Prazo Máximo"] is _PRAZO_ADIADO for i in indices], dtype=bool)
+        minutos = np.array([etapas_planas[i]["Minutos SLA"] or 0 for i in indices], dtype=np.int64)
+
+        limites = np.concatenate((inicio_us[idx], fim_us[idx][tem_fim[idx]]))
+        horizonte = int(minutos.max()) * 60 * 10**6 if len(minutos) else 0
+        vetorizavel = calendario.preparar_lote(limites.min(), limites.max() + horizonte)
+
+        # prazos adiados
+        ia = idx[adiados]
+        if len(ia):
+            if vetorizavel:
+                p_us, p_desloc = calendario.prazo_lote(inicio_us[ia], inicio_desloc[ia], minutos[adiados])
+            else:
+                p_us, p_desloc = [], []
+                for i in ia:
+                    prazo = calendario.prazo(inicios[i], etapas_planas[i]["Minutos SLA"])
+                    etapas_planas[i]["Prazo Máximo"] = prazo
+                    p_us.append(para_us(prazo))
+                    p_desloc.append(deslocamento_us(prazo))
+            prazo_us[ia] = p_us
+            prazo_desloc[ia] = p_desloc
+            tem_prazo[ia] = True
+
+        # tempo útil da etapa e tempo útil excedido
+        iu = idx[tem_fim[idx] & tem_sla_info[idx]]
+        ie = idx[tem_fim[idx] & tem_prazo[idx] & (fim_us[idx] > prazo_us[idx])]
+        if vetorizavel:
+            duracao_util[iu] = calendario.tempo_util_lote(inicio_us[iu], fim_us[iu], inicio_desloc[iu])
+            excedido_util_s[ie] = calendario.tempo_util_lote(prazo_us[ie], fim_us[ie], prazo_desloc[ie])
+        else:
+            for i in iu:
+                duracao_util[i] = calendario.tempo_util(inicios[i], inicios[i + 1])
+            for i in ie:
+                excedido_util_s[i] = calendario.tempo_util(etapas_planas[i]["Prazo Máximo"], inicios[i + 1])
+        atrasado[idx] = tem_fim[idx] & tem_prazo[idx] & (fim_us[idx] > prazo_us[idx])
+
+    compara = tem_fim & tem_prazo
+
+    # ---- 3.3) Colunas (mesmos tipos e textos do cálculo escalar)
+    inicio_txt = _formatar_hora_local(inicio_us, inicio_desloc, "%d/%m/%Y %H:%M")
+    evento_txt = _formatar_hora_local(inicio_us, inicio_desloc, "%Y-%m-%d %H:%M:%S")
+    fim_txt = _formatar_hora_local(fim_us, fim_desloc, "%d/%m/%Y %H:%M")
+    prazo_txt = _formatar_hora_local(prazo_us, prazo_desloc, "%d/%m/%Y %H:%M")
+
+    duracao_total_dias = ((fim_us - inicio_us) / 10**6 / 86400).tolist()
+    duracao_util_dias = (duracao_util / 86400).tolist()
+    excedido_total_min = ((fim_us - prazo_us) / 10**6 / 60).tolist()
+    excedido_util_min = (excedido_util_s / 60).tolist()
+    tem_fim_l, tem_util_l, compara_l, atrasado_l = (tem_fim.tolist(), (tem_fim & tem_sla_info).tolist(),
+                                                    compara.tolist(), atrasado.tolist())
 
-    return pd.DataFrame(linhas)
+    colunas = {
+        "ID da Ordem": ids,
+        "Etapa": [e["Etapa"] for e in etapas_planas],
+        "Código do Status": [e["Código do Status"] for e in etapas_planas],
+        "Modificado por": [e["Modificado por"] for e in etapas_planas],
+        "SLA": [format_duration(e["SLA (segundos)"]) for e in etapas_planas],
+        "Data do Evento": evento_txt,
+        "Data Início Execução": inicio_txt,
+        "Data Final Execução": [t if f else "-" for t, f in zip(fim_txt, tem_fim_l)],
+        "Prazo Máximo": [t if p else "-" for t, p in zip(prazo_txt, tem_prazo.tolist())],
+        "Duração Total": [f"{round(d, 2)} dias" if f else "-" for d, f in zip(duracao_total_dias, tem_fim_l)],
+        "Duração Útil": [f"{round(d, 2)} dias" if u else "-" for d, u in zip(duracao_util_dias, tem_util_l)],
+        "Status SLA": [("Atrasado" if a else "Dentro do SLA") if c else "-" for c, a in zip(compara_l, atrasado_l)],
+        "Excedido Total (min)": [(round(x, 2) if a else "0") if c else "-"
+                                 for x, c, a in zip(excedido_total_min, compara_l, atrasado_l)],
+        "Excedido Útil (min)": [(round(x, 2) if a else "0") if c else "-"
+                                for x, c, a in zip(excedido_util_min, compara_l, atrasado_l)],
+    }
+    return pd.DataFrame(colunas)
@@ -0,0 +1,135 @@
+# sla_watermark.py
+
+import os
+import json
+import logging
+from datetime import datetime
+import pandas as pd
+
+from .storage import DTYPES_SLA, ler_acumulado, ler_impressao_digital, impressao_do_acumulado
+
+VERSAO_INDICE = 1
+
+
+def caminho_watermark(config_id):
+    """Arquivo do índice de watermarks do SLA da config."""
+    return f"watermark_sla_config_{config_id}.json"
+
+
+def calcular_watermarks(df_sla):
+    """
+    Watermark de cada ordem a partir de linhas do SLA: data do último evento
+    ("Data do Evento", mesmo parser tolerante do cutoff) e o código do status desse evento.
+
+    Returns:
+        dict: {id_da_ordem: [data_iso, código | None]}
+    """
+    if df_sla.empty or "ID da Ordem" not in df_sla.columns or "Data do Evento" not in df_sla.columns:
+        return {}
+
+    dt = pd.to_datetime(df_sla["Data do Evento"], errors="coerce", utc=False)
+    if getattr(dt.dt, "tz", None) is not None:
+        dt = dt.dt.tz_localize(None)
+    mask = dt.notna().to_numpy()
+    if not mask.any():
+        return {}
+
+    ids = df_sla["ID da Ordem"].astype(str).str.strip().to_numpy()[mask]
+    codigos = (
+        df_sla["Código do Status"].to_numpy(dtype=object)[mask]
+        if "Código do Status" in df_sla.columns else [None] * int(mask.sum())
+    )
+    eventos = pd.DataFrame({"id": ids, "dt": dt.to_numpy()[mask], "codigo": codigos})
+    # primeira linha com a maior data de cada ordem (como o idxmax)
+    ultimos = eventos.loc[eventos.groupby("id", sort=False)["dt"].idxmax()]
+
+    return {
+        oid: [pd.Timestamp(t).to_pydatetime().isoformat(), None if pd.isna(c) else str(c).strip()]
+        for oid, t, c in zip(ultimos["id"], ultimos["dt"], ultimos["codigo"])
+    }
+
+
+def mesclar_watermarks(indice, novos):
+    """Atualiza `indice` com `novos`, mantendo por ordem o evento mais recente (empate: o já indexado)."""
+    for oid, (data, codigo) in novos.items():
+        atual = indice.get(oid)
+        if atual is None or datetime.fromisoformat(data) > datetime.fromisoformat(atual[0]):
+            indice[oid] = [data, codigo]
+    return indice
+
+
+def ler_watermarks(path, acumulado_sha256=None):
+    """
+    Lê o índice de watermarks.
+
+    Args:
+        path (str): Arquivo do índice.
+        acumulado_sha256 (str, optional): Impressão digital do acumulado SLA atual; o índice
+            só é devolvido se tiver sido gravado para esse mesmo conteúdo.
+
+    Returns:
+        dict | None: {id_da_ordem: [data_iso, código]} ou None se ausente, ilegível ou desatualizado.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            registro = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(registro, dict) or registro.get("versao") != VERSAO_INDICE:
+        return None
+    if acumulado_sha256 is None or registro.get("acumulado_sha256") != acumulado_sha256:
+        return None
+    return registro.get("ordens") or {}
+
+
+def gravar_watermarks(path, indice, acumulado_sha256):
+    """Grava o índice de forma atômica (arquivo temporário + `os.replace`)."""
+    registro = {
+        "versao": VERSAO_INDICE,
+        "acumulado_sha256": acumulado_sha256,
+        "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+        "ordens": indice,
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        logging.warning(f"⚠️ Não foi possível gravar o índice de watermarks '{path}': {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def reconstruir_watermarks(path, acumulado_path):
+    """Recalcula o índice a partir do acumulado SLA inteiro (só quando ausente ou desatualizado)."""
+    df = ler_acumulado(acumulado_path, dtype={"ID da Ordem": str},
+                       columns=["ID da Ordem", "Data do Evento", "Código do Status"])
+    indice = calcular_watermarks(df)
+    gravar_watermarks(path, indice, impressao_do_acumulado(acumulado_path, dtype=DTYPES_SLA))
+    logging.info(f"🔖 Índice de watermarks reconstruído: {len(indice)} ordens ({os.path.basename(path)})")
+    return indice
+
+
+def carregar_cutoffs(path, acumulado_path, order_ids):
+    """
+    Watermark (data do último evento processado) das ordens pedidas, para o `cutoff_by_order`.
+
+    Usa o índice persistido quando ele corresponde ao acumulado atual; senão o reconstrói.
+
+    Returns:
+        dict: {id_da_ordem: datetime (naive)}
+    """
+    if not os.path.exists(acumulado_path):
+        return {}
+    indice = ler_watermarks(path, ler_impressao_digital(acumulado_path))
+    if indice is None:
+        indice = reconstruir_watermarks(path, acumulado_path)
+
+    cutoffs = {}
+    for oid in order_ids:
+        oid = str(oid).strip()
+        registro = indice.get(oid)
+        if registro is not None:
+            cutoffs[oid] = datetime.fromisoformat(registro[0])
+    return cutoffs
@@ -0,0 +1,285 @@
+# snapshot_store.py
+
+import os
+import re
+import gzip
+import json
+import glob
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele usamos gzip
+    zstandard = None
+
+_PADRAO_DATADO = re.compile(r"^(?P<dataset>.+)_(?P<rotulo>\d{4}-\d{2}-\d{2}_\d{2}-\d{2})(?P<ext>\.[^.]+)$")
+
+
+class SnapshotStore:
+    """
+    Armazena as cópias datadas dos acumulados por conteúdo (SHA-256).
+
+    Conteúdos idênticos são guardados uma única vez (comprimidos) e cada cópia
+    datada vira apenas uma referência no índice do dataset. Uma política de
+    retenção remove referências antigas e objetos que ficaram sem uso.
+    """
+
+    def __init__(self, raiz="snapshots", compressao=None, reter_ultimos=30, reter_dias=None):
+        """
+        Args:
+            raiz (str): Pasta do repositório de snapshots.
+            compressao (str, optional): "zstd", "gzip" ou "nenhuma". Padrão: zstd se disponível, senão gzip.
+            reter_ultimos (int, optional): Quantidade de snapshots mantidos por dataset (None = sem limite).
+            reter_dias (int, optional): Idade máxima, em dias, dos snapshots mantidos (None = sem limite).
+        """
+        if compressao is None:
+            compressao = "zstd" if zstandard is not None else "gzip"
+        if compressao == "zstd" and zstandard is None:
+            logging.warning("⚠️ 'zstandard' não instalado; usando gzip nos snapshots.")
+            compressao = "gzip"
+        if compressao not in ("zstd", "gzip", "nenhuma"):
+            raise ValueError(f"Compressão de snapshot desconhecida: {compressao}")
+
+        self.raiz = raiz
+        self.compressao = compressao
+        self.reter_ultimos = reter_ultimos
+        self.reter_dias = reter_dias
+        self._lock = threading.Lock()
+
+    # ----------------------------
+    # Objetos (conteúdo)
+    # ----------------------------
+    def _sufixo(self, compressao):
+        return {"zstd": ".zst", "gzip": ".gz", "nenhuma": ""}[compressao]
+
+    def _caminho_objeto(self, sha256, ext, compressao):
+        return os.path.join(self.raiz, "objects", sha256[:2], f"{sha256}{ext}{self._sufixo(compressao)}")
+
+    def _comprimir(self, dados, compressao):
+        if compressao == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(dados)
+        if compressao == "gzip":
+            return gzip.compress(dados, compresslevel=6)
+        return dados
+
+    @staticmethod
+    def _descomprimir(dados, caminho):
+        if caminho.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError("Snapshot comprimido com zstd; instale 'zstandard' para restaurar.")
+            return zstandard.ZstdDecompressor().decompress(dados)
+        if caminho.endswith(".gz"):
+            return gzip.decompress(dados)
+        return dados
+
+    def _gravar_objeto(self, dados, ext):
+        sha256 = hashlib.sha256(dados).hexdigest()
+        # Parquet já é comprimido internamente
+        compressao = "nenhuma" if ext == ".parquet" else self.compressao
+        caminho = self._caminho_objeto(sha256, ext, compressao)
+        try:
+            # objeto já existe: renova o mtime para a coleta de lixo (que só apaga objetos
+            # antigos) não removê-lo antes de o índice voltar a referenciá-lo
+            os.utime(caminho)
+            return sha256, caminho, False
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp = f"{caminho}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._comprimir(dados, compressao))
+        os.replace(tmp, caminho)
+        return sha256, caminho, True
+
+    # ----------------------------
+    # Índice por dataset
+    # ----------------------------
+    def _caminho_indice(self, dataset):
+        return os.path.join(self.raiz, "index", f"{dataset}.json")
+
+    def _ler_indice(self, dataset):
+        caminho = self._caminho_indice(dataset)
+        if not os.path.exists(caminho):
+            return []
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _gravar_indice(self, dataset, entradas):
+        caminho = self._caminho_indice(dataset)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp = f"{caminho}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entradas, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, caminho)
+
+    # ----------------------------
+    # API pública
+    # ----------------------------
+    def registrar(self, dataset, arquivo, rotulo=None):
+        """
+        Registra o conteúdo de `arquivo` como snapshot datado do dataset.
+
+        Args:
+            dataset (str): Nome do dataset (ex.: "acumulado_config_726").
+            arquivo (str): Arquivo cujo conteúdo será guardado.
+            rotulo (str, optional): Rótulo da cópia (padrão: "%Y-%m-%d_%H-%M" atual).
+
+        Returns:
+            str: hash SHA-256 do conteúdo.
+        """
+        rotulo = rotulo or datetime.now().strftime("%Y-%m-%d_%H-%M")
+        ext = os.path.splitext(arquivo)[1]
+        with open(arquivo, "rb") as f:
+            dados = f.read()
+
+        with self._lock:
+            sha256, caminho, novo = self._gravar_objeto(dados, ext)
+            entradas = [e for e in self._ler_indice(dataset) if e["rotulo"] != rotulo]
+            entradas.append({
+                "rotulo": rotulo,
+                "sha256": sha256,
+                "objeto": os.path.relpath(caminho, self.raiz),
+                "ext": ext,
+                "bytes": len(dados),
+                "criado_em": datetime.now().isoformat(timespec="seconds"),
+            })
+            entradas.sort(key=lambda e: e["rotulo"])
+            retidas = self._aplicar_retencao(dataset, entradas)
+            self._gravar_indice(dataset, retidas)
+        if len(retidas) < len(entradas):
+            self.coletar_lixo()
+
+        estado = "novo conteúdo" if novo else "referência a conteúdo existente"
+        logging.info(f"🗂️ Snapshot {dataset}@{rotulo}: {estado} ({sha256[:12]})")
+        return sha256
+
+    def listar(self, dataset):
+        """Entradas do índice do dataset, da mais antiga para a mais recente."""
+        return self._ler_indice(dataset)
+
+    def restaurar(self, dataset, rotulo, destino=None):
+        """
+        Materializa um snapshot em disco.
+
+        Returns:
+            str: caminho do arquivo restaurado.
+        """
+        entrada = next((e for e in self._ler_indice(dataset) if e["rotulo"] == rotulo), None)
+        if entrada is None:
+            raise KeyError(f"Snapshot {dataset}@{rotulo} não encontrado.")
+        caminho = os.path.join(self.raiz, entrada["objeto"])
+        with open(caminho, "rb") as f:
+            dados = self._descomprimir(f.read(), caminho)
+        destino = destino or f"{dataset}_{rotulo}{entrada['ext']}"
+        with open(destino, "wb") as f:
+            f.write(dados)
+        return destino
+
+    def _aplicar_retencao(self, dataset, entradas):
+        manter = entradas
+        if self.reter_dias is not None:
+            limite = (datetime.now() - timedelta(days=self.reter_dias)).strftime("%Y-%m-%d_%H-%M")
+            manter = [e for e in manter if e["rotulo"] >= limite]
+        if self.reter_ultimos is not None:
+            manter = manter[-self.reter_ultimos:] if self.reter_ultimos > 0 else []
+        removidas = len(entradas) - len(manter)
+        if removidas:
+            logging.info(f"🧹 Retenção: {removidas} snapshot(s) antigos removidos de {dataset}")
+        return manter
+
+    def coletar_lixo(self, idade_minima_s=3600):
+        """
+        Remove objetos que não são mais referenciados por nenhum índice.
+        Objetos mais novos que `idade_minima_s` são preservados (podem estar
+        sendo registrados por outro processo).
+        """
+        referenciados = set()
+        for caminho_indice in glob.glob(os.path.join(self.raiz, "index", "*.json")):
+            with open(caminho_indice, "r", encoding="utf-8") as f:
+                referenciados.update(e["objeto"] for e in json.load(f))
+
+        removidos = 0
+        with self._lock:
+            for caminho in glob.glob(os.path.join(self.raiz, "objects", "*", "*")):
+                if caminho.endswith(".tmp"):
+                    continue
+                if os.path.relpath(caminho, self.raiz) in referenciados:
+                    continue
+                if time.time() - os.path.getmtime(caminho) >= idade_minima_s:
+                    os.remove(caminho)
+                    removidos += 1
+        if removidos:
+            logging.info(f"🧹 {removidos} objeto(s) sem referência removidos de {self.raiz}")
+        return removidos
+
+    def importar_copias_datadas(self, diretorio=".", remover_originais=False):
+        """
+        Importa cópias datadas existentes (`acumulado_*_YYYY-MM-DD_HH-MM.ext`) para o repositório.
+
+        Args:
+            diretorio (str): Pasta com as cópias.
+            remover_originais (bool): Apaga cada arquivo após importá-lo.
+
+        Returns:
+            int: quantidade de arquivos importados.
+        """
+        importados = 0
+        for caminho in sorted(glob.glob(os.path.join(diretorio, "acumulado_*_????-??-??_??-??.*"))):
+            m = _PADRAO_DATADO.match(os.path.basename(caminho))
+            if not m:
+                continue
+            self.registrar(m.group("dataset"), caminho, rotulo=m.group("rotulo"))
+            importados += 1
+            if remover_originais:
+                os.remove(caminho)
+        return importados
+
+
+def substituir_por_link(origem, destino):
+    """
+    Faz `destino` ter o mesmo conteúdo de `origem` sem reescrever os dados
+    (hard link; cópia se o sistema de arquivos não suportar).
+    """
+    if os.path.exists(destino) and os.path.samefile(origem, destino):
+        return  # já é o mesmo arquivo (link de uma execução anterior)
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    try:
+        os.link(origem, tmp)
+    except OSError:
+        shutil.copyfile(origem, tmp)
+    os.replace(tmp, destino)
+
+
+_store_lock = threading.Lock()
+_store_padrao = None
+
+
+def get_snapshot_store():
+    """Retorna o repositório de snapshots do processo, criando-o na primeira chamada."""
+    global _store_padrao
+    with _store_lock:
+        if _store_padrao is None:
+            _store_padrao = SnapshotStore()
+        return _store_padrao
+
+
+def configurar_snapshot_store(**kwargs):
+    """Recria o repositório de snapshots do processo com outros parâmetros (ex.: retenção)."""
+    global _store_padrao
+    with _store_lock:
+        _store_padrao = SnapshotStore(**kwargs)
+        return _store_padrao
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    remover = "--remover-originais" in sys.argv
+    total = get_snapshot_store().importar_copias_datadas(".", remover_originais=remover)
+    print(f"✅ {total} cópias datadas importadas para o repositório de snapshots.")
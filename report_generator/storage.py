@@ -0,0 +1,240 @@
+# storage.py
+
+import os
+import glob
+import json
+import hashlib
+import logging
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # backend Parquet é opcional
+    pa = None
+    pq = None
+
+FORMATOS = ("csv", "parquet")
+
+# CRLF como no Windows: o csv só coloca aspas em campos que contêm caracteres do
+# terminador, e textos com '\r' solto quebrariam a linha na releitura.
+TERMINADOR_CSV = "\r\n"
+EXTENSOES = {"csv": ".csv", "parquet": ".parquet"}
+
+# colunas-chave do SLA lidas sempre como texto (mesmo critério do accumulator)
+DTYPES_SLA = {
+    "ID da Ordem": "string",
+    "Etapa": "string",
+    "Código do Status": "string",
+    "Data do Evento": "string",
+}
+
+
+def formato_do_caminho(path):
+    """Retorna 'parquet' ou 'csv' de acordo com a extensão do arquivo."""
+    return "parquet" if str(path).lower().endswith(".parquet") else "csv"
+
+
+def trocar_formato(path, formato):
+    """Troca a extensão de `path` para a do `formato` informado."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de armazenamento desconhecido: {formato}. Use um de {FORMATOS}.")
+    base, _ = os.path.splitext(path)
+    return f"{base}{EXTENSOES[formato]}"
+
+
+def _exigir_pyarrow():
+    if pq is None:
+        raise ImportError("O backend Parquet requer 'pyarrow' (pip install pyarrow).")
+
+
+def ler_acumulado(path, dtype=None, columns=None):
+    """
+    Lê um dataset acumulado (CSV ou Parquet, pela extensão).
+
+    Args:
+        path (str): Caminho do arquivo.
+        dtype (dict, optional): Tipos por coluna (aplicados às colunas existentes).
+        columns (list, optional): Projeção de colunas; colunas ausentes são ignoradas.
+
+    Returns:
+        pd.DataFrame: vazio se o arquivo não existir ou não puder ser lido.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame()
+
+    try:
+        if formato_do_caminho(path) == "parquet":
+            _exigir_pyarrow()
+            if columns is not None:
+                existentes = set(pq.read_schema(path).names)
+                columns = [c for c in columns if c in existentes]
+            df = pq.read_table(path, columns=columns).to_pandas()
+            if dtype:
+                df = df.astype({c: t for c, t in dtype.items() if c in df.columns})
+            return df
+
+        usecols = (lambda c: c in columns) if columns is not None else None
+        return pd.read_csv(path, dtype=dtype, usecols=usecols)
+    except Exception as e:
+        logging.warning(f"⚠️ Erro ao ler acumulado '{path}': {e}")
+        return pd.DataFrame()
+
+
+def _normalizar_para_parquet(df):
+    """Colunas object com tipos misturados viram texto (None preservado) para ter um schema estável."""
+    df = df.copy()
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) or (isinstance(v, float) and pd.isna(v)) else str(v))
+        df[col] = df[col].astype("string")
+    return df
+
+
+def salvar_acumulado(df, path):
+    """Salva um dataset acumulado no formato indicado pela extensão de `path`."""
+    if formato_do_caminho(path) == "parquet":
+        _exigir_pyarrow()
+        tabela = pa.Table.from_pandas(_normalizar_para_parquet(df), preserve_index=False)
+        pq.write_table(tabela, path, compression="zstd")
+    else:
+        df.to_csv(path, index=False, lineterminator=TERMINADOR_CSV)
+
+
+def impressao_digital(df):
+    """
+    SHA-256 do conteúdo de um DataFrame (nomes das colunas + valores como texto),
+    independente do formato em que o acumulado é gravado.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode("utf-8"))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df.astype("string"), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _caminho_impressao(path):
+    return f"{path}.fingerprint.json"
+
+
+def gravar_impressao_digital(path, sha256):
+    """Grava ao lado do acumulado a impressão digital do conteúdo (com tamanho/mtime do arquivo)."""
+    try:
+        st = os.stat(path)
+        with open(_caminho_impressao(path), "w", encoding="utf-8") as f:
+            json.dump({"sha256": sha256, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns}, f)
+    except Exception as e:
+        logging.warning(f"⚠️ Não foi possível gravar a impressão digital de '{path}': {e}")
+
+
+def ler_impressao_digital(path):
+    """Impressão digital gravada para `path` (None se ausente ou se o arquivo mudou desde então)."""
+    try:
+        with open(_caminho_impressao(path), "r", encoding="utf-8") as f:
+            registro = json.load(f)
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if registro.get("bytes") != st.st_size or registro.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return registro.get("sha256")
+
+
+def impressao_do_acumulado(path, dtype=None):
+    """
+    Impressão digital do acumulado em disco: lida do arquivo lateral quando válido;
+    senão calculada a partir do conteúdo (e gravada). None se o acumulado não existir.
+    """
+    if not os.path.exists(path):
+        return None
+    sha256 = ler_impressao_digital(path)
+    if sha256 is None:
+        sha256 = impressao_digital(ler_acumulado(path, dtype=dtype))
+        gravar_impressao_digital(path, sha256)
+    return sha256
+
+
+def _caminho_esquema(path):
+    return f"{path}.schema.json"
+
+
+def ler_esquema(path):
+    """Registro de esquema gravado ao lado do acumulado ({} se ausente ou ilegível)."""
+    try:
+        with open(_caminho_esquema(path), "r", encoding="utf-8") as f:
+            registro = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return registro if isinstance(registro, dict) else {}
+
+
+def ler_versao_esquema(path):
+    """Versão do esquema do acumulado (None se nunca foi registrada, ou seja, arquivo legado)."""
+    return ler_esquema(path).get("versao")
+
+
+def gravar_versao_esquema(path, versao, migracao=None):
+    """
+    Registra a versão do esquema do acumulado em `{path}.schema.json`.
+    `migracao` (dict), quando informado, é anexado ao histórico de migrações.
+    """
+    registro = ler_esquema(path)
+    if registro.get("versao") == versao and migracao is None:
+        return
+    registro["versao"] = versao
+    if migracao is not None:
+        registro.setdefault("migracoes", []).append(migracao)
+    try:
+        tmp = f"{_caminho_esquema(path)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, _caminho_esquema(path))
+    except Exception as e:
+        logging.warning(f"⚠️ Não foi possível gravar a versão do esquema de '{path}': {e}")
+
+
+def converter_csv_para_parquet(csv_path, parquet_path=None, dtype=None):
+    """
+    Converte um acumulado CSV existente para Parquet (conversão única).
+
+    Returns:
+        str | None: caminho do Parquet gerado (None se o CSV estiver vazio/ilegível).
+    """
+    _exigir_pyarrow()
+    parquet_path = parquet_path or trocar_formato(csv_path, "parquet")
+    df = ler_acumulado(csv_path, dtype=dtype)
+    if df.empty:
+        logging.warning(f"⚠️ Nada para converter em '{csv_path}'.")
+        return None
+    salvar_acumulado(df, parquet_path)
+    gravar_impressao_digital(parquet_path, impressao_digital(df))
+    versao = ler_versao_esquema(csv_path)
+    if versao is not None:
+        gravar_versao_esquema(parquet_path, versao)
+    logging.info(f"🧱 {os.path.basename(csv_path)} → {os.path.basename(parquet_path)} ({len(df)} linhas)")
+    return parquet_path
+
+
+def garantir_parquet(parquet_path, dtype=None):
+    """Na primeira execução com backend Parquet, converte o CSV equivalente se o Parquet ainda não existir."""
+    csv_path = trocar_formato(parquet_path, "csv")
+    if formato_do_caminho(parquet_path) == "parquet" and not os.path.exists(parquet_path) and os.path.exists(csv_path):
+        logging.info(f"🧱 Migrando {os.path.basename(csv_path)} para Parquet.")
+        converter_csv_para_parquet(csv_path, parquet_path, dtype=dtype)
+
+
+def converter_acumulados(diretorio="."):
+    """Converte todos os `acumulado_*_latest.csv` do diretório para Parquet."""
+    convertidos = []
+    for csv_path in sorted(glob.glob(os.path.join(diretorio, "acumulado_*_latest.csv"))):
+        nome = os.path.basename(csv_path)
+        dtype = DTYPES_SLA if nome.startswith("acumulado_sla_") else None
+        parquet_path = converter_csv_para_parquet(csv_path, dtype=dtype)
+        if parquet_path:
+            convertidos.append(parquet_path)
+    return convertidos
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    convertidos = converter_acumulados()
+    print(f"✅ {len(convertidos)} acumulados convertidos para Parquet.")
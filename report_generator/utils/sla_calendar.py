@@ -0,0 +1,552 @@
+"""
+Calendário útil compilado para os cálculos de SLA.
+
+Cada entrada de `parse_sla_config` (dias ativos, turnos e feriados) é
+compilada uma única vez em um `CalendarioSLA`. Os turnos de cada dia são
+localizados uma vez só e o calendário mantém somas acumuladas por dia, de
+modo que:
+
+  - o tempo útil entre dois instantes é uma consulta O(1) nas somas acumuladas
+    (mais o recorte do primeiro e do último dia);
+  - o prazo (deadline) é a inversa por busca binária nas somas acumuladas de minutos.
+
+Os resultados são idênticos aos de `calculate_working_time`,
+`calculate_sla_deadline` e `calcular_dias_uteis` (ver `tests/test_sla_calendar.py`).
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta, time
+import numpy as np
+import pytz
+
+from .sla_utils import calculate_working_time, calculate_sla_deadline, calcular_dias_uteis
+
+TZ = pytz.timezone("America/Sao_Paulo")
+
+# instantes dos cálculos em lote: microssegundos desde a época (UTC), int64
+EPOCA = datetime(1970, 1, 1, tzinfo=pytz.utc)
+_US = timedelta(microseconds=1)
+_DIA_US = 86400 * 10**6
+_MINUTO_US = 60 * 10**6
+_ORDINAL_EPOCA = EPOCA.date().toordinal()
+
+# margem de dias compilados além do necessário na primeira compilação; as expansões
+# seguintes acrescentam ao menos o tamanho da faixa já compilada (crescimento geométrico)
+_MARGEM_DIAS = 31
+
+
+def _expandir_faixa(primeiro, ultimo, faixa):
+    """Faixa de dias a compilar para cobrir [primeiro, ultimo], dada a faixa já compilada (ou None)."""
+    if faixa is None:
+        return primeiro - _MARGEM_DIAS, ultimo + _MARGEM_DIAS
+    folga = max(_MARGEM_DIAS, faixa[1] - faixa[0] + 1)
+    inicio = primeiro - folga if primeiro < faixa[0] else faixa[0]
+    fim = ultimo + folga if ultimo > faixa[1] else faixa[1]
+    return inicio, fim
+
+
+def _minutos_sla(sla_time):
+    """Converte "HH:MM" em minutos (mesma regra de `calculate_sla_deadline`)."""
+    hours, minutes = map(int, sla_time.split(":"))
+    return hours * 60 + minutes
+
+
+def para_us(dt):
+    """Instante (datetime com fuso) em microssegundos desde a época."""
+    return (dt - EPOCA) // _US
+
+
+def deslocamento_us(dt):
+    """Deslocamento UTC do datetime, em microssegundos (soma-se ao instante para obter a hora local)."""
+    return dt.utcoffset() // _US
+
+
+def _soma_float_ambigua(total_us, inicio_us, fim_us, parcelas):
+    """
+    O cálculo original soma segundos em float e trunca com int(). O total exato (em µs)
+    só pode truncar diferente se estiver a poucos µs de um segundo inteiro e houver
+    parcelas fracionárias (início ou fim fora do segundo cheio).
+    """
+    if inicio_us % 10**6 == 0 and fim_us % 10**6 == 0:
+        return False
+    fracao = total_us % 10**6
+    tolerancia = parcelas * total_us / 2**51 + 1
+    return fracao <= tolerancia or 10**6 - fracao <= tolerancia
+
+
+def _eh_tz_padrao(dt):
+    return getattr(dt.tzinfo, "zone", None) == TZ.zone
+
+
+class _Dia:
+    """Turnos de um dia já localizados e seus totais (entrando no dia à meia-noite)."""
+
+    __slots__ = ("data", "meia_noite", "meia_noite_us", "turnos", "turnos_us", "turnos_naive", "util_us",
+                 "minutos", "minutos_naive")
+
+    def __init__(self, data, turnos_do_dia):
+        self.data = data
+        self.meia_noite = TZ.localize(datetime.combine(data, time.min))
+        self.turnos = [
+            (TZ.localize(datetime.combine(data, ini)), TZ.localize(datetime.combine(data, fim)))
+            for ini, fim in turnos_do_dia
+        ]
+        self.meia_noite_us = para_us(self.meia_noite)
+        self.turnos_us = [(para_us(ini), para_us(fim)) for ini, fim in self.turnos]
+        self.turnos_naive = [
+            (datetime.combine(data, ini), datetime.combine(data, fim))
+            for ini, fim in turnos_do_dia
+        ]
+
+        # tempo útil do dia inteiro, em µs (calculate_working_time com current = meia-noite)
+        self.util_us = sum(
+            max(0, shift_end - max(self.meia_noite_us, shift_start)) for shift_start, shift_end in self.turnos_us
+        )
+
+        # minutos consumíveis por turno (calculate_sla_deadline com current = meia-noite)
+        self.minutos = []
+        for shift_start, shift_end in self.turnos:
+            if self.meia_noite > shift_end:
+                continue
+            effective_start = max(self.meia_noite, shift_start)
+            self.minutos.append((effective_start, int((shift_end - effective_start).total_seconds() / 60)))
+
+        # minutos úteis do dia inteiro sem fuso (calcular_dias_uteis com current = meia-noite)
+        meia_noite_naive = datetime.combine(data, time.min)
+        minutos_naive = 0
+        for shift_start, shift_end in self.turnos_naive:
+            effective_start = max(meia_noite_naive, shift_start)
+            if shift_end > effective_start:
+                minutos_naive += int((shift_end - effective_start).total_seconds() / 60)
+        self.minutos_naive = minutos_naive
+
+
+class CalendarioSLA:
+    """
+    Calendário útil compilado a partir de uma entrada de `parse_sla_config`.
+
+    Use `compilar_calendario` para obter instâncias compartilhadas: calendários
+    idênticos (mesmos turnos e feriados) de status diferentes são o mesmo objeto.
+    """
+
+    def __init__(self, sla_info):
+        self.sla_info = sla_info
+        self.holidays = frozenset(sla_info.get("holidays", set()))
+        self._lock = threading.RLock()
+        self._invalido = False
+        self._prazo_legado = False
+        self._turnos_semana = {}
+
+        try:
+            for weekday, shifts in sla_info.get("active_days", {}).items():
+                turnos = [(time.fromisoformat(s["start"]), time.fromisoformat(s["end"])) for s in shifts]
+                if turnos:
+                    self._turnos_semana[int(weekday)] = turnos
+                    # turno que "vira o dia" gera minutos negativos no cálculo original
+                    if any(fim < ini for ini, fim in turnos):
+                        self._prazo_legado = True
+        except Exception as e:
+            logging.warning(f"⚠️ Turnos de SLA inválidos; usando o cálculo dia a dia: {e}")
+            self._invalido = True
+
+        self._sem_minutos = not any(
+            fim > ini for turnos in self._turnos_semana.values() for ini, fim in turnos
+        )
+        self._max_turnos = max((len(t) for t in self._turnos_semana.values()), default=1)
+
+        self._dias = {}
+        self._inicio = None    # ordinal do primeiro dia compilado
+        self._util_acum = []   # _util_acum[i] = soma de util_us dos dias [_inicio, _inicio + i)
+        self._min_acum = []    # idem para a soma dos minutos consumíveis
+        self._naive_acum = []  # idem para minutos_naive
+
+        # intervalos dos turnos para os cálculos em lote (ver `_garantir_intervalos`)
+        self._sobreposto = False
+        self._int_faixa = None  # (primeiro, ultimo) ordinal compilado
+        self._int_inicio = self._int_fim = self._int_desloc = self._int_meia_noite = None
+        self._int_acum_us = self._int_acum_min = None
+
+    # ----------------------------
+    # Compilação dos dias
+    # ----------------------------
+    def _dia(self, ordinal):
+        dia = self._dias.get(ordinal)
+        if dia is None:
+            data = datetime.fromordinal(ordinal).date()
+            turnos = self._turnos_semana.get(data.weekday(), [])
+            if data.strftime("%Y-%m-%d") in self.holidays:
+                turnos = []
+            dia = _Dia(data, turnos)
+            self._dias[ordinal] = dia
+        return dia
+
+    def _garantir(self, primeiro, ultimo):
+        """Garante que os dias [primeiro, ultimo] estão compilados nas somas acumuladas."""
+        if self._inicio is not None and self._inicio <= primeiro and ultimo < self._inicio + len(self._util_acum) - 1:
+            return
+        with self._lock:
+            faixa = None if self._inicio is None else (self._inicio, self._inicio + len(self._util_acum) - 2)
+            inicio, fim = _expandir_faixa(primeiro, ultimo, faixa)
+
+            util_acum, min_acum, naive_acum = [0], [0], [0]
+            for ordinal in range(inicio, fim + 1):
+                dia = self._dia(ordinal)
+                util_acum.append(util_acum[-1] + dia.util_us)
+                min_acum.append(min_acum[-1] + sum(m for _, m in dia.minutos))
+                naive_acum.append(naive_acum[-1] + dia.minutos_naive)
+                if any(m < 0 for _, m in dia.minutos):
+                    self._prazo_legado = True
+
+            self._util_acum, self._min_acum, self._naive_acum = util_acum, min_acum, naive_acum
+            self._inicio = inicio
+
+    def _soma(self, acumulado, primeiro, ultimo):
+        """Soma de um acumulado sobre os dias [primeiro, ultimo] (vazio se ultimo < primeiro)."""
+        if ultimo < primeiro:
+            return 0
+        return acumulado[ultimo - self._inicio + 1] - acumulado[primeiro - self._inicio]
+
+    def _ultimo_dia_visitado(self, primeiro, fim_us):
+        """Último dia (ordinal) cuja meia-noite é < fim — o laço original para aí."""
+        ordinal = max(primeiro, _ORDINAL_EPOCA + int(fim_us) // _DIA_US)
+        while ordinal > primeiro and self._dia(ordinal).meia_noite_us >= fim_us:
+            ordinal -= 1
+        while self._dia(ordinal + 1).meia_noite_us < fim_us:
+            ordinal += 1
+        return ordinal
+
+    def _ultimo_dia_visitado_naive(self, primeiro, end):
+        ordinal = max(primeiro, end.date().toordinal())
+        while ordinal > primeiro and datetime.combine(self._dia(ordinal).data, time.min) >= end:
+            ordinal -= 1
+        while datetime.combine(self._dia(ordinal + 1).data, time.min) < end:
+            ordinal += 1
+        return ordinal
+
+    # ----------------------------
+    # Tempo útil
+    # ----------------------------
+    def tempo_util(self, start, end):
+        """Tempo útil em segundos entre dois instantes (= `calculate_working_time`)."""
+        if start >= end:
+            return 0
+        if self._invalido:
+            return calculate_working_time(start, end, self.sla_info)
+
+        if start.tzinfo is None:
+            start = TZ.localize(start)
+        if end.tzinfo is None:
+            end = TZ.localize(end)
+        if not _eh_tz_padrao(start):
+            # o laço original usa o dia "de parede" do fuso de `start`
+            return calculate_working_time(start, end, self.sla_info)
+
+        return self._tempo_util_us(para_us(start), para_us(end), start.date().toordinal())
+
+    def _tempo_util_us(self, inicio_us, fim_us, primeiro):
+        """Tempo útil (s) entre instantes em µs, começando o laço de dias em `primeiro`."""
+        if inicio_us >= fim_us:
+            return 0
+        ultimo = self._ultimo_dia_visitado(primeiro, fim_us)
+        self._garantir(primeiro, ultimo)
+
+        total = self._recorte_util(self._dia(primeiro), inicio_us, fim_us)
+        if ultimo > primeiro:
+            total += self._soma(self._util_acum, primeiro + 1, ultimo - 1)
+            dia = self._dia(ultimo)
+            total += self._recorte_util(dia, dia.meia_noite_us, fim_us)
+        if _soma_float_ambigua(total, inicio_us, fim_us, (ultimo - primeiro + 1) * self._max_turnos):
+            return self._tempo_util_sequencial(inicio_us, fim_us, primeiro, ultimo)
+        return total // 10**6
+
+    @staticmethod
+    def _recorte_util(dia, current_us, fim_us):
+        total = 0
+        for shift_start, shift_end in dia.turnos_us:
+            effective = min(fim_us, shift_end) - max(current_us, shift_start)
+            if effective > 0:
+                total += effective
+        return total
+
+    def _tempo_util_sequencial(self, inicio_us, fim_us, primeiro, ultimo):
+        """Reproduz a soma em float, turno a turno, de `calculate_working_time` (casos de arredondamento)."""
+        total_seconds = 0
+        for ordinal in range(primeiro, ultimo + 1):
+            dia = self._dia(ordinal)
+            current_us = inicio_us if ordinal == primeiro else dia.meia_noite_us
+            for shift_start, shift_end in dia.turnos_us:
+                effective = min(fim_us, shift_end) - max(current_us, shift_start)
+                if effective > 0:
+                    total_seconds += effective / 10**6
+        return int(total_seconds)
+
+    # ----------------------------
+    # Prazo (deadline)
+    # ----------------------------
+    def prazo(self, start_time, minutos):
+        """
+        Prazo a partir de `start_time` consumindo `minutos` úteis (= `calculate_sla_deadline`).
+
+        Raises:
+            ValueError: se o calendário não tiver nenhum minuto útil (o cálculo
+                original não terminaria nesse caso).
+        """
+        if self._invalido or self._prazo_legado:
+            return calculate_sla_deadline(start_time, self._sla_info_com_minutos(minutos))
+
+        if start_time.tzinfo is None:
+            start_time = TZ.localize(start_time)
+        else:
+            start_time = start_time.astimezone(TZ)
+
+        remaining_minutes = minutos
+        if remaining_minutes <= 0:
+            return start_time
+        if self._sem_minutos:
+            raise ValueError("Calendário de SLA sem nenhum turno útil; prazo indefinido.")
+
+        # 1) primeiro dia, a partir do próprio start_time
+        primeiro = start_time.date().toordinal()
+        self._garantir(primeiro, primeiro + 1)
+        for shift_start, shift_end in self._dia(primeiro).turnos:
+            if start_time > shift_end:
+                continue
+            effective_start = max(start_time, shift_start)
+            shift_minutes = int((shift_end - effective_start).total_seconds() / 60)
+            if remaining_minutes <= shift_minutes:
+                return effective_start + timedelta(minutes=remaining_minutes)
+            remaining_minutes -= shift_minutes
+        if self._prazo_legado:
+            return calculate_sla_deadline(start_time, self._sla_info_com_minutos(minutos))
+
+        # 2) dias seguintes: busca binária nas somas acumuladas de minutos
+        with self._lock:
+            alvo = self._min_acum[primeiro - self._inicio + 1] + remaining_minutes
+            while self._min_acum[-1] < alvo:
+                self._garantir(primeiro, self._inicio + len(self._min_acum) - 1)
+                alvo = self._min_acum[primeiro - self._inicio + 1] + remaining_minutes
+            if self._prazo_legado:
+                return calculate_sla_deadline(start_time, self._sla_info_com_minutos(minutos))
+            indice = bisect_left(self._min_acum, alvo)
+            ordinal = self._inicio + indice - 1
+            remaining_minutes = alvo - self._min_acum[indice - 1]
+
+        for effective_start, shift_minutes in self._dia(ordinal).minutos:
+            if remaining_minutes <= shift_minutes:
+                return effective_start + timedelta(minutes=remaining_minutes)
+            remaining_minutes -= shift_minutes
+        raise RuntimeError("Inconsistência no calendário de SLA compilado.")  # pragma: no cover
+
+    # ----------------------------
+    # Cálculos em lote (arrays de instantes)
+    # ----------------------------
+    def vetorizavel(self):
+        """
+        True se os turnos formam intervalos ordenados, sem sobreposição e contidos no
+        próprio dia — condição para o tempo útil ser a medida da interseção com os
+        turnos e o prazo ser a inversa das somas de minutos (cálculos em lote).
+        """
+        return not (self._invalido or self._prazo_legado or self._sem_minutos or self._sobreposto)
+
+    def preparar_lote(self, min_us, max_us):
+        """Compila os intervalos que cobrem [min_us, max_us]; retorna `vetorizavel()` para essa faixa."""
+        if self.vetorizavel():
+            self._garantir_intervalos(min_us, max_us)
+        return self.vetorizavel()
+
+    def _garantir_intervalos(self, min_us, max_us):
+        """Compila os turnos dos dias que cobrem [min_us, max_us] em arrays de intervalos."""
+        primeiro = _ORDINAL_EPOCA + int(min_us) // _DIA_US - 1
+        ultimo = _ORDINAL_EPOCA + int(max_us) // _DIA_US + 1
+        faixa = self._int_faixa
+        if faixa is not None and faixa[0] <= primeiro and ultimo <= faixa[1]:
+            return
+        with self._lock:
+            primeiro, ultimo = _expandir_faixa(primeiro, ultimo, self._int_faixa)
+
+            inicios, fins, deslocs, meias_noites = [], [], [], []
+            fim_anterior = None
+            for ordinal in range(primeiro, ultimo + 1):
+                dia = self._dia(ordinal)
+                meia_noite = dia.meia_noite_us
+                proxima = self._dia(ordinal + 1).meia_noite_us
+                meias_noites.append(meia_noite)
+                for (shift_start, _), (ini, fim) in zip(dia.turnos, dia.turnos_us):
+                    if fim < ini or ini < meia_noite or fim > proxima or (fim_anterior is not None and ini < fim_anterior):
+                        self._sobreposto = True
+                    inicios.append(ini)
+                    fins.append(fim)
+                    deslocs.append(deslocamento_us(shift_start))
+                    fim_anterior = fim
+
+            self._int_inicio = np.array(inicios, dtype=np.int64)
+            self._int_fim = np.array(fins, dtype=np.int64)
+            self._int_desloc = np.array(deslocs, dtype=np.int64)
+            meias_noites.append(self._dia(ultimo + 1).meia_noite_us)
+            self._int_meia_noite = np.array(meias_noites, dtype=np.int64)
+            duracao = np.maximum(self._int_fim - self._int_inicio, 0)
+            self._int_acum_us = np.concatenate(([0], np.cumsum(duracao))).astype(np.int64)
+            self._int_acum_min = np.concatenate(([0], np.cumsum(duracao // _MINUTO_US))).astype(np.int64)
+            self._int_faixa = (primeiro, ultimo)
+
+    def _medida_ate(self, t_us):
+        """Microssegundos úteis acumulados do início da faixa compilada até cada instante."""
+        i = np.searchsorted(self._int_inicio, t_us, side="right") - 1
+        valido = i >= 0
+        i = np.maximum(i, 0)
+        dentro = np.clip(t_us - self._int_inicio[i], 0, self._int_fim[i] - self._int_inicio[i])
+        return np.where(valido, self._int_acum_us[i] + dentro, 0)
+
+    def tempo_util_lote(self, inicio_us, fim_us, inicio_desloc_us):
+        """
+        Versão em lote de `tempo_util` para arrays de instantes (microssegundos).
+        Requer `vetorizavel()`.
+
+        O dia inicial de cada par é a data local de `inicio` com o seu deslocamento
+        (como `start.date()` no cálculo original); depois dele, conta a medida dos
+        turnos até `fim`.
+
+        Returns:
+            np.ndarray: segundos úteis (int64) de cada par; 0 onde inicio >= fim.
+        """
+        inicio_us = np.asarray(inicio_us, dtype=np.int64)
+        fim_us = np.asarray(fim_us, dtype=np.int64)
+        if len(inicio_us) == 0:
+            return np.zeros(0, dtype=np.int64)
+        primeiro = _ORDINAL_EPOCA + (inicio_us + np.asarray(inicio_desloc_us, dtype=np.int64)) // _DIA_US
+        self._garantir_intervalos(min(inicio_us.min(), fim_us.min()), max(inicio_us.max(), fim_us.max()))
+
+        base = self._int_faixa[0]
+        meia_noite = self._int_meia_noite[primeiro - base]
+        proxima = self._int_meia_noite[primeiro - base + 1]
+        primeiro_dia = np.maximum(
+            self._medida_ate(np.minimum(fim_us, proxima)) - self._medida_ate(np.maximum(inicio_us, meia_noite)), 0)
+        dias_seguintes = np.maximum(self._medida_ate(fim_us) - self._medida_ate(proxima), 0)
+        total = np.where(fim_us > inicio_us, primeiro_dia + dias_seguintes, 0)
+        segundos = total // 10**6
+
+        # pares em que a soma em float do cálculo original pode truncar diferente
+        fracionario = (inicio_us % 10**6 != 0) | (fim_us % 10**6 != 0)
+        parcelas = ((fim_us - inicio_us) // _DIA_US + 2) * self._max_turnos
+        fracao = total % 10**6
+        tolerancia = parcelas * (total / 2**51) + 1
+        ambiguo = fracionario & (fim_us > inicio_us) & ((fracao <= tolerancia) | (10**6 - fracao <= tolerancia))
+        for i in np.flatnonzero(ambiguo):
+            segundos[i] = self._tempo_util_us(int(inicio_us[i]), int(fim_us[i]), int(primeiro[i]))
+        return segundos
+
+    def prazo_lote(self, inicio_us, inicio_desloc_us, minutos):
+        """
+        Versão em lote de `prazo`: busca binária nas somas acumuladas de minutos por turno.
+        Requer `vetorizavel()`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (instante do prazo, deslocamento UTC da hora local
+            do prazo), ambos em microssegundos — o deslocamento é o do início do turno em que
+            o prazo cai, como no cálculo original.
+        """
+        t = np.asarray(inicio_us, dtype=np.int64)
+        t_desloc = np.asarray(inicio_desloc_us, dtype=np.int64)
+        restante = np.asarray(minutos, dtype=np.int64)
+        if len(t) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        horizonte = int(restante.max()) * _MINUTO_US
+        while True:
+            self._garantir_intervalos(t.min(), t.max() + horizonte)
+            n = len(self._int_inicio)
+            j = np.searchsorted(self._int_fim, t, side="left")  # primeiro turno que termina em/após t
+            if (j < n).all():
+                jc = np.minimum(j, n - 1)
+                efetivo = np.maximum(t, self._int_inicio[jc])
+                efetivo_desloc = np.where(t >= self._int_inicio[jc], t_desloc, self._int_desloc[jc])
+                m0 = (self._int_fim[jc] - efetivo) // _MINUTO_US
+                alvo = self._int_acum_min[jc + 1] + (restante - m0)
+                idx = np.searchsorted(self._int_acum_min, alvo, side="left")
+                precisa = (restante > m0) & (idx > n)
+                if not precisa.any():
+                    break
+            horizonte = 2 * horizonte + _MARGEM_DIAS * _DIA_US
+
+        k = np.clip(idx - 1, 0, n - 1)
+        prazo = np.where(
+            restante <= 0, t,
+            np.where(restante <= m0, efetivo + restante * _MINUTO_US,
+                     self._int_inicio[k] + (alvo - self._int_acum_min[k]) * _MINUTO_US))
+        desloc = np.where(
+            restante <= 0, t_desloc,
+            np.where(restante <= m0, efetivo_desloc, self._int_desloc[k]))
+        return prazo, desloc
+
+    def _sla_info_com_minutos(self, minutos):
+        horas, mins = divmod(int(minutos), 60)
+        return {**self.sla_info, "sla_time": f"{horas:02d}:{mins:02d}"}
+
+    # ----------------------------
+    # Dias úteis (sem fuso)
+    # ----------------------------
+    def dias_uteis(self, start, end):
+        """Dias úteis entre duas datas sem fuso (= `calcular_dias_uteis`)."""
+        if self._invalido or start.tzinfo is not None or end.tzinfo is not None:
+            return calcular_dias_uteis(start, end, self.sla_info)
+        if start >= end:
+            return 0.0
+
+        primeiro = start.date().toordinal()
+        ultimo = self._ultimo_dia_visitado_naive(primeiro, end)
+        self._garantir(primeiro, ultimo)
+
+        total = self._recorte_naive(self._dia(primeiro), start, end)
+        if ultimo > primeiro:
+            total += self._soma(self._naive_acum, primeiro + 1, ultimo - 1)
+            total += self._recorte_naive(self._dia(ultimo), datetime.combine(self._dia(ultimo).data, time.min), end)
+        return round(total / 1440, 2)
+
+    @staticmethod
+    def _recorte_naive(dia, current, end):
+        total = 0
+        for shift_start, shift_end in dia.turnos_naive:
+            effective_start = max(current, shift_start)
+            effective_end = min(end, shift_end)
+            if effective_end > effective_start:
+                total += int((effective_end - effective_start).total_seconds() / 60)
+        return total
+
+
+# ============================
+# Compilação com deduplicação
+# ============================
+_cache_lock = threading.Lock()
+_cache_calendarios = {}
+
+
+def _chave_calendario(sla_info):
+    dias = tuple(sorted(
+        (str(weekday), tuple((str(s.get("start")), str(s.get("end"))) for s in shifts))
+        for weekday, shifts in sla_info.get("active_days", {}).items()
+    ))
+    return dias, frozenset(sla_info.get("holidays", set()))
+
+
+def compilar_calendario(sla_info):
+    """Retorna o `CalendarioSLA` da entrada, reaproveitando calendários idênticos já compilados."""
+    chave = _chave_calendario(sla_info)
+    with _cache_lock:
+        calendario = _cache_calendarios.get(chave)
+        if calendario is None:
+            calendario = CalendarioSLA(sla_info)
+            _cache_calendarios[chave] = calendario
+        return calendario
+
+
+def compilar_calendarios(sla_config):
+    """
+    Compila todos os status de um `parse_sla_config`.
+
+    Returns:
+        dict: {status_id: CalendarioSLA}; status com os mesmos turnos/feriados compartilham o objeto.
+    """
+    return {status_id: compilar_calendario(sla_info) for status_id, sla_info in (sla_config or {}).items()}
+
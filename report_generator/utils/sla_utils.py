@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta, time
 import logging
-import requests
 import pytz
 
 def parse_iso_datetime(dt_str):
@@ -0,0 +1,154 @@
+# workflow_repository.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+from .data_utils import get_with_retry as _get_with_retry
+from .label_fetcher import extrair_etiquetas
+from .utils.sla_utils import parse_sla_config
+from .zapform_api_client import get_config_name
+
+WORKFLOW_URL = "https://api.zapform.com.br/api/v2/workflow/{config_id}/"
+
+
+def _hash_conteudo(workflow_data):
+    conteudo = json.dumps(workflow_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class WorkflowRepository:
+    """
+    Fonte única do documento `/api/v2/workflow/{config_id}/`.
+
+    O documento é buscado no máximo uma vez por execução e persistido em disco
+    com TTL e hash de conteúdo; etiquetas, SLA config e nome são derivados
+    dessa mesma cópia.
+    """
+
+    def __init__(self, cache_dir="workflow_cache", ttl_horas=24, get_with_retry=_get_with_retry, offline=False):
+        """
+        Args:
+            cache_dir (str): Pasta onde os documentos são persistidos.
+            ttl_horas (float): Validade da cópia em disco. 0 força nova busca a cada execução.
+            get_with_retry (function): Função para requisição GET com retry.
+            offline (bool): Nunca chama a API; usa a cópia em disco mesmo expirada.
+        """
+        self.cache_dir = cache_dir
+        self.ttl_segundos = float(ttl_horas) * 3600
+        self.get_with_retry = get_with_retry
+        self.offline = offline
+        self._documentos = {}
+        self._sla_por_hash = {}
+
+    # ----------------------------
+    # Persistência
+    # ----------------------------
+    def _caminho(self, config_id):
+        return os.path.join(self.cache_dir, f"workflow_{config_id}.json")
+
+    def _ler_disco(self, config_id):
+        path = self._caminho(config_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ Cache de workflow corrompido em '{path}': {e}")
+            return None
+
+    def _gravar_disco(self, config_id, entrada):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._caminho(config_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entrada, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"⚠️ Não foi possível salvar cache do workflow {config_id}: {e}")
+
+    def _buscar_api(self, config_id, token):
+        url = WORKFLOW_URL.format(config_id=config_id)
+        headers = {
+            "accept": "application/json",
+            "Authorization": f"Token {token}"
+        }
+        try:
+            response = self.get_with_retry(url, headers=headers)
+            if response and response.status_code == 200:
+                return response.json()
+            logging.warning(f"⚠️ Falha ao buscar workflow {config_id}. Status: {response.status_code if response else 'sem resposta'}")
+        except Exception as e:
+            logging.error(f"❌ Erro ao buscar workflow {config_id}: {e}")
+        return None
+
+    # ----------------------------
+    # API pública
+    # ----------------------------
+    def obter(self, config_id, token, forcar=False):
+        """
+        Retorna o JSON bruto do workflow (dict vazio se não houver cópia válida).
+
+        Ordem: memória da execução → disco dentro do TTL → API.
+        """
+        config_id = str(config_id)
+        if not forcar and config_id in self._documentos:
+            return self._documentos[config_id]["data"]
+
+        entrada = self._ler_disco(config_id)
+        if self.offline:
+            if not entrada:
+                logging.warning(f"⚠️ Modo offline: workflow {config_id} não está no cache em disco.")
+            self._documentos[config_id] = entrada or {"data": {}, "sha256": None, "fetched_at": time.time()}
+            return self._documentos[config_id]["data"]
+
+        if not forcar and entrada and time.time() - entrada.get("fetched_at", 0) < self.ttl_segundos:
+            logging.info(f"📂 Workflow {config_id} reaproveitado do cache em disco (hash {entrada['sha256'][:12]})")
+            self._documentos[config_id] = entrada
+            return entrada["data"]
+
+        workflow_data = self._buscar_api(config_id, token)
+        if workflow_data is None:
+            if entrada:
+                logging.warning(f"⚠️ Usando cópia expirada do workflow {config_id} salva em disco.")
+                self._documentos[config_id] = entrada
+                return entrada["data"]
+            self._documentos[config_id] = {"data": {}, "sha256": None, "fetched_at": time.time()}
+            return {}
+
+        sha256 = _hash_conteudo(workflow_data)
+        if entrada and entrada.get("sha256") == sha256:
+            logging.info(f"🟰 Workflow {config_id} sem alterações desde a última busca.")
+        nova_entrada = {"fetched_at": time.time(), "sha256": sha256, "data": workflow_data}
+        self._gravar_disco(config_id, nova_entrada)
+        self._documentos[config_id] = nova_entrada
+        return workflow_data
+
+    def hash(self, config_id, token):
+        """Hash SHA-256 do conteúdo do workflow (None se não houver documento)."""
+        self.obter(config_id, token)
+        return self._documentos[str(config_id)].get("sha256")
+
+    def labels(self, config_id, token):
+        """Etiquetas do workflow: {label_id: label_title}."""
+        return extrair_etiquetas(self.obter(config_id, token))
+
+    def sla_config(self, config_id, token):
+        """SLA config já interpretado (`parse_sla_config`), reaproveitado enquanto o hash não mudar."""
+        workflow_data = self.obter(config_id, token)
+        sha256 = self._documentos[str(config_id)].get("sha256")
+        if sha256 is None:
+            return parse_sla_config(workflow_data)
+        if sha256 not in self._sla_por_hash:
+            self._sla_por_hash[sha256] = parse_sla_config(workflow_data)
+        return self._sla_por_hash[sha256]
+
+    def nome(self, config_id, token):
+        """Nome da configuração (cai para `/api/zc/config/{id}/` se o workflow não tiver nome)."""
+        nome = self.obter(config_id, token).get("name")
+        if nome:
+            return nome
+        return f"config_{config_id}" if self.offline else get_config_name(config_id, token)
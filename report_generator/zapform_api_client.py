@@ -1,9 +1,16 @@
 # zapform_api_client.py
 
-import time
+import re
+import math
 import logging
+from collections import deque
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from .data_utils import clean_url_params, input_with_timeout
+from .http_client import get_client
+from .rate_controller import STATUS_SOBRECARGA
+from .metrics import get_registro
 
 def get_config_name(config_id, token):
     url = f"https://api.zapform.com.br/api/zc/config/{config_id}/"
@@ -12,7 +19,7 @@ def get_config_name(config_id, token):
         "Authorization": f"Token {token}"
     }
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = get_client().get(url, headers=headers, timeout=30)
         if response.status_code == 200:
             return response.json().get("name", f"config_{config_id}")
         else:
@@ -22,11 +29,163 @@ def get_config_name(config_id, token):
         logging.error(f"❌ Erro ao obter nome da config {config_id}: {e}")
         return f"config_{config_id}"
 
-def fetch_orders_by_date(token, config_id, filters, get_with_retry):
+def _registrar_versoes(versoes, orders):
+    """Guarda em `versoes` o time_last_updated de cada ordem listada (se o dict foi informado)."""
+    if versoes is None:
+        return
+    for o in orders:
+        if o.get('time_last_updated'):
+            versoes[o['id']] = o['time_last_updated']
+
+def _registrar_objetos(objetos, orders):
+    """Guarda em `objetos` o JSON de cada ordem listada (se o dict foi informado), para a hidratação."""
+    if objetos is None:
+        return
+    for o in orders:
+        objetos[o['id']] = o
+
+_DATA_PURA = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# ordens por página pedidas nas listagens (`page_size`; o servidor pode limitar)
+PAGE_SIZE_LISTAGEM = 200
+# páginas da listagem buscadas ao mesmo tempo quando as URLs podem ser derivadas de `count`
+PAGINAS_SIMULTANEAS = 4
+# IDs por consulta `id__in` ao buscar uma lista manual de ordens
+IDS_POR_LOTE = 100
+# token recusado: só estes status trocam o token; a mesma ordem é tentada uma vez com outro do pool
+STATUS_TOKEN_RECUSADO = (401, 403)
+TENTATIVAS_TOKEN = 2
+# sobrecarga (429/5xx) ou erro de rede depois das tentativas do cliente HTTP: a ordem volta a ser
+# pedida até este total de rodadas, sempre passando pelas pausas do controlador de ritmo
+RODADAS_SOBRECARGA = 5
+
+
+def _paginas_derivadas(next_url, count, por_pagina):
+    """
+    URLs das páginas 2..N derivadas do `next` da primeira página e de `count`
+    (paginação por `page` ou por `offset`/`limit`). None se não der para derivar
+    (ex.: paginação por cursor) — aí a listagem segue o `next` página a página.
+    """
+    if not next_url or not count or not por_pagina:
+        return None
+    partes = urlparse(next_url)
+    query = dict(parse_qsl(partes.query, keep_blank_values=True))
+    try:
+        if "page" in query:
+            if int(query["page"]) != 2:
+                return None
+            total_paginas = math.ceil(count / por_pagina)
+            variacoes = [{"page": str(p)} for p in range(2, total_paginas + 1)]
+        elif "offset" in query:
+            passo = int(query.get("limit") or por_pagina)
+            inicio = int(query["offset"])
+            if passo <= 0 or inicio != por_pagina:
+                return None
+            variacoes = [{"offset": str(o)} for o in range(inicio, count, passo)]
+        else:
+            return None
+    except ValueError:
+        return None
+    return [urlunparse(partes._replace(query=urlencode({**query, **v}))) for v in variacoes]
+
+
+def _buscar_pagina(url, get_with_retry, montar_headers, ao_falhar=None, params=None, max_attempts=5):
+    """
+    JSON de uma página da listagem, com novas tentativas (o ritmo fica com o controlador HTTP).
+    `ao_falhar(headers)` é chamado a cada tentativa falha (ex.: trocar o token).
+
+    Returns:
+        dict | None: None se a página não pôde ser obtida.
+    """
+    for attempt in range(max_attempts):
+        headers = montar_headers()
+        try:
+            response = get_with_retry(url, headers=headers, timeout=30, params=params)
+            if response is not None and response.status_code == 200:
+                return response.json()
+            status = "sem resposta" if response is None else f"HTTP {response.status_code}"
+            logging.warning(f"⚠️ Página da listagem {status} - Tentativa {attempt + 1}/{max_attempts}")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"🌐 Erro de rede: {e}")
+        except ValueError as e:
+            logging.error(f"❌ Resposta inválida na listagem: {e}")
+        if ao_falhar is not None:
+            ao_falhar(headers)
+    return None
+
+
+def _listar_ordens(url, params, get_with_retry, montar_headers, ao_falhar=None, versoes=None, objetos=None,
+                   page_size=PAGE_SIZE_LISTAGEM, paginas_simultaneas=PAGINAS_SIMULTANEAS, max_attempts=5):
+    """
+    IDs de todas as ordens da listagem.
+
+    A primeira página dá `count` e o tamanho efetivo da página; as demais URLs são
+    derivadas dela e buscadas em paralelo. Sem paginação derivável, ou se o total
+    coletado não bater com `count`, a listagem segue o `next` página a página.
+    """
+    if page_size:
+        params = {**params, "page_size": page_size}
+    data = _buscar_pagina(url, get_with_retry, montar_headers, ao_falhar, params=params, max_attempts=max_attempts)
+    if data is None:
+        logging.error("❌ Não foi possível obter a primeira página da listagem.")
+        return []
+
+    count = data.get("count")
+    primeira = data.get("results", [])
+    next_url = clean_url_params(data["next"]) if data.get("next") else None
+    logging.info(f"📦 Total de ordens esperadas: {count} ({len(primeira)} por página)")
+
+    paginas = [primeira]
+    derivadas = _paginas_derivadas(next_url, count, len(primeira)) if paginas_simultaneas > 1 else None
+    if derivadas:
+        with ThreadPoolExecutor(max_workers=min(paginas_simultaneas, len(derivadas)),
+                                thread_name_prefix="listagem") as executor:
+            resultados = list(executor.map(
+                lambda u: _buscar_pagina(u, get_with_retry, montar_headers, ao_falhar, max_attempts=max_attempts),
+                derivadas
+            ))
+        if all(r is not None for r in resultados):
+            paginas.extend(r.get("results", []) for r in resultados)
+            total = len({o["id"] for pagina in paginas for o in pagina})
+            if count is None or total == count:
+                logging.info(f"📥 {len(derivadas) + 1} páginas buscadas em paralelo: {total} ordens")
+                return _ids_das_paginas(paginas, versoes, objetos)
+            logging.warning(f"⚠️ Listagem paralela trouxe {total} ordens (esperado {count}); refazendo pelo 'next'.")
+        else:
+            logging.warning("⚠️ Falha em páginas da listagem paralela; refazendo pelo 'next'.")
+        paginas = [primeira]
+
+    while next_url:
+        data = _buscar_pagina(next_url, get_with_retry, montar_headers, ao_falhar, max_attempts=max_attempts)
+        if data is None:
+            logging.error("⛔ Máximo de tentativas atingido. Abortando.")
+            break
+        paginas.append(data.get("results", []))
+        next_url = clean_url_params(data["next"]) if data.get("next") else None
+        logging.info(f"📥 Página processada. Total até agora: {sum(len(p) for p in paginas)} ordens.")
+
+    order_ids = _ids_das_paginas(paginas, versoes, objetos)
+    if count is not None and len(set(order_ids)) != count:
+        logging.warning(f"⚠️ Total recuperado: {len(set(order_ids))} (esperado {count})")
+    return order_ids
+
+
+def _ids_das_paginas(paginas, versoes, objetos=None):
+    order_ids = []
+    for pagina in paginas:
+        order_ids.extend([o['id'] for o in pagina])
+        _registrar_versoes(versoes, pagina)
+        _registrar_objetos(objetos, pagina)
+    return order_ids
+
+
+def fetch_orders_by_date(token, config_id, filters, get_with_retry, versoes=None, objetos=None,
+                         page_size=PAGE_SIZE_LISTAGEM, paginas_simultaneas=PAGINAS_SIMULTANEAS):
     base_url = f"https://api.zapform.com.br/api/zc/{config_id}/order/"
+    # o horário só é completado em datas puras ("AAAA-MM-DD"); instantes já completos seguem como estão
     params = {
-        k: f"{v}T00:00:00.000Z" if k.endswith("__gt") else
-           f"{v}T23:59:59.999Z" if k.endswith("__lte") or k.endswith("__lt") else
+        k: f"{v}T00:00:00.000Z" if k.endswith("__gt") and _DATA_PURA.fullmatch(str(v)) else
+           f"{v}T23:59:59.999Z" if (k.endswith("__lte") or k.endswith("__lt")) and _DATA_PURA.fullmatch(str(v)) else
            v
         for k, v in filters.items()
     }
@@ -36,129 +195,271 @@ def fetch_orders_by_date(token, config_id, filters, get_with_retry):
         "Authorization": f"Token {token}"
     }
 
-    order_ids = []
-    max_attempts = 30
-    delay = 2
-    url = base_url
-
-    while url:
-        for attempt in range(max_attempts):
-            try:
-                response = get_with_retry(url, headers=headers, timeout=30, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    orders = data.get('results', [])
-                    order_ids.extend([o['id'] for o in orders])
-                    url = clean_url_params(data.get('next')) if data.get('next') else None
-                    logging.info(f"📥 Página processada. Total até agora: {len(order_ids)} ordens.")
-                    break
-                elif response.status_code in [500, 502, 503, 504]:
-                    logging.warning(f"⚠️ Erro {response.status_code} - Tentativa {attempt + 1}/{max_attempts}")
-                    time.sleep(delay)
-                else:
-                    logging.error(f"❌ Erro inesperado: {response.status_code} - {response.text}")
-                    return order_ids
-            except requests.exceptions.RequestException as e:
-                logging.error(f"🌐 Erro de rede: {e}")
-                time.sleep(delay)
-        else:
-            logging.error("⛔ Máximo de tentativas atingido. Abortando.")
-            break
-
-    return order_ids
+    return _listar_ordens(
+        base_url, params, get_with_retry, lambda: headers, versoes=versoes, objetos=objetos,
+        page_size=page_size, paginas_simultaneas=paginas_simultaneas, max_attempts=30
+    )
 
-def fetch_all_orders(token_manager, config_id, filters, get_with_retry):
+def fetch_all_orders(token_manager, config_id, filters, get_with_retry, versoes=None, objetos=None,
+                     page_size=PAGE_SIZE_LISTAGEM, paginas_simultaneas=PAGINAS_SIMULTANEAS):
     url = f"https://api.zapform.com.br/api/zc/{config_id}/order/"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Token {token_manager.get_token()}"
-    }
+
+    def _headers():
+        return {
+            "accept": "application/json",
+            "Authorization": f"Token {token_manager.get_token()}"
+        }
+
+    def _trocar_token(headers):
+        token_manager.rotate_login_on_error(token_falho=headers["Authorization"].split(" ", 1)[1])
 
     print(f"🟡 Iniciando busca inicial para config {config_id} com filtros: {filters}")
-    response = get_with_retry(url, headers=headers, params=filters)
-    
-    if response is None:
-        print("❌ Resposta inicial NULA.")
-        return []
+    order_ids = _listar_ordens(
+        url, filters, get_with_retry, _headers, ao_falhar=_trocar_token,
+        versoes=versoes, objetos=objetos, page_size=page_size, paginas_simultaneas=paginas_simultaneas
+    )
+    print(f"✅ Total recuperado: {len(order_ids)}")
+    return order_ids
 
-    print(f"🔵 Resposta inicial: status {response.status_code}")
-    if response.status_code != 200:
-        print(f"❌ Erro ao obter resposta inicial. Status: {response.status_code}")
-        return []
 
-    total = response.json().get('count', 0)
-    print(f"📦 Total de ordens esperadas: {total}")
+def _buscar_lote_ids(url, lote, get_with_retry, montar_headers, ao_falhar):
+    """
+    Ordens de um lote de IDs numa consulta `id__in` (seguindo o `next`, se o servidor limitar a página).
 
-    order_ids = []
-    attempt = 0
-    max_attempts = 5
-
-    data = response.json()
-    page_results = data.get('results', [])
-    print(f"📄 Primeira página: {len(page_results)} ordens")
-    order_ids.extend([o['id'] for o in page_results])
-    next_url = data.get('next')
-    print(f"➡️ Próxima URL: {next_url}")
-
-    while next_url and attempt < max_attempts:
-        print(f"🔁 Paginação: tentando buscar {next_url}")
-        try:
-            response = get_with_retry(next_url, headers=headers)
-            if response is None:
-                print("⚠️ Resposta NULA em próxima página. Trocando token...")
-                token_manager.rotate_login_on_error()
-                headers["Authorization"] = f"Token {token_manager.get_token()}"
-                attempt += 1
-                time.sleep(2)
-                continue
+    Returns:
+        list | None: ordens encontradas do lote; None se o servidor ignorou o filtro
+        (`count` maior que o lote) ou se a consulta falhou.
+    """
+    params = {"id__in": ",".join(str(oid) for oid in lote), "page_size": len(lote)}
+    data = _buscar_pagina(url, get_with_retry, montar_headers, ao_falhar, params=params)
+    if data is None or (data.get("count") or 0) > len(lote):
+        return None
+    ordens = list(data.get("results", []))
+    next_url = clean_url_params(data["next"]) if data.get("next") else None
+    while next_url:
+        data = _buscar_pagina(next_url, get_with_retry, montar_headers, ao_falhar)
+        if data is None:
+            return None
+        ordens.extend(data.get("results", []))
+        next_url = clean_url_params(data["next"]) if data.get("next") else None
+    return ordens
 
-            print(f"✅ Status próxima página: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                page_results = data.get('results', [])
-                print(f"📄 Página com {len(page_results)} ordens")
-                order_ids.extend([o['id'] for o in page_results])
-                next_url = data.get('next')
-                print(f"➡️ Nova next: {next_url}")
-                attempt = 0  # reset após sucesso
-            else:
-                print(f"⚠️ HTTP {response.status_code}. Tentando novamente...")
-                attempt += 1
-        except Exception as e:
-            logging.error(f"❌ Erro inesperado durante paginação: {e}")
-            attempt += 1
-            time.sleep(2)
 
-    print(f"✅ Total recuperado: {len(order_ids)} (esperado {total})")
+def fetch_orders_by_ids(token_manager, config_id, order_ids, get_with_retry, versoes=None, objetos=None,
+                        lote=IDS_POR_LOTE, paginas_simultaneas=PAGINAS_SIMULTANEAS):
+    """
+    Busca uma lista manual de ordens em consultas de listagem com `id__in`, em lotes,
+    registrando `versoes` e `objetos` pelos IDs pedidos (como na listagem por data).
 
-    return order_ids
+    IDs que não vierem (lote com falha ou servidor sem suporte ao filtro) ficam de fora de
+    `objetos` e seguem para a busca detalhada individual.
+
+    Returns:
+        int: quantidade de ordens obtidas pelas consultas em lote.
+    """
+    url = f"https://api.zapform.com.br/api/zc/{config_id}/order/"
+
+    def _headers():
+        return {
+            "accept": "application/json",
+            "Authorization": f"Token {token_manager.get_token()}"
+        }
+
+    def _trocar_token(headers):
+        token_manager.rotate_login_on_error(token_falho=headers["Authorization"].split(" ", 1)[1])
+
+    lote = max(1, int(lote))
+    lotes = [order_ids[i:i + lote] for i in range(0, len(order_ids), lote)]
+    if not lotes:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, min(paginas_simultaneas, len(lotes))),
+                            thread_name_prefix="ids") as executor:
+        resultados = list(executor.map(
+            lambda ids: _buscar_lote_ids(url, ids, get_with_retry, _headers, _trocar_token), lotes
+        ))
+
+    pedidos = {str(oid): oid for oid in order_ids}
+    obtidas = 0
+    for ordens in resultados:
+        for o in ordens or []:
+            oid = pedidos.get(str(o.get('id')))
+            if oid is None:
+                continue
+            obtidas += 1
+            if versoes is not None and o.get('time_last_updated'):
+                versoes[oid] = o['time_last_updated']
+            if objetos is not None:
+                objetos[oid] = o
+    if any(r is None for r in resultados):
+        logging.warning(f"⚠️ Consulta por id__in sem resposta ou sem suporte em parte dos lotes (config {config_id})")
+    logging.info(f"📥 {obtidas}/{len(order_ids)} ordens obtidas em {len(lotes)} consultas por lote de IDs")
+    return obtidas
 
 
 
 def fetch_order_data(config_id, order_id, token_manager, get_with_retry):
-    url = f"https://api.zapform.com.br/api/zc/{config_id}/order/{order_id}/"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Token {token_manager.get_token()}"
-    }
+    """
+    Detalhe de uma ordem (None se não puder ser obtido; o motivo vai para o log).
 
-    for attempt in range(5):
-        try:
-            response = get_with_retry(url, headers=headers, timeout=30)
-            if response and response.status_code == 200:
-                token_manager.marcar_sucesso()
+    Só 401/403 trocam o token. Sobrecarga e erros de rede não são culpa do token: a
+    ordem é pedida de novo (até `RODADAS_SOBRECARGA` rodadas de `get_with_retry`), e a
+    espera entre as rodadas é a do controlador de ritmo, que já reduziu a janela.
+    """
+    url = f"https://api.zapform.com.br/api/zc/{config_id}/order/{order_id}/"
+    trocas = 0
+    rodadas = 0
+    while True:
+        # cada tentativa pega emprestado o token menos ocupado do pool
+        with token_manager.arrendar() as token:
+            headers = {
+                "accept": "application/json",
+                "Authorization": f"Token {token}"
+            }
+            response = get_with_retry(url, headers=headers, timeout=30, retornar_falha=True)
+            if response is not None and response.status_code == 200:
+                token_manager.marcar_sucesso(token)
                 return response.json()
-            elif response and response.status_code in [429, 502, 503, 504, 403]:
-                token_manager.rotate_login_on_error()
-                headers["Authorization"] = f"Token {token_manager.get_token()}"
-        except requests.exceptions.RequestException as e:
-            logging.error(f"🌐 Erro de rede: {e}")
-            token_manager.rotate_login_on_error()
-            headers["Authorization"] = f"Token {token_manager.get_token()}"
+            status = None if response is None else response.status_code
+            if status in STATUS_TOKEN_RECUSADO:
+                token_manager.rotate_login_on_error(token_falho=token)
+
+        if status in STATUS_TOKEN_RECUSADO:
+            trocas += 1
+            if trocas < TENTATIVAS_TOKEN:
+                continue
+            motivo = f"HTTP {status} com {trocas} tokens"
+        elif status is not None and status not in STATUS_SOBRECARGA:
+            # ex.: 404 — tentar de novo não muda a resposta
+            logging.warning(f"⚠️ Ordem {order_id} da config {config_id}: HTTP {status}")
+            return None
+        else:
+            rodadas += 1
+            if rodadas < RODADAS_SOBRECARGA:
+                get_registro().contar("zapform_retentativas_total", motivo="ordem_sobrecarga")
+                continue
+            motivo = f"{'erro de rede' if status is None else f'HTTP {status}'} após {rodadas} rodadas"
+        logging.error(f"❌ Ordem {order_id} da config {config_id} não obtida: {motivo}")
+        return None
+
 
-        time.sleep(1)
+_AUSENTE = object()
+
+
+class HidratacaoListagem:
+    """
+    Monta as ordens a partir dos objetos da listagem, sem o GET individual.
+
+    Só os objetos que têm todas as `chaves` são servidos da listagem; os demais
+    são buscados um a um. `completa` indica que os objetos da listagem são iguais ao
+    detalhe da ordem (podem ir para o armazém local); senão eles só têm o que o
+    report e o SLA desta config usam.
+    """
+
+    def __init__(self, objetos, chaves, completa):
+        self.objetos = objetos
+        self.chaves = frozenset(chaves)
+        self.completa = completa
+        self.servidas = set()
+        self.buscadas = 0
+
+    def _pronto(self, objeto):
+        return objeto is not None and all(k in objeto for k in self.chaves)
+
+    def iterar(self, order_ids, buscar):
+        """
+        Mesma interface de `iter_orders_data`: (order_id, order_data) na ordem de `order_ids`,
+        delegando a `buscar` apenas os IDs sem objeto completo na listagem.
+        """
+        prontas = {oid for oid in order_ids if self._pronto(self.objetos.get(oid))}
+        faltantes = [oid for oid in order_ids if oid not in prontas]
+        self.buscadas += len(faltantes)
+        remotas = iter(buscar(faltantes))
+        for order_id in order_ids:
+            if order_id in prontas:
+                self.servidas.add(order_id)
+                # o objeto sai do dict ao ser servido, para não ficar em memória até o fim
+                yield order_id, self.objetos.pop(order_id)
+            else:
+                yield next(remotas)
+
+
+def avaliar_hidratacao(config_id, objetos, chaves, token_manager, get_with_retry, amostras=3):
+    """
+    Decide, uma vez por config, se os objetos da listagem bastam para montar as ordens.
+
+    Compara o objeto listado de até `amostras` ordens com o seu detalhe (GET individual):
+    iguais em tudo -> hidratação completa; iguais nas `chaves` usadas -> hidratação parcial.
+    `chaves` None (ex.: expressão customizada que lê `order_json`) exige a completa.
+    O detalhe buscado na amostra substitui o objeto listado.
+
+    Returns:
+        HidratacaoListagem | None: None se os objetos da listagem não servem.
+    """
+    for order_id in list(objetos)[:amostras]:
+        detalhe = fetch_order_data(config_id, order_id, token_manager, get_with_retry)
+        listado = objetos[order_id]
+        if not detalhe or detalhe.get("time_last_updated") != listado.get("time_last_updated"):
+            continue  # sem detalhe ou ordem alterada entre a listagem e o GET: tenta outra
+
+        objetos[order_id] = detalhe
+        if all(listado.get(k, _AUSENTE) == v for k, v in detalhe.items()):
+            logging.info(f"💧 Listagem traz as ordens completas (config {config_id}): sem GET individual")
+            return HidratacaoListagem(objetos, set(detalhe), completa=True)
+        if chaves is not None:
+            # chaves ausentes também no detalhe não são exigidas da listagem
+            usadas = {k for k in chaves if k in detalhe}
+            divergentes = sorted(k for k in usadas if listado.get(k, _AUSENTE) != detalhe[k])
+            if not divergentes:
+                logging.info(f"💧 Listagem traz os campos usados pela config {config_id}: {sorted(usadas)}")
+                return HidratacaoListagem(objetos, usadas, completa=False)
+            logging.info(f"💧 Listagem sem os campos completos {divergentes}: GET individual (config {config_id})")
+        else:
+            logging.info(f"💧 Listagem incompleta e a config usa a ordem inteira: GET individual (config {config_id})")
+        return None
     return None
 
+
+_FIM = object()
+
+
+def iter_orders_data(config_id, order_ids, token_manager, get_with_retry, max_in_flight=8):
+    """
+    Busca os detalhes de várias ordens em paralelo (pool de threads).
+
+    Mantém no máximo `max_in_flight` requisições em andamento e devolve os
+    resultados na MESMA ordem de `order_ids`, para que o processamento
+    posterior seja determinístico.
+
+    Args:
+        config_id (str): ID da configuração.
+        order_ids (list): IDs das ordens, na ordem desejada.
+        token_manager (TokenPool): Pool de tokens compartilhado.
+        get_with_retry (function): Função para requisição GET com retry.
+        max_in_flight (int): Limite de requisições simultâneas.
+
+    Yields:
+        tuple: (order_id, order_data) — order_data é None se a busca falhou.
+    """
+    max_in_flight = max(1, int(max_in_flight))
+    ids = iter(order_ids)
+    pendentes = deque()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"fetch_{config_id}") as executor:
+        def _submeter():
+            order_id = next(ids, _FIM)
+            if order_id is not _FIM:
+                future = executor.submit(fetch_order_data, config_id, order_id, token_manager, get_with_retry)
+                pendentes.append((order_id, future))
+
+        for _ in range(max_in_flight):
+            _submeter()
+
+        while pendentes:
+            order_id, future = pendentes.popleft()
+            order_data = future.result()
+            _submeter()
+            yield order_id, order_data
+
 def get_ultimo_usuario_humano(order_json):
     try:
         status_history = order_json.get("status_history", [])
@@ -1,7 +1,16 @@
 # zapform_auth.py
 
+import os
+import json
+import time
+import hashlib
 import logging
-import requests
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from .http_client import get_client
+from .metrics import get_registro
 
 def get_auth_token(username, password):
     url = "https://api.zapform.com.br/api/auth/login/"
@@ -15,7 +24,7 @@ def get_auth_token(username, password):
         "password": password
     }
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=10)
+        response = get_client().post(url, headers=headers, json=data, timeout=10)
         if response.status_code == 200:
             return response.json().get('key')
         else:
@@ -33,40 +42,301 @@ def get_valid_token(login_list):
             return token, login
     raise Exception("⛔ Nenhum token pôde ser obtido com as credenciais fornecidas.")
 
-class TokenManager:
-    def __init__(self, login_list, revezamento_intervalo=100):
+# arquivo local com os tokens já obtidos (evita refazer os logins a cada execução); fica fora
+# da pasta do projeto, para não ir parar no repositório junto com os acumulados
+COFRE_TOKENS = os.environ.get("REPORT_GENERATOR_COFRE_TOKENS") or os.path.join(
+    os.path.expanduser("~"), ".cache", "report_generator", "tokens_zapform.json"
+)
+VERSAO_COFRE = 1
+# validade assumida de um token obtido no login
+VALIDADE_TOKEN_HORAS = 24
+# falhas seguidas de um token antes de refazer o login da conta
+FALHAS_PARA_RELOGIN = 3
+
+
+def _assinatura(login):
+    """Identifica a credencial (muda se a senha mudar) sem guardar a senha no cofre."""
+    return hashlib.sha256(f"{login['username']}:{login['password']}".encode("utf-8")).hexdigest()[:16]
+
+
+def ler_cofre_tokens(path=COFRE_TOKENS):
+    """Tokens persistidos: {username: {"token", "expira_em", "assinatura"}} (vazio se ausente ou ilegível)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            registro = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(registro, dict) or registro.get("versao") != VERSAO_COFRE:
+        return {}
+    return registro.get("tokens") or {}
+
+
+def gravar_cofre_tokens(tokens, path=COFRE_TOKENS):
+    """Grava o cofre de forma atômica, legível só pelo usuário atual."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        pasta = os.path.dirname(path)
+        if pasta:
+            os.makedirs(pasta, mode=0o700, exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"versao": VERSAO_COFRE, "tokens": tokens}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception as e:
+        logging.warning(f"⚠️ Não foi possível gravar o cofre de tokens '{path}': {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class _Credencial:
+    """Estado de uma conta de integração dentro do pool."""
+
+    __slots__ = ("login", "token", "expira_em", "arrendamentos", "ultimo_arrendamento", "sucessos", "falhas",
+                 "descanso_ate")
+
+    def __init__(self, login):
+        self.login = login
+        self.token = None
+        self.expira_em = None
+        self.arrendamentos = 0   # requisições em andamento com este token
+        self.ultimo_arrendamento = 0
+        self.sucessos = 0
+        self.falhas = 0          # falhas seguidas
+        self.descanso_ate = 0.0  # time.monotonic() até quando o token fica de fora
+
+    def valida(self, agora=None):
+        return self.token is not None and (self.expira_em is None or self.expira_em > (agora or datetime.now()))
+
+    def disponivel(self, agora_mono):
+        return self.valida() and self.descanso_ate <= agora_mono
+
+
+class TokenPool:
+    """
+    Pool de tokens das contas de integração, seguro para várias threads.
+
+    - Na criação, reaproveita os tokens ainda válidos do cofre local (`cofre_path`)
+      e faz, em paralelo, o login só das contas que faltam.
+    - `arrendar()` empresta a cada requisição o token disponível com menos
+      requisições em andamento, espalhando a carga pelas contas.
+    - `get_token()` devolve o token "ativo" (buscas sequenciais, workflow, paginação);
+      o revezamento a cada `revezamento_intervalo` sucessos e a troca por erro só
+      mudam o ativo para outro token já válido — sem novo login.
+    - Um token com `FALHAS_PARA_RELOGIN` falhas seguidas tem o login da conta refeito.
+    """
+
+    def __init__(self, login_list, revezamento_intervalo=100, cofre_path=COFRE_TOKENS,
+                 validade_horas=VALIDADE_TOKEN_HORAS, max_logins_simultaneos=8, descanso_falha_s=30):
+        """
+        Args:
+            login_list (list): Logins de integração ({"username", "password"}).
+            revezamento_intervalo (int): Sucessos do token ativo antes de alternar para o próximo.
+            cofre_path (str, optional): Arquivo do cofre de tokens (None: não persiste).
+            validade_horas (float): Validade assumida de cada token obtido.
+            max_logins_simultaneos (int): Logins em paralelo na preparação do pool.
+            descanso_falha_s (float): Tempo que um token com falha fica fora do rodízio.
+        """
+        if not login_list:
+            raise ValueError("⛔ Nenhuma credencial de integração informada.")
         self.login_list = login_list
         self.revezamento_intervalo = revezamento_intervalo
+        self.cofre_path = cofre_path
+        self.validade = timedelta(hours=validade_horas)
+        self.max_logins_simultaneos = max(1, int(max_logins_simultaneos))
+        self.descanso_falha_s = descanso_falha_s
+        self._credenciais = [_Credencial(login) for login in login_list]
         self.current_index = 0
-        self.token = None
-        self.sucesso_count = 0
-        self.refresh_token()
+        self._arrendamentos = 0
+        self._lock = threading.RLock()
+        self._disponivel = threading.Condition(self._lock)
+        self._preparar()
+
+    # ---------- login e cofre ----------
+    def _preparar(self):
+        cofre = ler_cofre_tokens(self.cofre_path) if self.cofre_path else {}
+        agora = datetime.now()
+        for cred in self._credenciais:
+            salvo = cofre.get(cred.login["username"])
+            if not salvo or salvo.get("assinatura") != _assinatura(cred.login):
+                continue
+            try:
+                expira_em = datetime.fromisoformat(salvo["expira_em"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if expira_em > agora and salvo.get("token"):
+                cred.token, cred.expira_em = salvo["token"], expira_em
+
+        do_cofre = sum(1 for c in self._credenciais if c.valida(agora))
+        faltantes = [c for c in self._credenciais if not c.valida(agora)]
+        self._logar(faltantes)
+        logging.info(
+            f"🔐 Pool de tokens: {do_cofre} do cofre, "
+            f"{sum(1 for c in faltantes if c.valida())}/{len(faltantes)} novos logins"
+        )
+        if not any(c.valida() for c in self._credenciais):
+            raise Exception("⛔ Nenhum token válido disponível.")
+        self._ativar_proximo(self.current_index, incluir_atual=True)
+
+    def _logar(self, credenciais):
+        """Faz o login das contas em paralelo e persiste o cofre."""
+        if not credenciais:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_logins_simultaneos, len(credenciais)),
+                                thread_name_prefix="login") as executor:
+            tokens = list(executor.map(
+                lambda c: get_auth_token(c.login["username"], c.login["password"]), credenciais
+            ))
+        expira_em = datetime.now() + self.validade
+        with self._lock:
+            for cred, token in zip(credenciais, tokens):
+                get_registro().contar("zapform_logins_total", resultado="ok" if token else "falha")
+                if token:
+                    cred.token, cred.expira_em = token, expira_em
+                    cred.falhas, cred.descanso_ate = 0, 0.0
+                else:
+                    cred.token, cred.expira_em = None, None
+            self._gravar_cofre()
+            self._disponivel.notify_all()
+
+    def _gravar_cofre(self):
+        if not self.cofre_path:
+            return
+        tokens = {
+            c.login["username"]: {
+                "token": c.token,
+                "expira_em": c.expira_em.isoformat(timespec="seconds"),
+                "assinatura": _assinatura(c.login),
+            }
+            for c in self._credenciais if c.valida()
+        }
+        gravar_cofre_tokens(tokens, self.cofre_path)
+
+    # ---------- token ativo (compatível com o antigo TokenManager) ----------
+    def _ativar_proximo(self, inicio, incluir_atual=False):
+        """Ativa o próximo token disponível a partir de `inicio` (sem login)."""
+        n = len(self._credenciais)
+        agora_mono = time.monotonic()
+        passos = range(0, n) if incluir_atual else range(1, n + 1)
+        for passo in passos:
+            i = (inicio + passo) % n
+            if self._credenciais[i].disponivel(agora_mono):
+                self.current_index = i
+                return True
+        # todos em descanso: fica com o válido que sai do descanso primeiro
+        validas = [i for i, c in enumerate(self._credenciais) if c.valida()]
+        if validas:
+            self.current_index = min(validas, key=lambda i: self._credenciais[i].descanso_ate)
+            return True
+        return False
+
+    @property
+    def token(self):
+        return self._credenciais[self.current_index].token
+
+    def get_token(self):
+        with self._lock:
+            if not self._credenciais[self.current_index].valida() and not self._ativar_proximo(self.current_index):
+                self._refresh_token()
+            return self.token
 
     def refresh_token(self):
-        tentativas = 0
-        while tentativas < len(self.login_list):
-            login = self.login_list[self.current_index]
-            token = get_auth_token(login["username"], login["password"])
-            if token:
-                self.token = token
-                self.sucesso_count = 0
-                logging.info(f"🔐 Novo token ativo: {login['username']}")
+        """Refaz o login de todas as contas (em paralelo)."""
+        with self._lock:
+            self._refresh_token()
+
+    def _refresh_token(self):
+        self._logar(self._credenciais)
+        if not self._ativar_proximo(self.current_index, incluir_atual=True):
+            raise Exception("⛔ Nenhum token válido disponível.")
+        logging.info(f"🔐 Novo token ativo: {self._credenciais[self.current_index].login['username']}")
+
+    # ---------- arrendamento por requisição ----------
+    @contextmanager
+    def arrendar(self, timeout=None):
+        """
+        Empresta um token para uma requisição (o disponível com menos requisições em
+        andamento e, no empate, o que foi emprestado há mais tempo).
+
+        Yields:
+            str: token
+        """
+        cred = self._tomar(timeout)
+        try:
+            yield cred.token
+        finally:
+            with self._lock:
+                cred.arrendamentos -= 1
+
+    def _tomar(self, timeout):
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                agora_mono = time.monotonic()
+                livres = [c for c in self._credenciais if c.disponivel(agora_mono)]
+                if livres:
+                    # menos ocupado; no empate, o emprestado há mais tempo (rodízio entre as contas)
+                    cred = min(livres, key=lambda c: (c.arrendamentos, c.ultimo_arrendamento))
+                    self._arrendamentos += 1
+                    cred.arrendamentos += 1
+                    cred.ultimo_arrendamento = self._arrendamentos
+                    return cred
+                validas = [c for c in self._credenciais if c.valida()]
+                if not validas:
+                    self._refresh_token()
+                    continue
+                espera = min(c.descanso_ate for c in validas) - agora_mono
+                if limite is not None:
+                    espera = min(espera, limite - agora_mono)
+                    if espera <= 0:
+                        raise TimeoutError("⛔ Nenhum token disponível no pool.")
+                self._disponivel.wait(max(espera, 0.01))
+
+    def _credencial_do_token(self, token):
+        for cred in self._credenciais:
+            if cred.token == token:
+                return cred
+        return None
+
+    # ---------- resultado das requisições ----------
+    def marcar_sucesso(self, token=None):
+        with self._lock:
+            cred = self._credencial_do_token(token) if token is not None else self._credenciais[self.current_index]
+            if cred is None:
                 return
-            else:
-                logging.warning(f"❌ Falha ao autenticar com {login['username']}")
-                self.current_index = (self.current_index + 1) % len(self.login_list)
-                tentativas += 1
-        raise Exception("⛔ Nenhum token válido disponível.")
+            cred.falhas = 0
+            cred.sucessos += 1
+            if cred is self._credenciais[self.current_index] and cred.sucessos >= self.revezamento_intervalo:
+                cred.sucessos = 0
+                logging.info(f"🔄 Revezamento: atingido limite de {self.revezamento_intervalo} requisições. Alternando token.")
+                self._ativar_proximo(self.current_index)
 
-    def get_token(self):
-        return self.token
+    def rotate_login_on_error(self, token_falho=None):
+        """
+        Registra a falha de `token_falho` (padrão: o ativo): o token fica
+        `descanso_falha_s` fora do rodízio e o ativo passa para outro token válido.
+        Se o token já tinha sido trocado (outra thread), nada muda.
+        """
+        relogar = None
+        with self._lock:
+            cred = self._credenciais[self.current_index] if token_falho is None else self._credencial_do_token(token_falho)
+            if cred is None:
+                return
+            cred.falhas += 1
+            cred.descanso_ate = time.monotonic() + self.descanso_falha_s
+            get_registro().contar("zapform_rotacoes_token_total")
+            if cred.falhas >= FALHAS_PARA_RELOGIN:
+                get_registro().contar("zapform_relogins_total")
+                logging.warning(f"❌ {cred.falhas} falhas seguidas com {cred.login['username']}; refazendo o login")
+                cred.token, cred.expira_em = None, None
+                relogar = cred
+            if cred is self._credenciais[self.current_index]:
+                self._ativar_proximo(self.current_index)
+        if relogar is not None:
+            self._logar([relogar])
+            with self._lock:
+                if not self._credenciais[self.current_index].valida():
+                    self._ativar_proximo(self.current_index)
 
-    def marcar_sucesso(self):
-        self.sucesso_count += 1
-        if self.sucesso_count >= self.revezamento_intervalo:
-            logging.info(f"🔄 Revezamento: atingido limite de {self.revezamento_intervalo} requisições. Alternando token.")
-            self.rotate_login_on_error()
 
-    def rotate_login_on_error(self):
-        self.current_index = (self.current_index + 1) % len(self.login_list)
-        self.refresh_token()
+# nome antigo, mantido para quem ainda importa o gerenciador de um token só
+TokenManager = TokenPool
@@ -0,0 +1,195 @@
+"""
+Entrega da caixa de saída (`CaixaSaida`) contra um servidor SMTP local (aiosmtpd):
+conexão única, reconexão quando o servidor derruba a conexão e o status "na_fila"
+devolvido pelas funções de `email_sender` quando recebem a caixa.
+
+    python -m pytest tests/test_email_outbox.py
+"""
+
+import time
+import asyncio
+import socket
+import threading
+from email import message_from_bytes, policy
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from report_generator.email_outbox import CaixaSaida
+from report_generator.email_sender import montar_email, send_email_with_attachment, send_simple_email
+
+REMETENTE = "relatorios@exemplo.com"
+DESTINATARIO = "cliente@exemplo.com"
+
+
+class CaixaPostal:
+    """Handler do aiosmtpd que guarda as mensagens recebidas e a conexão (peer) de cada uma."""
+
+    def __init__(self):
+        self.recebidas = []  # (peer, mensagem)
+        self.portao = threading.Event()  # fechado: o DATA espera (a mensagem fica "na_fila")
+        self.portao.set()
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.get_running_loop().run_in_executor(None, self.portao.wait, 10)
+        msg = message_from_bytes(envelope.original_content or envelope.content, policy=policy.default)
+        self.recebidas.append((session.peer, msg))
+        return "250 OK"
+
+    @property
+    def assuntos(self):
+        return [msg["Subject"] for _, msg in self.recebidas]
+
+    @property
+    def conexoes(self):
+        return len({peer for peer, _ in self.recebidas})
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServidorSMTP:
+    def __init__(self):
+        self.porta = _porta_livre()
+        self.caixa_postal = CaixaPostal()
+        self._controller = None
+
+    def iniciar(self):
+        self._controller = Controller(self.caixa_postal, hostname="127.0.0.1", port=self.porta)
+        self._controller.start()
+
+    def parar(self):
+        # encerra também as conexões abertas (o cliente só descobre no próximo envio)
+        self._controller.stop()
+
+    def reiniciar(self):
+        self.parar()
+        self.iniciar()
+
+    @property
+    def endereco(self):
+        return f"127.0.0.1:{self.porta}"
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorSMTP()
+    servidor.iniciar()
+    yield servidor
+    servidor.caixa_postal.portao.set()
+    servidor.parar()
+
+
+@pytest.fixture
+def caixa(servidor):
+    caixa = CaixaSaida(REMETENTE, None, servidor=servidor.endereco, timeout=5)
+    yield caixa
+    caixa.fechar()
+
+
+def _mensagem(assunto):
+    return montar_email(REMETENTE, DESTINATARIO, assunto, "corpo")
+
+
+def test_entrega_pela_mesma_conexao(servidor, caixa):
+    for i in range(3):
+        caixa.enviar(_mensagem(f"Relatório {i}"), referencia=str(i))
+    entregas = caixa.esvaziar()
+
+    assert [e["status"] for e in entregas] == ["enviado"] * 3
+    assert [e["tentativas"] for e in entregas] == [1, 1, 1]
+    assert [e["referencia"] for e in entregas] == ["0", "1", "2"]
+    assert servidor.caixa_postal.assuntos == ["Relatório 0", "Relatório 1", "Relatório 2"]
+    assert servidor.caixa_postal.conexoes == 1
+
+
+def test_reconecta_quando_o_servidor_derruba_a_conexao(servidor, caixa):
+    caixa.enviar(_mensagem("Antes"))
+    assert caixa.esvaziar()[0]["status"] == "enviado"
+
+    servidor.reiniciar()
+    caixa.enviar(_mensagem("Depois"))
+    entrega, = caixa.esvaziar()
+
+    assert entrega["status"] == "enviado"
+    assert entrega["tentativas"] == 2
+    assert entrega["erro"] is None
+    assert servidor.caixa_postal.assuntos == ["Antes", "Depois"]
+    assert servidor.caixa_postal.conexoes == 2
+
+
+def test_falha_depois_das_tentativas(servidor):
+    caixa = CaixaSaida(REMETENTE, None, servidor=servidor.endereco, tentativas=2, timeout=5)
+    servidor.parar()
+    try:
+        caixa.enviar(_mensagem("Sem servidor"))
+        entrega, = caixa.esvaziar()
+    finally:
+        servidor.iniciar()
+        caixa.fechar()
+
+    assert entrega["status"] == "falha"
+    assert entrega["tentativas"] == 2
+    assert entrega["erro"]
+    assert servidor.caixa_postal.recebidas == []
+
+
+def test_conexao_ociosa_e_fechada_e_reaberta(servidor):
+    caixa = CaixaSaida(REMETENTE, None, servidor=servidor.endereco, ocioso_s=0.2, timeout=5)
+    try:
+        caixa.enviar(_mensagem("Primeiro"))
+        caixa.esvaziar()
+        # passa do tempo ocioso: a thread encerra a conexão por conta própria
+        for _ in range(50):
+            if caixa._smtp is None:
+                break
+            time.sleep(0.05)
+        assert caixa._smtp is None
+
+        caixa.enviar(_mensagem("Segundo"))
+        entrega, = caixa.esvaziar()
+    finally:
+        caixa.fechar()
+
+    assert (entrega["status"], entrega["tentativas"]) == ("enviado", 1)
+    assert servidor.caixa_postal.conexoes == 2
+
+
+def test_funcoes_do_email_sender_devolvem_o_status_na_fila(servidor, caixa, tmp_path):
+    anexo = tmp_path / "report_config_726.xlsx"
+    anexo.write_bytes(b"PK\x03\x04conteudo")
+    servidor.caixa_postal.portao.clear()
+
+    com_anexo = send_email_with_attachment(
+        REMETENTE, [DESTINATARIO], "Relatório 726", "corpo", None, str(anexo), caixa=caixa, referencia="726"
+    )
+    simples = send_simple_email(REMETENTE, DESTINATARIO, "Resumo", "corpo", None, caixa=caixa, referencia="resumo")
+
+    for entrega, referencia, assunto in ((com_anexo, "726", "Relatório 726"), (simples, "resumo", "Resumo")):
+        assert entrega["status"] == "na_fila"
+        assert entrega["referencia"] == referencia
+        assert entrega["assunto"] == assunto
+        assert entrega["destinatarios"] == DESTINATARIO
+
+    servidor.caixa_postal.portao.set()
+    entregas = caixa.esvaziar()
+
+    # o status devolvido é o mesmo registro atualizado pela thread de envio
+    assert entregas[0] is com_anexo and entregas[1] is simples
+    assert com_anexo["status"] == simples["status"] == "enviado"
+    _, msg = servidor.caixa_postal.recebidas[0]
+    anexos = [parte.get_filename() for parte in msg.iter_attachments()]
+    assert anexos == ["report_config_726.xlsx"]
+
+
+def test_anexo_ilegivel_nao_entra_na_fila(caixa, tmp_path):
+    resultado = send_email_with_attachment(
+        REMETENTE, DESTINATARIO, "Relatório", "corpo", None, str(tmp_path / "nao_existe.xlsx"), caixa=caixa
+    )
+    assert resultado is False
+    assert caixa.esvaziar() == []
@@ -0,0 +1,130 @@
+"""
+Propriedades do calendário compilado (`CalendarioSLA`): em calendários e instantes
+aleatórios, os resultados são idênticos aos das funções dia a dia de `sla_utils`.
+
+    python -m pytest tests/test_sla_calendar.py
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from report_generator.utils.sla_calendar import (
+    TZ, CalendarioSLA, _minutos_sla, para_us, deslocamento_us
+)
+from report_generator.utils.sla_utils import calculate_working_time, calculate_sla_deadline, calcular_dias_uteis
+
+ANO_BASE = 2018  # três anos a partir daqui: inclui anos com horário de verão
+CASOS = 60
+AMOSTRAS_POR_CASO = 20
+
+
+def _turnos_aleatorios(rng):
+    turnos = []
+    minuto = rng.choice([0, 6 * 60, 7 * 60, 8 * 60, 9 * 60])
+    for _ in range(rng.randint(1, 3)):
+        inicio = minuto + rng.choice([0, 30, 60, 90])
+        fim = inicio + rng.choice([60, 120, 180, 240, 270])
+        if fim >= 24 * 60:
+            break
+        turnos.append({"start": f"{inicio // 60:02d}:{inicio % 60:02d}", "end": f"{fim // 60:02d}:{fim % 60:02d}"})
+        minuto = fim
+    return turnos
+
+
+def gerar_sla_info_aleatorio(rng, ano_base=ANO_BASE):
+    """Entrada de SLA sintética: dias úteis variados, 1–3 turnos e feriados."""
+    active_days = {}
+    for weekday in range(7):
+        if rng.random() < (0.9 if weekday < 5 else 0.3):
+            turnos = _turnos_aleatorios(rng)
+            if turnos:
+                active_days[weekday] = turnos
+    if not active_days:
+        active_days[0] = [{"start": "08:00", "end": "12:00"}]
+    inicio = datetime(ano_base, 1, 1)
+    holidays = {(inicio + timedelta(days=rng.randint(0, 3 * 365))).strftime("%Y-%m-%d") for _ in range(rng.randint(0, 25))}
+    horas = rng.choice([0, 1, 2, 4, 8, 24, 48, 120, 400])
+    return {
+        "sla_type": "hours",
+        "sla_time": f"{horas:02d}:{rng.choice([0, 15, 30, 45]):02d}",
+        "active_days": active_days,
+        "holidays": holidays,
+    }
+
+
+def _instante_aleatorio(rng, ano_base=ANO_BASE):
+    inicio = TZ.localize(datetime(ano_base, 1, 1))
+    segundos = rng.randint(0, 3 * 365 * 86400)
+    dt = (inicio + timedelta(seconds=segundos, microseconds=rng.choice([0, 0, rng.randint(0, 999999)])))
+    return TZ.normalize(dt)
+
+
+def _pares_aleatorios(rng, quantidade):
+    pares = []
+    for _ in range(quantidade):
+        a = _instante_aleatorio(rng)
+        b = a + timedelta(seconds=rng.choice([0, 59, 3600, 86400, 7 * 86400, 90 * 86400]) * rng.random())
+        if rng.random() < 0.3:
+            # mesma fração de segundo em a e b: total exato inteiro (caso de arredondamento do float)
+            b = a + timedelta(seconds=int((b - a).total_seconds()))
+        b = TZ.normalize(b)
+        if rng.random() < 0.1:
+            a, b = b, a
+        pares.append((a, b))
+    return pares
+
+
+@pytest.fixture(params=range(CASOS), ids=lambda seed: f"seed{seed}")
+def caso(request):
+    rng = random.Random(request.param)
+    sla_info = gerar_sla_info_aleatorio(rng)
+    return sla_info, CalendarioSLA(sla_info), _pares_aleatorios(rng, AMOSTRAS_POR_CASO)
+
+
+def test_tempo_util_igual_calculate_working_time(caso):
+    sla_info, calendario, pares = caso
+    for a, b in pares:
+        assert calendario.tempo_util(a, b) == calculate_working_time(a, b, sla_info), (a, b)
+
+
+def test_prazo_igual_calculate_sla_deadline(caso):
+    sla_info, calendario, pares = caso
+    minutos = _minutos_sla(sla_info["sla_time"])
+    for a, _ in pares:
+        esperado = calculate_sla_deadline(a, sla_info)
+        obtido = calendario.prazo(a, minutos)
+        assert obtido == esperado, a
+        assert obtido.strftime("%d/%m/%Y %H:%M") == esperado.strftime("%d/%m/%Y %H:%M"), a
+
+
+def test_dias_uteis_igual_calcular_dias_uteis(caso):
+    sla_info, calendario, pares = caso
+    for a, b in pares:
+        a_naive, b_naive = a.replace(tzinfo=None), b.replace(tzinfo=None)
+        assert calendario.dias_uteis(a_naive, b_naive) == calcular_dias_uteis(a_naive, b_naive, sla_info), (a, b)
+
+
+def test_lote_igual_escalar(caso):
+    sla_info, calendario, pares = caso
+    inicio_us = np.array([para_us(a) for a, _ in pares], dtype=np.int64)
+    fim_us = np.array([para_us(b) for _, b in pares], dtype=np.int64)
+    if not calendario.preparar_lote(min(inicio_us.min(), fim_us.min()), max(inicio_us.max(), fim_us.max())):
+        pytest.skip("calendário não vetorizável (turnos sobrepostos ou fora do dia)")
+
+    desloc = np.array([deslocamento_us(a) for a, _ in pares], dtype=np.int64)
+    minutos = _minutos_sla(sla_info["sla_time"])
+    uteis = calendario.tempo_util_lote(inicio_us, fim_us, desloc)
+    prazos, prazos_desloc = calendario.prazo_lote(inicio_us, desloc, np.full(len(pares), minutos))
+    for (a, b), util, prazo, prazo_desloc in zip(pares, uteis, prazos, prazos_desloc):
+        assert int(util) == calculate_working_time(a, b, sla_info), (a, b)
+        esperado = calculate_sla_deadline(a, sla_info)
+        assert (int(prazo), int(prazo_desloc)) == (para_us(esperado), deslocamento_us(esperado)), a
+
+
+def test_calendario_sem_turnos_nao_calcula_prazo():
+    calendario = CalendarioSLA({"sla_type": "hours", "sla_time": "08:00", "active_days": {}, "holidays": set()})
+    with pytest.raises(ValueError):
+        calendario.prazo(TZ.localize(datetime(2024, 1, 1, 9)), 60)